@@ -1,11 +1,30 @@
+import hashlib
+import json
 import re
+from contextlib import ExitStack
 from datetime import datetime, timezone
-from typing import Optional
-
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
-from fastapi.responses import PlainTextResponse
-from peewee import fn
-from pydantic import BaseModel, ConfigDict
+from typing import Any, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from peewee import IntegrityError, fn
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 import os
 
 from backend.auth import (
@@ -15,11 +34,36 @@ from backend.auth import (
     get_current_user_or_api_key,
     get_current_admin,
 )
-from backend.database import db
+from backend.batch import BATCH_MAX_CALLS, run_call
+from backend.boards import board_fields, board_pages, board_payload
+from backend.bulk import insert_rows, set_by_id, update_by_id
+from backend.changes import (
+    DELETE,
+    UPSERT,
+    board_delta,
+    comments_by,
+    record_changes,
+)
+from backend.database import current_shard, db, read_only, using_shard
+from backend.events import EVENTS_KEEPALIVE_SECONDS, board_events, sse_message
+from backend.hashing import password_hasher
+from backend.keyusage import api_key_usage
 from backend.mailer import send_invite_email, send_verification_email
+from backend.ordering import POSITION_GAP, moved, place
+from backend.purge import retention_cutoff
+from backend.scope import RequestScope, request_scope
+from backend.shards import (
+    all_shards,
+    delete_user_content,
+    enabled as sharding_enabled,
+    route_to_board,
+    route_to_row,
+)
+from backend.snapshots import board_snapshots, snapshot_key
 from backend.models import (
     User,
     Board,
+    UserBoardAccess,
     Column,
     Card,
     Comment,
@@ -31,7 +75,10 @@ from backend.models import (
     ApiKey,
     OrganizationInvite,
     EmailVerificationToken,
+    ShardPlacement,
     _as_datetime,
+    check_password_length,
+    not_deleted,
 )
 
 api = APIRouter()
@@ -45,33 +92,46 @@ UNVERIFIED_EMAIL_DETAIL = "Email not verified"
 # Minimum gap between verification emails for one account.
 RESEND_COOLDOWN_SECONDS = 60
 
+# Most operations one POST /cards/bulk may carry. Bigger imports send several.
+CARDS_BULK_MAX_OPERATIONS = int(os.environ.get("CARDS_BULK_MAX_OPERATIONS", "1000"))
+
 
 def slugify(text):
     return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
 
 
 def can_access_board(user, board):
-    # Owner can always access
-    if board.owner == user:
+    # Owner can always access, and that needs no query at all.
+    if board.owner_id == user.id:
         return True
 
-    # Board shared with team - check if user is team member
-    if board.shared_team:
-        return (
-            TeamMember.get_or_none(
-                (TeamMember.user == user) & (TeamMember.team == board.shared_team)
-            )
-            is not None
-        )
+    # Everyone else is a member of the team the board is shared with, which
+    # UserBoardAccess has already worked out. Public-to-org boards grant
+    # nothing more yet; access to those still goes through a shared team.
+    return (
+        UserBoardAccess.select()
+        .where((UserBoardAccess.user == user) & (UserBoardAccess.board == board))
+        .exists()
+    )
 
-    # Board public to org - check if user is org member
-    if board.is_public_to_org:
-        # This requires going through teams to get the org
-        # Or we could add a org_id to boards directly
-        # For now, skip this - we'll handle it via the shared_team approach
-        pass
 
-    return False
+def unshare_team_boards(teams):
+    """Stop sharing every board shared with `teams`, ahead of deleting them.
+
+    Bulk rather than through Board.save(), so the access rows and the change
+    log are updated here, once.
+    """
+    board_ids = [
+        board_id
+        for (board_id,) in Board.select(Board.id)
+        .where(Board.shared_team.in_(teams))
+        .tuples()
+    ]
+    if not board_ids:
+        return
+    Board.update(shared_team=None).where(Board.id.in_(board_ids)).execute()
+    UserBoardAccess.refresh(board_ids)
+    record_changes((board_id, "board", board_id, UPSERT) for board_id in board_ids)
 
 
 def can_modify_board(user, board):
@@ -97,6 +157,158 @@ def can_share_board(user, board):
     return board.owner == user
 
 
+# Loaded with their column and board joined in, so the permission check and
+# the change log never go back for them. Each also routes the request to the
+# shard the row is in. A row under anything deleted is not found.
+def scoped_card(scope, card_id):
+    route_to_row("card", card_id)
+    query = (
+        Card.select(Card, Column, Board)
+        .join(Column)
+        .join(Board)
+        .where(*not_deleted(Card, Column, Board))
+    )
+    return scope.get(Card, card_id, query)
+
+
+def scoped_column(scope, column_id):
+    route_to_row("column", column_id)
+    query = (
+        Column.select(Column, Board)
+        .join(Board)
+        .where(*not_deleted(Column, Board))
+    )
+    return scope.get(Column, column_id, query)
+
+
+def scoped_comment(scope, comment_id):
+    route_to_row("comment", comment_id)
+    query = (
+        Comment.select(Comment, User, Card, Column, Board)
+        .join(User)
+        .switch(Comment)
+        .join(Card)
+        .join(Column)
+        .join(Board)
+        .where(*not_deleted(Card, Column, Board))
+    )
+    return scope.get(Comment, comment_id, query)
+
+
+def content_counts(board):
+    """(columns, cards) on `board`, counted in its shard."""
+    with using_shard(ShardPlacement.shard_of("board", board.id)):
+        column_count = (
+            Column.select()
+            .where((Column.board == board) & Column.deleted_at.is_null())
+            .count()
+        )
+        card_count = (
+            Card.select()
+            .join(Column)
+            .where(Column.board == board, *not_deleted(Column, Card))
+            .count()
+        )
+    return column_count, card_count
+
+
+def soft_delete_board(board):
+    """Hide `board` and everything on it; backend.purge deletes them later.
+
+    One update to the catalog, however big the board. The version bump sends
+    its streams `gone`, as the board is no longer found.
+    """
+    board.deleted_at = datetime.now(timezone.utc)
+    with db.atomic():
+        board.save()
+        record_changes([(board.id, "board", board.id, UPSERT)])
+    board_snapshots.discard(board.id)
+
+
+def column_changes(column, op):
+    """Change log entries for `column` and the cards still on it."""
+    cards = (
+        Card.select(Card.id)
+        .where((Card.column == column) & Card.deleted_at.is_null())
+        .tuples()
+    )
+    changes = [(column.board_id, "column", column.id, op)]
+    changes.extend((column.board_id, "card", card_id, op) for (card_id,) in cards)
+    return changes
+
+
+def live_board(board_id):
+    """The board with id `board_id`, unless it is missing or deleted."""
+    return Board.get_or_none((Board.id == board_id) & Board.deleted_at.is_null())
+
+
+def deleted_within_retention(query, model):
+    """`query`'s row if it is deleted and can still be restored, or None."""
+    return query.where(
+        model.deleted_at.is_null(False) & (model.deleted_at >= retention_cutoff())
+    ).first()
+
+
+def may_access(scope, user, board):
+    """can_access_board, asked at most once per request for each board."""
+    return scope.memo(
+        ("access", user.id, board.id), lambda: can_access_board(user, board)
+    )
+
+
+def may_modify(scope, user, board):
+    """can_modify_board, asked at most once per request for each board."""
+    return scope.memo(
+        ("modify", user.id, board.id), lambda: can_modify_board(user, board)
+    )
+
+
+def make_etag(*parts):
+    """A strong validator for a response determined entirely by `parts`."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def payload_etag(payload):
+    """A strong validator for data with no version of its own to derive one
+    from: a hash of the payload itself."""
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True)
+    return make_etag(encoded)
+
+
+def validator_headers(etag):
+    # no-cache does not mean "don't store": it means "revalidate before every
+    # use", which is exactly the conditional GET the clients make. private,
+    # because every one of these responses depends on who is asking.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def client_has(request, etag):
+    """True when the request's If-None-Match already names `etag`.
+
+    If-None-Match compares weakly (RFC 9110 13.1.2), so a W/ prefix some proxy
+    added on the way back does not stop a match.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag):
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag)
+    )
+
+
 def get_user_organizations(user):
     return (
         Organization.select()
@@ -175,6 +387,13 @@ class ColumnReorderRequest(BaseModel):
     columns: list[ColumnReorderItem]
 
 
+class ColumnMove(BaseModel):
+    # Right after `after_id`, right before `before_id`, or both; with
+    # neither, last on the board.
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+
 class ColumnResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -188,7 +407,8 @@ class CardCreate(BaseModel):
     column_id: int
     title: str
     description: Optional[str] = None
-    position: int
+    # Omitted means "append after the last card", as for columns.
+    position: Optional[int] = None
 
 
 class CardUpdate(BaseModel):
@@ -207,6 +427,42 @@ class CardReorderRequest(BaseModel):
     cards: list[CardReorderItem]
 
 
+class CardMove(BaseModel):
+    # Right after `after_id`, right before `before_id`, or both -- cards in
+    # the column it goes to. With neither, last in `column_id`, by default
+    # its own column.
+    column_id: Optional[int] = None
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+
+CARD_BULK_OPS = ("create", "update", "move", "delete")
+
+
+class CardBulkOperation(BaseModel):
+    # create: column_id and title, and optionally description and position --
+    #         omitted appends, as for POST /cards.
+    # update: id, and any of title, description, position and column_id.
+    # move:   id, and column_id, after_id and/or before_id, as for
+    #         POST /cards/{id}/move.
+    # delete: id.
+    op: str
+    id: Optional[int] = None
+    column_id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    position: Optional[int] = None
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+
+class CardBulkRequest(BaseModel):
+    operations: list[CardBulkOperation]
+    # By default one failing operation means none is applied. With
+    # best_effort the others go through and the failures are only reported.
+    best_effort: bool = False
+
+
 class CardResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -252,6 +508,27 @@ class CommentResponse(BaseModel):
     updated_at: Optional[datetime]
 
 
+class BoardDeletions(BaseModel):
+    columns: list[int] = []
+    cards: list[int] = []
+    comments: list[int] = []
+
+
+class BoardChangesResponse(BaseModel):
+    board_id: int
+    since: int
+    version: int
+    # True when the change log no longer reaches back to `since`; `snapshot`
+    # then carries the whole board and everything else is empty.
+    full: bool
+    board: Optional[dict] = None
+    columns: list[dict] = []
+    cards: list[dict] = []
+    comments: list[CommentResponse] = []
+    deleted: BoardDeletions
+    snapshot: Optional[BoardResponse] = None
+
+
 class OrganizationCreate(BaseModel):
     name: str
 
@@ -427,10 +704,17 @@ class BoardResponseAdmin(BaseModel):
     created_at: datetime
 
 
+# login and signup are the two routes left async: they await the hashing
+# pool instead of holding a thread for the length of a bcrypt, and put their
+# queries on the threadpool themselves.
 @api.post("/token", response_model=Token)
 async def login(request: LoginRequest):
-    user = User.get_or_none(User.username == request.username)
-    if not user or not user.verify_password(request.password):
+    user = await run_in_threadpool(
+        User.get_or_none, User.username == request.username
+    )
+    if not user or not await password_hasher.check_async(
+        request.password, user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -455,6 +739,26 @@ async def signup(request: SignupRequest, background_tasks: BackgroundTasks):
     membership comes only from an owner adding you or from accepting an
     invite token.
     """
+    username, email = await run_in_threadpool(check_signup, request)
+    try:
+        check_password_length(request.password)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    password_hash = await password_hasher.hash_async(request.password)
+    user, token = await run_in_threadpool(
+        create_signup, username, email, request.password, password_hash
+    )
+
+    background_tasks.add_task(send_verification_email, user, token)
+
+    return {
+        "message": "Account created. Check your email for a verification link.",
+        "email": user.email,
+    }
+
+
+def check_signup(request):
+    """The (username, email) a signup asks for, once both are known free."""
     username = request.username.strip()
     email = request.email.strip().lower()
 
@@ -463,6 +767,11 @@ async def signup(request: SignupRequest, background_tasks: BackgroundTasks):
     if not re.match(EMAIL_PATTERN, email):
         raise HTTPException(status_code=400, detail="Invalid email address")
 
+    check_signup_free(username, email)
+    return username, email
+
+
+def check_signup_free(username, email):
     if User.get_or_none(User.username == username):
         raise HTTPException(status_code=400, detail="Username is already taken")
     if User.get_or_none(User.email == email):
@@ -474,29 +783,32 @@ async def signup(request: SignupRequest, background_tasks: BackgroundTasks):
             status_code=400, detail="An account with that email already exists"
         )
 
+
+def create_signup(username, email, password, password_hash):
+    """The new account and its verification token.
+
+    check_signup ran before the password was hashed, and another signup for
+    the same username or email can commit in that time. The unique indexes
+    then refuse this one; it is answered as if the check had caught it.
+    """
     try:
         with db.atomic():
             user = User.create_user(
                 username=username,
-                password=request.password,
+                password=password,
                 email=email,
                 email_verified=False,
+                password_hash=password_hash,
             )
             _, token = EmailVerificationToken.create_for(user)
-    except ValueError as exc:
-        # Raised by create_user past PASSWORD_MAX_LENGTH.
-        raise HTTPException(status_code=400, detail=str(exc))
-
-    background_tasks.add_task(send_verification_email, user, token)
-
-    return {
-        "message": "Account created. Check your email for a verification link.",
-        "email": user.email,
-    }
+    except IntegrityError:
+        check_signup_free(username, email)
+        raise
+    return user, token
 
 
 @api.post("/verify-email", response_model=Token)
-async def verify_email(request: VerifyEmailRequest):
+def verify_email(request: VerifyEmailRequest):
     """Consume a verification token and log the user in.
 
     POST rather than a GET link target on purpose: mail scanners and link
@@ -530,7 +842,7 @@ async def verify_email(request: VerifyEmailRequest):
 
 
 @api.post("/resend-verification")
-async def resend_verification(
+def resend_verification(
     request: ResendVerificationRequest, background_tasks: BackgroundTasks
 ):
     """Re-send a verification email.
@@ -571,7 +883,8 @@ async def resend_verification(
 
 
 @api.get("/health")
-async def health():
+@read_only
+def health():
     """Liveness check for the deploy pipeline. Public, no auth.
 
     Deliberately fetches a User row rather than returning a constant. A
@@ -607,14 +920,23 @@ async def health():
 
 
 @api.get("/admin/status")
-async def admin_status(current_user: User = Depends(get_current_user_or_api_key)):
+@read_only
+def admin_status(current_user: User = Depends(get_current_user_or_api_key)):
     """Check if current user has admin access"""
     return {"is_admin": current_user.admin}
 
 
+@api.get("/admin/hashing")
+@read_only
+def hashing_stats(current_admin_user: User = Depends(get_current_admin)):
+    """Queue depth and latency of the password hashing pool."""
+    return password_hasher.stats()
+
+
 # Admin user management endpoints
 @api.get("/admin/users", response_model=list)
-async def list_admin_users(current_admin_user: User = Depends(get_current_admin)):
+@read_only
+def list_admin_users(current_admin_user: User = Depends(get_current_admin)):
     """List all users (admin only)"""
     users = User.select().order_by(User.id)
     return [
@@ -624,7 +946,7 @@ async def list_admin_users(current_admin_user: User = Depends(get_current_admin)
 
 
 @api.post("/admin/users", response_model=UserResponse)
-async def create_admin_user(
+def create_admin_user(
     user_data: UserCreate,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -642,12 +964,14 @@ async def create_admin_user(
             "email": user.email,
             "admin": user.admin,
         }
-    except Exception as e:
+    # A taken username or email, or an overlong password. Nothing wider: a
+    # busy hashing pool has to reach main.py's 503.
+    except (IntegrityError, ValueError) as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @api.put("/admin/users/{user_id}", response_model=UserResponse)
-async def update_admin_user(
+def update_admin_user(
     user_id: int,
     user_data: UserUpdate,
     current_admin_user: User = Depends(get_current_admin),
@@ -679,10 +1003,19 @@ async def update_admin_user(
         if existing_email:
             raise HTTPException(status_code=400, detail="Email already taken")
 
+    renamed = user.username != user_data.username
     user.username = user_data.username
     user.email = user_data.email
     user.admin = user_data.admin
-    user.save()
+    with db.atomic():
+        user.save()
+        # Comment authors are shown by username, so every board this user has
+        # commented on now renders differently.
+        if renamed:
+            record_changes(
+                (board_id, "comment", comment_id, UPSERT)
+                for board_id, comment_id in comments_by(user)
+            )
 
     return {
         "id": user.id,
@@ -693,7 +1026,7 @@ async def update_admin_user(
 
 
 @api.delete("/admin/users/{user_id}")
-async def delete_admin_user(
+def delete_admin_user(
     user_id: int,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -706,16 +1039,29 @@ async def delete_admin_user(
     if user == current_admin_user:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
 
+    # Their comments on other people's boards go with them. Found first: with
+    # sharding on, each shard deletes its part and commits ahead of the catalog.
+    authored = comments_by(user)
+    for shard in all_shards()[1:]:
+        with using_shard(shard), db.atomic():
+            delete_user_content(user)
     with db.atomic():
-        # Delete cards, columns, boards, team memberships, org memberships, etc.
-        # This is a cascade delete - Peewee should handle foreign key cascades
+        record_changes(
+            (board_id, "comment", comment_id, DELETE)
+            for board_id, comment_id in authored
+        )
+        # The bulk of it -- comments, and the columns and cards on their
+        # boards -- in a few set-based statements, leaving the recursive
+        # delete only the account's own rows: boards, memberships, keys.
+        delete_user_content(user)
+        ShardPlacement.forget_boards(Board.select(Board.id).where(Board.owner == user))
         user.delete_instance(recursive=True)
 
     return {"ok": True}
 
 
 @api.post("/admin/users/{user_id}/reset-password")
-async def reset_user_password(
+def reset_user_password(
     user_id: int,
     reset_data: PasswordReset,
     current_admin_user: User = Depends(get_current_admin),
@@ -726,18 +1072,12 @@ async def reset_user_password(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Use the same password validation as create_user
-    from bcrypt import hashpw, gensalt
-
-    PASSWORD_MAX_LENGTH = 72
-    if len(reset_data.password) > PASSWORD_MAX_LENGTH:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Password must be {PASSWORD_MAX_LENGTH} characters or fewer",
-        )
+    try:
+        check_password_length(reset_data.password)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    user.password_hash = hashpw(reset_data.password.encode("utf-8"), gensalt()).decode(
-        "utf-8"
-    )
+    user.password_hash = password_hasher.hash(reset_data.password)
     user.save()
 
     return {"ok": True}
@@ -745,7 +1085,8 @@ async def reset_user_password(
 
 # Admin organization management endpoints
 @api.get("/admin/organizations", response_model=list)
-async def list_admin_organizations(
+@read_only
+def list_admin_organizations(
     current_admin_user: User = Depends(get_current_admin),
 ):
     """List all organizations (admin only)"""
@@ -774,7 +1115,7 @@ async def list_admin_organizations(
 
 
 @api.post("/admin/organizations", response_model=OrganizationResponseAdmin)
-async def create_admin_organization(
+def create_admin_organization(
     org_data: OrganizationCreateAdmin,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -821,7 +1162,7 @@ async def create_admin_organization(
 
 
 @api.put("/admin/organizations/{org_id}", response_model=OrganizationResponseAdmin)
-async def update_admin_organization(
+def update_admin_organization(
     org_id: int,
     org_data: OrganizationUpdateAdmin,
     current_admin_user: User = Depends(get_current_admin),
@@ -869,7 +1210,7 @@ async def update_admin_organization(
 
 
 @api.delete("/admin/organizations/{org_id}")
-async def delete_admin_organization(
+def delete_admin_organization(
     org_id: int,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -879,6 +1220,9 @@ async def delete_admin_organization(
         raise HTTPException(status_code=404, detail="Organization not found")
 
     with db.atomic():
+        # The recursive delete would only null these boards' shared_team out
+        # from under UserBoardAccess and the change log.
+        unshare_team_boards(list(org.teams))
         org.delete_instance(recursive=True)
 
     return {"ok": True}
@@ -886,7 +1230,8 @@ async def delete_admin_organization(
 
 # Admin team management endpoints
 @api.get("/admin/teams", response_model=list)
-async def list_admin_teams(current_admin_user: User = Depends(get_current_admin)):
+@read_only
+def list_admin_teams(current_admin_user: User = Depends(get_current_admin)):
     """List all teams (admin only)"""
     teams = Team.select().order_by(Team.id)
     result = []
@@ -906,7 +1251,7 @@ async def list_admin_teams(current_admin_user: User = Depends(get_current_admin)
 
 
 @api.post("/admin/teams", response_model=TeamResponseAdmin)
-async def create_admin_team(
+def create_admin_team(
     team_data: TeamCreateAdmin,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -930,7 +1275,7 @@ async def create_admin_team(
 
 
 @api.put("/admin/teams/{team_id}", response_model=TeamResponseAdmin)
-async def update_admin_team(
+def update_admin_team(
     team_id: int,
     team_data: TeamUpdateAdmin,
     current_admin_user: User = Depends(get_current_admin),
@@ -964,7 +1309,7 @@ async def update_admin_team(
 
 
 @api.delete("/admin/teams/{team_id}")
-async def delete_admin_team(
+def delete_admin_team(
     team_id: int,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -974,10 +1319,9 @@ async def delete_admin_team(
         raise HTTPException(status_code=404, detail="Team not found")
 
     with db.atomic():
-        # Remove team from any boards
-        Board.update(shared_team=None).where(Board.shared_team == team)
+        unshare_team_boards([team])
         # Delete team members
-        TeamMember.delete().where(TeamMember.team == team)
+        TeamMember.delete().where(TeamMember.team == team).execute()
         # Delete team
         team.delete_instance()
 
@@ -986,7 +1330,8 @@ async def delete_admin_team(
 
 # Admin team member management endpoints
 @api.get("/admin/teams/{team_id}/members", response_model=list)
-async def list_admin_team_members(
+@read_only
+def list_admin_team_members(
     team_id: int,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -1008,7 +1353,8 @@ async def list_admin_team_members(
 
 
 @api.get("/admin/teams/{team_id}/available-members", response_model=list)
-async def list_available_team_members(
+@read_only
+def list_available_team_members(
     team_id: int,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -1043,7 +1389,7 @@ async def list_available_team_members(
 
 
 @api.post("/admin/teams/{team_id}/members", response_model=dict)
-async def add_admin_team_member(
+def add_admin_team_member(
     team_id: int,
     request: UsernameRequest,
     current_admin_user: User = Depends(get_current_admin),
@@ -1087,7 +1433,7 @@ async def add_admin_team_member(
 
 
 @api.delete("/admin/teams/{team_id}/members/{user_id}")
-async def remove_admin_team_member(
+def remove_admin_team_member(
     team_id: int,
     user_id: int,
     current_admin_user: User = Depends(get_current_admin),
@@ -1109,13 +1455,13 @@ async def remove_admin_team_member(
 
 # Admin board management endpoints
 @api.get("/admin/boards", response_model=list)
-async def list_admin_boards(current_admin_user: User = Depends(get_current_admin)):
+@read_only
+def list_admin_boards(current_admin_user: User = Depends(get_current_admin)):
     """List all boards (admin only)"""
-    boards = Board.select().order_by(Board.id)
+    boards = Board.select().where(Board.deleted_at.is_null()).order_by(Board.id)
     result = []
     for board in boards:
-        column_count = Column.select().where(Column.board == board).count()
-        card_count = Card.select().join(Column).where(Column.board == board).count()
+        column_count, card_count = content_counts(board)
         shared_team_name = board.shared_team.name if board.shared_team else None
 
         result.append(
@@ -1136,7 +1482,7 @@ async def list_admin_boards(current_admin_user: User = Depends(get_current_admin
 
 
 @api.post("/admin/boards", response_model=BoardResponseAdmin)
-async def create_admin_board(
+def create_admin_board(
     board_data: BoardCreateAdmin,
     current_admin_user: User = Depends(get_current_admin),
 ):
@@ -1149,8 +1495,7 @@ async def create_admin_board(
         owner=owner, name=board_data.name
     )
 
-    column_count = Column.select().where(Column.board == board).count()
-    card_count = Card.select().join(Column).where(Column.board == board).count()
+    column_count, card_count = content_counts(board)
 
     return {
         "id": board.id,
@@ -1167,21 +1512,22 @@ async def create_admin_board(
 
 
 @api.put("/admin/boards/{board_id}", response_model=BoardResponseAdmin)
-async def update_admin_board(
+def update_admin_board(
     board_id: int,
     board_data: BoardUpdateAdmin,
     current_admin_user: User = Depends(get_current_admin),
 ):
     """Update a board (admin only)"""
-    board = Board.get_or_none(Board.id == board_id)
+    board = live_board(board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
 
     board.name = board_data.name
-    board.save()
+    with db.atomic():
+        board.save()
+        record_changes([(board.id, "board", board.id, UPSERT)])
 
-    column_count = Column.select().where(Column.board == board).count()
-    card_count = Card.select().join(Column).where(Column.board == board).count()
+    column_count, card_count = content_counts(board)
     shared_team_name = board.shared_team.name if board.shared_team else None
 
     return {
@@ -1199,27 +1545,22 @@ async def update_admin_board(
 
 
 @api.delete("/admin/boards/{board_id}")
-async def delete_admin_board(
+def delete_admin_board(
     board_id: int,
     current_admin_user: User = Depends(get_current_admin),
 ):
     """Delete a board (admin only)"""
-    board = Board.get_or_none(Board.id == board_id)
+    board = live_board(board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
 
-    with db.atomic():
-        # Delete cards, columns, board
-        for column in board.columns:
-            Card.delete().where(Card.column == column)
-            column.delete_instance()
-        board.delete_instance()
+    soft_delete_board(board)
 
     return {"ok": True}
 
 
 @api.post("/boards", response_model=dict)
-async def create_board(
+def create_board(
     board_data: BoardCreate, current_user: User = Depends(get_current_user_or_api_key)
 ):
     with db.atomic():
@@ -1236,16 +1577,27 @@ async def create_board(
 
 
 @api.get("/boards", response_model=list)
-async def list_boards(current_user: User = Depends(get_current_user_or_api_key)):
-    board_ids = []
-    for board in current_user.boards:
-        board_ids.append(board.id)
-    for tm in current_user.team_memberships:
-        for board in tm.team.boards:
-            if board.id not in board_ids:
-                board_ids.append(board.id)
-
-    boards = Board.select().where(Board.id.in_(board_ids))
+@read_only
+def list_boards(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_or_api_key),
+):
+    boards = list(
+        Board.select()
+        .join(UserBoardAccess)
+        .where(
+            (UserBoardAccess.user == current_user) & Board.deleted_at.is_null()
+        )
+        # By board id, as the (user, board) key already has them.
+        .order_by(UserBoardAccess.board)
+    )
+    # Every field listed here is covered by the board's version, so the set of
+    # (board, version) pairs decides the whole body.
+    etag = make_etag("boards", [snapshot_key(board) for board in boards])
+    if client_has(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
     return [
         {
             "id": board.id,
@@ -1260,20 +1612,24 @@ async def list_boards(current_user: User = Depends(get_current_user_or_api_key))
 
 
 @api.post("/boards/{board_id}", response_model=BoardResponse)
-async def update_board(
+def update_board(
     board_id: int,
     board_data: BoardUpdate,
     current_user: User = Depends(get_current_user_or_api_key),
 ):
-    board = Board.get_or_none(Board.id == board_id)
+    board = live_board(board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     if not can_modify_board(current_user, board):
         raise HTTPException(status_code=403, detail="Not authorized")
     board.name = board_data.name
-    board.save()
+    with db.atomic():
+        board.save()
+        record_changes([(board.id, "board", board.id, UPSERT)])
+    route_to_board(board.id)
     columns = [
-        {"id": c.id, "name": c.name, "position": c.position} for c in board.columns
+        {"id": c.id, "name": c.name, "position": c.position}
+        for c in board.columns.where(Column.deleted_at.is_null())
     ]
     return {
         "id": board.id,
@@ -1286,92 +1642,311 @@ async def update_board(
     }
 
 
+def render_board(board):
+    """The GET /api/boards/{id} body for `board`, as bytes.
+
+    Rendered exactly the way FastAPI renders a response_model, so a body
+    served from the snapshot cache is indistinguishable from a fresh one.
+    """
+    payload = BoardResponse.model_validate(board_payload(board))
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+# Media types of GET /api/boards/{id}?stream=...
+BOARD_STREAM_FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+# Encodes what it is given as a response_model's untyped fields are encoded
+# -- BoardResponse.columns, say -- datetimes and all.
+_untyped = TypeAdapter(Any)
+
+
+def _encode(value):
+    return JSONResponse(_untyped.dump_python(value, mode="json")).body
+
+
+def _next_page(board, pages):
+    # A streamed body is produced a step at a time, each on whichever
+    # threadpool thread is free and in a context of its own: each routes and
+    # reads for itself, as get_board does.
+    route_to_board(board.id)
+    with db.reading():
+        page = next(pages, None)
+    # The client may take its time over the page; a pooled connection is
+    # better off serving other requests meanwhile.
+    db.release()
+    return page
+
+
+def stream_board(board, ndjson=False):
+    """The GET /api/boards/{id}?stream=... body for `board`, a page of cards
+    at a time.
+
+    As JSON, the very bytes render_board(board) would give. As NDJSON, a
+    line for the board, then one per column, each followed by a line per
+    card in it: {"type": "board" | "column" | "card", ...}, cards carrying
+    their column_id.
+    """
+    fields = BoardResponse.model_validate({**board_fields(board), "columns": []})
+    pages = board_pages(board)
+    current = None
+
+    if ndjson:
+        fields = fields.model_dump(mode="json", exclude={"columns"})
+        yield _encode({"type": "board", **fields}) + b"\n"
+        while (page := _next_page(board, pages)) is not None:
+            column, cards = page
+            chunk = b""
+            if column is not current:
+                current = column
+                chunk = _encode({"type": "column", **column}) + b"\n"
+            for card in cards:
+                line = {"type": "card", "column_id": column["id"], **card}
+                chunk += _encode(line) + b"\n"
+            if chunk:
+                yield chunk
+        return
+
+    # Split where the list goes: the last match, as the name before it may
+    # spell out the same characters and the fields after it cannot.
+    head, tail = _encode(fields).rsplit(b'"columns":[]', 1)
+    chunk = head + b'"columns":['
+    while (page := _next_page(board, pages)) is not None:
+        column, cards = page
+        if column is not current:
+            if current is not None:
+                chunk += b"]" + column_tail + b","
+            current = column
+            column_head, column_tail = _encode({**column, "cards": []}).rsplit(
+                b'"cards":[]', 1
+            )
+            chunk += column_head + b'"cards":['
+        elif cards:
+            chunk += b","
+        chunk += _encode(cards)[1:-1]
+        if chunk:
+            yield chunk
+        chunk = b""
+    if current is not None:
+        chunk += b"]" + column_tail
+    yield chunk + b"]" + tail
+
+
 @api.get("/boards/{board_id}", response_model=BoardResponse)
-async def get_board(
-    board_id: int, current_user: User = Depends(get_current_user_or_api_key)
+@read_only
+def get_board(
+    board_id: int,
+    request: Request,
+    stream: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user_or_api_key),
 ):
-    board = Board.get_or_none(Board.id == board_id)
+    """A board with its columns, cards and comments.
+
+    With ?stream=json (or ndjson, a line per column and card) the body is
+    sent as it is read, a page of cards at a time, for boards too big to
+    build whole. A page read after a write sees it, so a streamed body is no
+    one version exactly: it has no ETag, and X-Board-Version is the version
+    it is at least as new as -- /changes from there catches the rest.
+    """
+    if stream is not None and stream not in BOARD_STREAM_FORMATS:
+        formats = ", ".join(BOARD_STREAM_FORMATS)
+        raise HTTPException(status_code=400, detail=f"stream must be one of {formats}")
+    board = live_board(board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     if not can_access_board(current_user, board):
         raise HTTPException(status_code=403, detail="Not authorized")
-    columns = []
-    # Get columns sorted by position
-    for column in board.columns.order_by(Column.position):
-        cards = []
-        # Get cards sorted by position
-        for card in column.cards.order_by(Card.position):
-            # Get comments for this card
-            comments = (
-                Comment.select()
-                .where(Comment.card == card)
-                .order_by(Comment.created_at)
-            )
-            card_comments = [
-                {
-                    "id": comment.id,
-                    "card_id": comment.card.id,
-                    "user_id": comment.user.id,
-                    "username": comment.user.username,
-                    "content": comment.content,
-                    "created_at": comment.created_at,
-                    "updated_at": comment.updated_at,
-                }
-                for comment in comments
-            ]
-            cards.append(
-                {
-                    "id": card.id,
-                    "title": card.title,
-                    "description": card.description,
-                    "position": card.position,
-                    "comments": card_comments,
-                }
-            )
-        columns.append(
-            {
-                "id": column.id,
-                "name": column.name,
-                "position": column.position,
-                "cards": cards,
-            }
+
+    key = snapshot_key(board)
+    # Checked before the cache: a client that already has this version needs
+    # neither the tree nor the bytes.
+    etag = make_etag("board", *key)
+    if client_has(request, etag):
+        return not_modified(etag)
+
+    # Inside an atomic /api/batch this version may yet be rolled back, and a
+    # later commit reach the same number with other content: nothing read
+    # here is cached, nor named by a validator or version a client keeps.
+    uncommitted = db.in_transaction()
+
+    if stream is not None:
+        return StreamingResponse(
+            stream_board(board, ndjson=stream == "ndjson"),
+            media_type=BOARD_STREAM_FORMATS[stream],
+            headers={} if uncommitted else {"X-Board-Version": str(board.version)},
         )
-    return {
-        "id": board.id,
-        "name": board.name,
-        "created_at": board.created_at,
-        "columns": columns,
-        "shared_team_id": board.shared_team_id,
-        "is_public_to_org": board.is_public_to_org,
-        "owner_id": board.owner_id,
-    }
+    if uncommitted:
+        route_to_board(board.id)
+        return Response(content=render_board(board), media_type="application/json")
+    body = board_snapshots.get(key)
+    if body is None:
+        route_to_board(board.id)
+        body = render_board(board)
+        board_snapshots.put(key, body)
+    headers = validator_headers(etag)
+    # Where a client starts polling /changes from.
+    headers["X-Board-Version"] = str(board.version)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@api.get("/boards/{board_id}/changes", response_model=BoardChangesResponse)
+@read_only
+def get_board_changes(
+    board_id: int,
+    since: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_user_or_api_key),
+):
+    """What changed on a board after version `since`.
+
+    A client that remembers the version of its last full GET (or of its last
+    delta) can poll this instead and receive only the objects that changed,
+    plus tombstones for those that were deleted.
+    """
+    board = live_board(board_id)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if not can_access_board(current_user, board):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    route_to_board(board.id)
+    return board_delta(board, since)
+
+
+def next_stream_message(board_id, user, since):
+    """What an event stream last at version `since` owes its client now.
+
+    Returns (message, version): message is None when nothing has changed, and
+    version is None once the board is gone. Queries the database, so streams
+    call it through the threadpool.
+    """
+    # Re-read every time: the board may have been deleted, or this user's
+    # access to it revoked, since the stream opened.
+    board = live_board(board_id)
+    if board is None or not can_access_board(user, board):
+        return sse_message(json.dumps({"board_id": board_id}), event="gone"), None
+    if since is None:
+        message = sse_message(
+            json.dumps({"board_id": board_id, "version": board.version}),
+            event="ready",
+            event_id=board.version,
+        )
+        return message, board.version
+    if board.version == since:
+        return None, since
+    route_to_board(board.id)
+    delta = BoardChangesResponse.model_validate(board_delta(board, since))
+    message = sse_message(
+        delta.model_dump_json(), event="delta", event_id=delta.version
+    )
+    return message, delta.version
+
+
+async def board_event_stream(request, board_id, user, since):
+    """The body of GET /api/boards/{id}/events.
+
+    Each wake-up sends one `delta` event covering everything since the last
+    event this stream sent, with the board's version as its id -- so a client
+    that reconnects with Last-Event-ID picks up exactly where it left off.
+    """
+    subscription = board_events.subscribe(board_id)
+    try:
+        while True:
+            message, since = await run_in_threadpool(
+                next_stream_message, board_id, user, since
+            )
+            # Idle between wake-ups, which may be minutes apart; a pooled
+            # connection is better off serving other requests meanwhile.
+            db.release()
+            if message is not None:
+                yield message
+            if since is None:
+                return
+
+            woken = await subscription.wait(EVENTS_KEEPALIVE_SECONDS)
+            if woken is None:
+                # Dropped for falling behind; the client reconnects and
+                # resumes from the log.
+                return
+            if not woken:
+                if await request.is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+    finally:
+        board_events.unsubscribe(subscription)
+
+
+@api.get("/boards/{board_id}/events")
+def board_events_stream(
+    board_id: int,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user_or_api_key),
+):
+    """Server-Sent Events stream of a board's changes.
+
+    Without Last-Event-ID the stream opens with a `ready` event naming the
+    current version; with one, it first catches up from that version.
+    """
+    board = live_board(board_id)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if not can_access_board(current_user, board):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    since = None
+    if last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+        if since < 0:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    return StreamingResponse(
+        board_event_stream(request, board_id, current_user, since),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx would otherwise hold events back to fill
+        # its buffer.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @api.delete("/boards/{board_id}")
-async def delete_board(
+def delete_board(
     board_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
-    board = Board.get_or_none(Board.id == board_id)
+    board = live_board(board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     if not can_delete_board(current_user, board):
         raise HTTPException(status_code=403, detail="Only the owner can delete a board")
+    soft_delete_board(board)
+    return {"ok": True}
+
+
+@api.post("/boards/{board_id}/restore")
+def restore_board(
+    board_id: int, current_user: User = Depends(get_current_user_or_api_key)
+):
+    """Undo a delete, within DELETED_RETENTION_HOURS of it."""
+    board = deleted_within_retention(Board.select().where(Board.id == board_id), Board)
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if not can_delete_board(current_user, board):
+        raise HTTPException(
+            status_code=403, detail="Only the owner can restore a board"
+        )
+    board.deleted_at = None
     with db.atomic():
-        for column in board.columns:
-            for card in column.cards:
-                card.delete_instance()
-            column.delete_instance()
-        board.delete_instance()
+        board.save()
+        record_changes([(board.id, "board", board.id, UPSERT)])
     return {"ok": True}
 
 
 @api.post("/boards/{board_id}/share")
-async def share_board(
+def share_board(
     board_id: int,
     share_data: BoardShare,
     current_user: User = Depends(get_current_user_or_api_key),
 ):
-    board = Board.get_or_none(Board.id == board_id)
+    board = live_board(board_id)
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     if not can_share_board(current_user, board):
@@ -1390,7 +1965,9 @@ async def share_board(
     elif not board.is_public_to_org and share_data.team_id is None:
         board.shared_team = None
 
-    board.save()
+    with db.atomic():
+        board.save()
+        record_changes([(board.id, "board", board.id, UPSERT)])
     return {
         "ok": True,
         "shared_team_id": board.shared_team_id,
@@ -1399,28 +1976,34 @@ async def share_board(
 
 
 @api.post("/columns", response_model=ColumnResponse)
-async def create_column(
+def create_column(
     column_data: ColumnCreate,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    board = Board.get_or_none(Board.id == column_data.board_id)
+    route_to_board(column_data.board_id)
+    board = scope.get(
+        Board, column_data.board_id, Board.select().where(Board.deleted_at.is_null())
+    )
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
-    if not can_modify_board(current_user, board):
+    if not may_modify(scope, current_user, board):
         raise HTTPException(status_code=403, detail="Not authorized")
     position = column_data.position
     if position is None:
         last = (
             Column.select(fn.MAX(Column.position))
-            .where(Column.board == board)
+            .where((Column.board == board) & Column.deleted_at.is_null())
             .scalar()
         )
-        position = 0 if last is None else last + 1
-    column = Column.create(
-        board=board,
-        name=column_data.name,
-        position=position,
-    )
+        position = 0 if last is None else last + POSITION_GAP
+    with db.atomic():
+        column = Column.create(
+            board=board,
+            name=column_data.name,
+            position=position,
+        )
+        record_changes([(board.id, "column", column.id, UPSERT)])
     return {
         "id": column.id,
         "name": column.name,
@@ -1430,19 +2013,22 @@ async def create_column(
 
 
 @api.put("/columns/{column_id}", response_model=ColumnResponse)
-async def update_column(
+def update_column(
     column_id: int,
     column_data: ColumnUpdate,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    column = Column.get_or_none(Column.id == column_id)
+    column = scoped_column(scope, column_id)
     if not column:
         raise HTTPException(status_code=404, detail="Column not found")
-    if not can_modify_board(current_user, column.board):
+    if not may_modify(scope, current_user, column.board):
         raise HTTPException(status_code=403, detail="Not authorized")
     column.name = column_data.name
     column.position = column_data.position
-    column.save()
+    with db.atomic():
+        column.save()
+        record_changes([(column.board_id, "column", column.id, UPSERT)])
     cards = [
         {
             "id": c.id,
@@ -1450,7 +2036,7 @@ async def update_column(
             "description": c.description,
             "position": c.position,
         }
-        for c in column.cards
+        for c in column.cards.where(Card.deleted_at.is_null())
     ]
     return {
         "id": column.id,
@@ -1461,59 +2047,148 @@ async def update_column(
 
 
 @api.delete("/columns/{column_id}")
-async def delete_column(
-    column_id: int, current_user: User = Depends(get_current_user_or_api_key)
+def delete_column(
+    column_id: int,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    column = Column.get_or_none(Column.id == column_id)
+    column = scoped_column(scope, column_id)
     if not column:
         raise HTTPException(status_code=404, detail="Column not found")
-    if not can_modify_board(current_user, column.board):
+    if not may_modify(scope, current_user, column.board):
         raise HTTPException(status_code=403, detail="Not authorized")
+    # Its cards go with it, and come back with it, without being marked.
+    column.deleted_at = datetime.now(timezone.utc)
     with db.atomic():
-        for card in column.cards:
-            card.delete_instance()
-        column.delete_instance()
+        column.save()
+        record_changes(column_changes(column, DELETE))
+    return {"ok": True}
+
+
+@api.post("/columns/{column_id}/restore")
+def restore_column(
+    column_id: int,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
+):
+    """Undo a delete, within DELETED_RETENTION_HOURS of it."""
+    route_to_row("column", column_id)
+    query = (
+        Column.select(Column, Board)
+        .join(Board)
+        .where((Column.id == column_id) & Board.deleted_at.is_null())
+    )
+    column = deleted_within_retention(query, Column)
+    if not column:
+        raise HTTPException(status_code=404, detail="Column not found")
+    if not may_modify(scope, current_user, column.board):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    column.deleted_at = None
+    with db.atomic():
+        column.save()
+        record_changes(column_changes(column, UPSERT))
     return {"ok": True}
 
 
 @api.post("/columns/reorder")
-async def reorder_columns(
+def reorder_columns(
     reorder_data: ColumnReorderRequest,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
     """Reorder multiple columns by updating their positions."""
-    # Verify all columns belong to boards the user can modify
+    # One query for every column, one permission check per board rather
+    # than per column, and one UPDATE for every position. All in one shard,
+    # as they are on one organization's boards; any elsewhere are not found.
+    if reorder_data.columns:
+        route_to_row("column", reorder_data.columns[0].id)
+    columns = scope.get_many(
+        Column,
+        [item.id for item in reorder_data.columns],
+        Column.select(Column, Board)
+        .join(Board)
+        .where(*not_deleted(Column, Board)),
+    )
+    boards = {}
     for item in reorder_data.columns:
-        column = Column.get_or_none(Column.id == item.id)
+        column = columns.get(item.id)
         if not column:
             raise HTTPException(status_code=404, detail=f"Column {item.id} not found")
-        if not can_modify_board(current_user, column.board):
+        boards[column.board_id] = column.board
+    for board in boards.values():
+        if not may_modify(scope, current_user, board):
             raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Update all column positions in a single transaction
     with db.atomic():
-        for item in reorder_data.columns:
-            Column.update(position=item.position).where(Column.id == item.id).execute()
+        set_by_id(
+            Column.position, {item.id: item.position for item in reorder_data.columns}
+        )
+        record_changes(
+            (columns[item.id].board_id, "column", item.id, UPSERT)
+            for item in reorder_data.columns
+        )
 
     return {"ok": True}
 
 
+@api.post("/columns/{column_id}/move", response_model=dict)
+def move_column(
+    column_id: int,
+    move: ColumnMove,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
+):
+    """Move a column next to another on its board. Writes the one column,
+    rather than renumbering the board through /columns/reorder."""
+    column = scoped_column(scope, column_id)
+    if not column:
+        raise HTTPException(status_code=404, detail="Column not found")
+    if not may_modify(scope, current_user, column.board):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    with db.atomic():
+        try:
+            position, rebalanced = place(
+                Column.board, column.board_id, column.id, move.after_id, move.before_id
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail="Neighbours must be columns on its board"
+            )
+        Column.update(position=position).where(Column.id == column.id).execute()
+        changed = moved(Column.board, column.board_id, column.id, rebalanced)
+        record_changes(
+            (column.board_id, "column", changed_id, UPSERT) for changed_id in changed
+        )
+    return {"id": column.id, "name": column.name, "position": position}
+
+
 @api.post("/cards", response_model=CardResponse)
-async def create_card(
+def create_card(
     card_data: CardCreate,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    column = Column.get_or_none(Column.id == card_data.column_id)
+    column = scoped_column(scope, card_data.column_id)
     if not column:
         raise HTTPException(status_code=404, detail="Column not found")
-    if not can_modify_board(current_user, column.board):
+    if not may_modify(scope, current_user, column.board):
         raise HTTPException(status_code=403, detail="Not authorized")
-    card = Card.create(
-        column=column,
-        title=card_data.title,
-        description=card_data.description,
-        position=card_data.position,
-    )
+    position = card_data.position
+    if position is None:
+        last = (
+            Card.select(fn.MAX(Card.position))
+            .where((Card.column == column) & Card.deleted_at.is_null())
+            .scalar()
+        )
+        position = 0 if last is None else last + POSITION_GAP
+    with db.atomic():
+        card = Card.create(
+            column=column,
+            title=card_data.title,
+            description=card_data.description,
+            position=position,
+        )
+        record_changes([(column.board_id, "card", card.id, UPSERT)])
     return {
         "id": card.id,
         "title": card.title,
@@ -1523,20 +2198,37 @@ async def create_card(
 
 
 @api.get("/cards/{card_id}", response_model=CardDetailResponse)
-async def get_card(
-    card_id: int, current_user: User = Depends(get_current_user_or_api_key)
+@read_only
+def get_card(
+    card_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
     """Read one card. Cards were previously only reachable nested inside a
     board, so anything holding a card id had no way to see its body."""
-    card = Card.get_or_none(Card.id == card_id)
+    card = scoped_card(scope, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
-    if not can_access_board(current_user, card.column.board):
+    if not may_access(scope, current_user, card.column.board):
         raise HTTPException(
             status_code=403, detail="Not authorized to access this card"
         )
 
-    comments = Comment.select().where(Comment.card == card).order_by(Comment.created_at)
+    # Everything shown here -- the card, its comments and their authors, the
+    # column and board names -- bumps the board's version when it changes.
+    etag = make_etag("card", card.id, *snapshot_key(card.column.board))
+    if client_has(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+
+    comments = (
+        Comment.select(Comment, User)
+        .join(User)
+        .where(Comment.card == card)
+        .order_by(Comment.created_at)
+    )
     return {
         "id": card.id,
         "title": card.title,
@@ -1549,7 +2241,7 @@ async def get_card(
         "comments": [
             {
                 "id": comment.id,
-                "card_id": comment.card.id,
+                "card_id": comment.card_id,
                 "user_id": comment.user.id,
                 "username": comment.user.username,
                 "content": comment.content,
@@ -1562,22 +2254,36 @@ async def get_card(
 
 
 @api.put("/cards/{card_id}", response_model=CardResponse)
-async def update_card(
+def update_card(
     card_id: int,
     card_data: CardUpdate,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    card = Card.get_or_none(Card.id == card_id)
+    card = scoped_card(scope, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
-    if not can_modify_board(current_user, card.column.board):
+    if not may_modify(scope, current_user, card.column.board):
         raise HTTPException(status_code=403, detail="Not authorized")
+    # A move between boards is a delete on one and an upsert on the other.
+    changes = [(card.column.board_id, "card", card.id, UPSERT)]
     if card_data.column_id is not None and card_data.column_id != card.column.id:
-        new_column = Column.get_or_none(Column.id == card_data.column_id)
+        # A shard holds one organization's boards; a card cannot leave it.
+        if ShardPlacement.shard_of("column", card_data.column_id) != current_shard():
+            raise HTTPException(
+                status_code=400, detail="Cannot move a card between organizations"
+            )
+        new_column = scoped_column(scope, card_data.column_id)
         if not new_column:
             raise HTTPException(status_code=404, detail="New column not found")
-        if not can_modify_board(current_user, new_column.board):
+        # Free when the column is on the same board: answered just above.
+        if not may_modify(scope, current_user, new_column.board):
             raise HTTPException(status_code=403, detail="Not authorized")
+        if new_column.board_id != card.column.board_id:
+            changes = [
+                (card.column.board_id, "card", card.id, DELETE),
+                (new_column.board_id, "card", card.id, UPSERT),
+            ]
         card.column = new_column
     if card_data.title is not None:
         card.title = card_data.title
@@ -1585,7 +2291,9 @@ async def update_card(
         card.description = card_data.description
     if card_data.position is not None:
         card.position = card_data.position
-    card.save()
+    with db.atomic():
+        card.save()
+        record_changes(changes)
     return {
         "id": card.id,
         "title": card.title,
@@ -1595,61 +2303,455 @@ async def update_card(
 
 
 @api.delete("/cards/{card_id}")
-async def delete_card(
-    card_id: int, current_user: User = Depends(get_current_user_or_api_key)
+def delete_card(
+    card_id: int,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    card = Card.get_or_none(Card.id == card_id)
+    card = scoped_card(scope, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
-    if not can_modify_board(current_user, card.column.board):
+    if not may_modify(scope, current_user, card.column.board):
         raise HTTPException(status_code=403, detail="Not authorized")
-    card.delete_instance()
+    card.deleted_at = datetime.now(timezone.utc)
+    with db.atomic():
+        card.save()
+        record_changes([(card.column.board_id, "card", card.id, DELETE)])
+    return {"ok": True}
+
+
+@api.post("/cards/{card_id}/restore")
+def restore_card(
+    card_id: int,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
+):
+    """Undo a delete, within DELETED_RETENTION_HOURS of it."""
+    route_to_row("card", card_id)
+    query = (
+        Card.select(Card, Column, Board)
+        .join(Column)
+        .join(Board)
+        .where(Card.id == card_id, *not_deleted(Column, Board))
+    )
+    card = deleted_within_retention(query, Card)
+    if not card:
+        raise HTTPException(status_code=404, detail="Card not found")
+    if not may_modify(scope, current_user, card.column.board):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    card.deleted_at = None
+    with db.atomic():
+        card.save()
+        record_changes([(card.column.board_id, "card", card.id, UPSERT)])
     return {"ok": True}
 
 
 @api.post("/cards/reorder")
-async def reorder_cards(
+def reorder_cards(
     reorder_data: CardReorderRequest,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
     """Reorder multiple cards by updating their positions."""
-    # Verify all cards belong to boards the user can modify
+    # One query for every card, one permission check per board rather than
+    # per card, and one UPDATE for every position. Routed as
+    # reorder_columns is.
+    if reorder_data.cards:
+        route_to_row("card", reorder_data.cards[0].id)
+    cards = scope.get_many(
+        Card,
+        [item.id for item in reorder_data.cards],
+        Card.select(Card, Column, Board)
+        .join(Column)
+        .join(Board)
+        .where(*not_deleted(Card, Column, Board)),
+    )
+    boards = {}
     for item in reorder_data.cards:
-        card = Card.get_or_none(Card.id == item.id)
+        card = cards.get(item.id)
         if not card:
             raise HTTPException(status_code=404, detail=f"Card {item.id} not found")
-        if not can_modify_board(current_user, card.column.board):
+        boards[card.column.board_id] = card.column.board
+    for board in boards.values():
+        if not may_modify(scope, current_user, board):
             raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Update all card positions in a single transaction
     with db.atomic():
-        for item in reorder_data.cards:
-            Card.update(position=item.position).where(Card.id == item.id).execute()
+        set_by_id(
+            Card.position, {item.id: item.position for item in reorder_data.cards}
+        )
+        record_changes(
+            (cards[item.id].column.board_id, "card", item.id, UPSERT)
+            for item in reorder_data.cards
+        )
 
     return {"ok": True}
 
 
+@api.post("/cards/{card_id}/move", response_model=dict)
+def move_card(
+    card_id: int,
+    move: CardMove,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
+):
+    """Move a card next to another, in its own column or a new one. Writes
+    the one card, rather than renumbering the column through /cards/reorder.
+    """
+    card = scoped_card(scope, card_id)
+    if not card:
+        raise HTTPException(status_code=404, detail="Card not found")
+    if not may_modify(scope, current_user, card.column.board):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    # The column named, else the neighbours', else the card's own.
+    column_id = move.column_id
+    for neighbour_id in (move.after_id, move.before_id):
+        if column_id is None and neighbour_id is not None:
+            if ShardPlacement.shard_of("card", neighbour_id) != current_shard():
+                raise HTTPException(
+                    status_code=400, detail="Cannot move a card between organizations"
+                )
+            neighbour = scoped_card(scope, neighbour_id)
+            if not neighbour:
+                raise HTTPException(
+                    status_code=404, detail=f"Card {neighbour_id} not found"
+                )
+            column_id = neighbour.column_id
+    column = card.column
+    if column_id is not None and column_id != card.column_id:
+        if ShardPlacement.shard_of("column", column_id) != current_shard():
+            raise HTTPException(
+                status_code=400, detail="Cannot move a card between organizations"
+            )
+        column = scoped_column(scope, column_id)
+        if not column:
+            raise HTTPException(status_code=404, detail="New column not found")
+        if not may_modify(scope, current_user, column.board):
+            raise HTTPException(status_code=403, detail="Not authorized")
+    # As in update_card: a move between boards is a delete on one and an
+    # upsert on the other.
+    changes = []
+    if column.board_id != card.column.board_id:
+        changes.append((card.column.board_id, "card", card.id, DELETE))
+    with db.atomic():
+        try:
+            position, rebalanced = place(
+                Card.column, column.id, card.id, move.after_id, move.before_id
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=400, detail="Neighbours must be cards in the same column"
+            )
+        Card.update(position=position, column=column.id).where(
+            Card.id == card.id
+        ).execute()
+        changed = moved(Card.column, column.id, card.id, rebalanced)
+        changes.extend(
+            (column.board_id, "card", changed_id, UPSERT) for changed_id in changed
+        )
+        record_changes(changes)
+    return {
+        "id": card.id,
+        "column_id": column.id,
+        "title": card.title,
+        "description": card.description,
+        "position": position,
+    }
+
+
+def _card_result(card):
+    return {
+        "id": card.id,
+        "column_id": card.column_id,
+        "title": card.title,
+        "description": card.description,
+        "position": card.position,
+    }
+
+
+def _left_board(card, column):
+    """The DELETE a card moving into `column` leaves on its old board, if it
+    changes boards -- as in update_card."""
+    if column.board_id == card.column.board_id:
+        return []
+    return [(card.column.board_id, "card", card.id, DELETE)]
+
+
+def _bulk_refused(results):
+    """The answer to an all-or-nothing batch with a failure in it: that
+    failure's status, and every other operation reported as not applied."""
+    index, failure = next(
+        (index, result)
+        for index, result in enumerate(results)
+        if result is not None and not result["ok"]
+    )
+    content = {
+        "detail": f"Operation {index}: {failure['detail']}",
+        "results": [
+            result
+            if result is not None and not result["ok"]
+            else {
+                "ok": False,
+                "status": status.HTTP_424_FAILED_DEPENDENCY,
+                "detail": "Not applied: another operation failed",
+            }
+            for result in results
+        ],
+    }
+    return JSONResponse(status_code=failure["status"], content=content)
+
+
+@api.post("/cards/bulk", response_model=dict)
+def bulk_cards(
+    bulk: CardBulkRequest,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
+):
+    """Create, update, move and delete many cards in one request and one
+    transaction.
+
+    Returns {"results": [...]}, one per operation, in order: {"ok": true,
+    "card": {...}}, or {"ok": true, "id": ...} for a delete, or {"ok": false,
+    "status": ..., "detail": ...}. Without best_effort a failure anywhere
+    answers with its status, and nothing is written.
+
+    Every card and column named is loaded in one query each, and access is
+    checked once per board. Creates, updates and deletes are then a few
+    statements however many there are; moves need the positions around them
+    as they stand by then, so they run last, one at a time, in order.
+    """
+    operations = bulk.operations
+    if len(operations) > CARDS_BULK_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {CARDS_BULK_MAX_OPERATIONS} operations per request",
+        )
+    results = [None] * len(operations)
+
+    def fail(index, status_code, detail):
+        results[index] = {"ok": False, "status": status_code, "detail": detail}
+
+    # One shard, as for /cards/reorder: the first row named picks it, and a
+    # row in any other is not found.
+    card_ids = [
+        card_id
+        for op in operations
+        for card_id in (op.id, op.after_id, op.before_id)
+        if card_id is not None
+    ]
+    column_ids = [op.column_id for op in operations if op.column_id is not None]
+    if card_ids:
+        route_to_row("card", card_ids[0])
+    elif column_ids:
+        route_to_row("column", column_ids[0])
+    cards = scope.get_many(
+        Card,
+        card_ids,
+        Card.select(Card, Column, Board)
+        .join(Column)
+        .join(Board)
+        .where(*not_deleted(Card, Column, Board)),
+    )
+    columns = scope.get_many(
+        Column,
+        column_ids,
+        Column.select(Column, Board)
+        .join(Board)
+        .where(*not_deleted(Column, Board)),
+    )
+
+    # index -> (card, or None for a create; the column it ends up in)
+    targets = {}
+    seen = set()
+    for index, op in enumerate(operations):
+        if op.op not in CARD_BULK_OPS:
+            fail(index, 400, f"Unknown operation '{op.op}'")
+            continue
+        if op.op == "create":
+            if op.column_id is None or op.title is None:
+                fail(index, 400, "A create needs a column_id and a title")
+            elif op.column_id not in columns:
+                fail(index, 404, "Column not found")
+            else:
+                targets[index] = (None, columns[op.column_id])
+            continue
+        if op.id is None:
+            fail(index, 400, f"A {op.op} needs the id of a card")
+            continue
+        if op.id in seen:
+            fail(index, 400, f"Card {op.id} is in more than one operation")
+            continue
+        seen.add(op.id)
+        card = cards.get(op.id)
+        if not card:
+            fail(index, 404, "Card not found")
+            continue
+        column = card.column
+        if op.op != "delete" and op.column_id is not None:
+            column = columns.get(op.column_id)
+            if not column:
+                fail(index, 404, "New column not found")
+                continue
+        elif op.op == "move":
+            # As in move_card: without a column, the neighbours'.
+            neighbour_id = op.after_id if op.after_id is not None else op.before_id
+            if neighbour_id is not None:
+                if neighbour_id not in cards:
+                    fail(index, 404, f"Card {neighbour_id} not found")
+                    continue
+                column = cards[neighbour_id].column
+        targets[index] = (card, column)
+
+    allowed = {}
+    for index, (card, column) in list(targets.items()):
+        boards = {column.board_id: column.board}
+        if card:
+            boards[card.column.board_id] = card.column.board
+        for board_id, board in boards.items():
+            if board_id not in allowed:
+                allowed[board_id] = may_modify(scope, current_user, board)
+        if not all(allowed[board_id] for board_id in boards):
+            fail(index, 403, "Not authorized")
+            del targets[index]
+
+    if not bulk.best_effort and len(targets) < len(operations):
+        return _bulk_refused(results)
+
+    by_op = {op: [] for op in CARD_BULK_OPS}
+    for index in targets:
+        by_op[operations[index].op].append(index)
+    changes = []
+    with db.atomic() as transaction:
+        # Creates: one MAX(position) query for the columns appended to, then
+        # INSERTs of as many cards as fit a statement's parameters.
+        appended = {
+            operations[index].column_id
+            for index in by_op["create"]
+            if operations[index].position is None
+        }
+        last = {}
+        if appended:
+            last = dict(
+                Card.select(Card.column, fn.MAX(Card.position))
+                .where(Card.column.in_(list(appended)) & Card.deleted_at.is_null())
+                .group_by(Card.column)
+                .tuples()
+            )
+        created = []
+        for index in by_op["create"]:
+            op = operations[index]
+            card = Card(
+                column=targets[index][1],
+                title=op.title,
+                description=op.description,
+                position=op.position,
+            )
+            if card.position is None:
+                card.position = last.get(op.column_id, -POSITION_GAP) + POSITION_GAP
+                last[op.column_id] = card.position
+            created.append(card)
+        rows = [
+            {
+                "column": card.column_id,
+                "title": card.title,
+                "description": card.description,
+                "position": card.position,
+            }
+            for card in created
+        ]
+        for index, card, card_id in zip(
+            by_op["create"], created, insert_rows(Card, rows)
+        ):
+            card.id = card_id
+            changes.append((card.column.board_id, "card", card.id, UPSERT))
+            results[index] = {"ok": True, "card": _card_result(card)}
+
+        # Updates: one CASE statement per field that any of them sets.
+        values = {"title": {}, "description": {}, "position": {}, "column": {}}
+        for index in by_op["update"]:
+            op = operations[index]
+            card, column = targets[index]
+            for name in ("title", "description", "position"):
+                if getattr(op, name) is not None:
+                    values[name][card.id] = getattr(op, name)
+                    setattr(card, name, getattr(op, name))
+            if column.id != card.column_id:
+                values["column"][card.id] = column.id
+                changes.extend(_left_board(card, column))
+                card.column = column
+            changes.append((column.board_id, "card", card.id, UPSERT))
+            results[index] = {"ok": True, "card": _card_result(card)}
+        for name, by_id in values.items():
+            if by_id:
+                set_by_id(getattr(Card, name), by_id)
+
+        # Deletes: one statement.
+        now = datetime.now(timezone.utc)
+        update_by_id(
+            Card, [targets[index][0].id for index in by_op["delete"]], deleted_at=now
+        )
+        for index in by_op["delete"]:
+            card = targets[index][0]
+            changes.append((card.column.board_id, "card", card.id, DELETE))
+            results[index] = {"ok": True, "id": card.id}
+
+        for index in by_op["move"]:
+            op = operations[index]
+            card, column = targets[index]
+            try:
+                with db.atomic():
+                    position, rebalanced = place(
+                        Card.column, column.id, card.id, op.after_id, op.before_id
+                    )
+                    Card.update(position=position, column=column.id).where(
+                        Card.id == card.id
+                    ).execute()
+            except ValueError:
+                fail(index, 400, "Neighbours must be cards in the same column")
+                continue
+            changes.extend(_left_board(card, column))
+            changes.extend(
+                (column.board_id, "card", changed_id, UPSERT)
+                for changed_id in moved(Card.column, column.id, card.id, rebalanced)
+            )
+            card.column = column
+            card.position = position
+            results[index] = {"ok": True, "card": _card_result(card)}
+
+        refused = not bulk.best_effort and not all(r["ok"] for r in results)
+        if refused:
+            transaction.rollback()
+        else:
+            record_changes(changes)
+    if refused:
+        return _bulk_refused(results)
+    return {"results": results}
+
+
 # Comment endpoints
 @api.post("/comments", response_model=CommentResponse)
-async def create_comment(
+def create_comment(
     comment_data: CommentCreate,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
     # Get the card and verify access
-    card = Card.get_or_none(Card.id == comment_data.card_id)
+    card = scoped_card(scope, comment_data.card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
 
     # Check if user can access the board containing this card
-    if not can_access_board(current_user, card.column.board):
+    if not may_access(scope, current_user, card.column.board):
         raise HTTPException(
             status_code=403, detail="Not authorized to access this card"
         )
 
     # Create the comment
-    comment = Comment.create_comment(
-        card=card, user=current_user, content=comment_data.content
-    )
+    with db.atomic():
+        comment = Comment.create_comment(
+            card=card, user=current_user, content=comment_data.content
+        )
+        record_changes([(card.column.board_id, "comment", comment.id, UPSERT)])
 
     # Return comment with username
     return CommentResponse(
@@ -1664,27 +2766,35 @@ async def create_comment(
 
 
 @api.get("/cards/{card_id}/comments", response_model=list[CommentResponse])
-async def get_card_comments(
-    card_id: int, current_user: User = Depends(get_current_user_or_api_key)
+@read_only
+def get_card_comments(
+    card_id: int,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
     # Get the card and verify access
-    card = Card.get_or_none(Card.id == card_id)
+    card = scoped_card(scope, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
 
     # Check if user can access the board containing this card
-    if not can_access_board(current_user, card.column.board):
+    if not may_access(scope, current_user, card.column.board):
         raise HTTPException(
             status_code=403, detail="Not authorized to access this card"
         )
 
-    # Get comments ordered by creation time
-    comments = Comment.select().where(Comment.card == card).order_by(Comment.created_at)
+    # Get comments ordered by creation time, authors joined in
+    comments = (
+        Comment.select(Comment, User)
+        .join(User)
+        .where(Comment.card == card)
+        .order_by(Comment.created_at)
+    )
 
     return [
         CommentResponse(
             id=comment.id,
-            card_id=comment.card.id,
+            card_id=comment.card_id,
             user_id=comment.user.id,
             username=comment.user.username,
             content=comment.content,
@@ -1696,17 +2806,18 @@ async def get_card_comments(
 
 
 @api.put("/comments/{comment_id}", response_model=CommentResponse)
-async def update_comment(
+def update_comment(
     comment_id: int,
     comment_data: CommentUpdate,
     current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    comment = Comment.get_or_none(Comment.id == comment_id)
+    comment = scoped_comment(scope, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
     # Only the comment author can update their comment
-    if comment.user != current_user:
+    if comment.user_id != current_user.id:
         raise HTTPException(
             status_code=403, detail="Not authorized to update this comment"
         )
@@ -1714,7 +2825,11 @@ async def update_comment(
     # Update the comment
     comment.content = comment_data.content
     comment.updated_at = datetime.now(timezone.utc)
-    comment.save()
+    with db.atomic():
+        comment.save()
+        record_changes(
+            [(comment.card.column.board_id, "comment", comment.id, UPSERT)]
+        )
 
     return CommentResponse(
         id=comment.id,
@@ -1728,25 +2843,31 @@ async def update_comment(
 
 
 @api.delete("/comments/{comment_id}")
-async def delete_comment(
-    comment_id: int, current_user: User = Depends(get_current_user_or_api_key)
+def delete_comment(
+    comment_id: int,
+    current_user: User = Depends(get_current_user_or_api_key),
+    scope: RequestScope = Depends(request_scope),
 ):
-    comment = Comment.get_or_none(Comment.id == comment_id)
+    comment = scoped_comment(scope, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
     # Only the comment author can delete their comment
-    if comment.user != current_user:
+    if comment.user_id != current_user.id:
         raise HTTPException(
             status_code=403, detail="Not authorized to delete this comment"
         )
 
-    comment.delete_instance()
+    with db.atomic():
+        comment.delete_instance()
+        record_changes(
+            [(comment.card.column.board_id, "comment", comment.id, DELETE)]
+        )
     return {"ok": True}
 
 
 @api.post("/organizations", response_model=OrganizationResponse)
-async def create_organization(
+def create_organization(
     org_data: OrganizationCreate,
     current_user: User = Depends(get_current_user_or_api_key),
 ):
@@ -1776,9 +2897,14 @@ async def create_organization(
 
 
 @api.get("/organizations", response_model=list)
-async def list_organizations(current_user: User = Depends(get_current_user_or_api_key)):
+@read_only
+def list_organizations(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_or_api_key),
+):
     orgs = get_user_organizations(current_user)
-    return [
+    payload = [
         {
             "id": org.id,
             "name": org.name,
@@ -1788,10 +2914,16 @@ async def list_organizations(current_user: User = Depends(get_current_user_or_ap
         }
         for org in orgs
     ]
+    etag = payload_etag(payload)
+    if client_has(request, etag):
+        return not_modified(etag)
+    response.headers.update(validator_headers(etag))
+    return payload
 
 
 @api.get("/organizations/{org_id}", response_model=OrganizationResponse)
-async def get_organization(
+@read_only
+def get_organization(
     org_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     org = Organization.get_or_none(Organization.id == org_id)
@@ -1813,7 +2945,7 @@ async def get_organization(
 
 
 @api.put("/organizations/{org_id}")
-async def update_organization(
+def update_organization(
     org_id: int,
     org_data: OrganizationUpdate,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -1837,7 +2969,7 @@ async def update_organization(
 
 
 @api.post("/organizations/{org_id}/members", response_model=OrganizationMemberResponse)
-async def add_organization_member(
+def add_organization_member(
     org_id: int,
     request: UsernameRequest,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -1872,7 +3004,8 @@ async def add_organization_member(
 
 
 @api.get("/organizations/{org_id}/members", response_model=list)
-async def list_organization_members(
+@read_only
+def list_organization_members(
     org_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     org = Organization.get_or_none(Organization.id == org_id)
@@ -1898,7 +3031,7 @@ async def list_organization_members(
 
 
 @api.delete("/organizations/{org_id}/members/{user_id}")
-async def remove_organization_member(
+def remove_organization_member(
     org_id: int,
     user_id: int,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -1932,7 +3065,14 @@ async def remove_organization_member(
         raise HTTPException(status_code=403, detail="Not authorized")
 
     with db.atomic():
-        TeamMember.delete().where(TeamMember.user_id == user_id)
+        # Leaving the organization means leaving its teams -- only its teams.
+        org_teams = Team.select(Team.id).where(Team.organization == org)
+        TeamMember.delete().where(
+            (TeamMember.user_id == user_id) & TeamMember.team.in_(org_teams)
+        ).execute()
+        UserBoardAccess.refresh(
+            Board.select(Board.id).where(Board.shared_team.in_(org_teams))
+        )
         target.delete_instance()
 
     return {"ok": True}
@@ -1956,7 +3096,7 @@ class InviteResponse(BaseModel):
 
 
 @api.post("/organizations/{org_id}/invites", response_model=InviteResponse)
-async def create_organization_invite(
+def create_organization_invite(
     org_id: int,
     request: InviteCreateRequest,
     background_tasks: BackgroundTasks,
@@ -1996,7 +3136,8 @@ async def create_organization_invite(
 
 
 @api.get("/organizations/{org_id}/invites", response_model=list)
-async def list_organization_invites(
+@read_only
+def list_organization_invites(
     org_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     """List all pending invites for an organization."""
@@ -2038,7 +3179,7 @@ async def list_organization_invites(
 
 
 @api.delete("/organizations/{org_id}/invites/{invite_id}")
-async def revoke_organization_invite(
+def revoke_organization_invite(
     org_id: int,
     invite_id: int,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -2063,7 +3204,8 @@ async def revoke_organization_invite(
 
 
 @api.get("/invites/{token}")
-async def get_invite(token: str):
+@read_only
+def get_invite(token: str):
     """Get invite details (for landing page)."""
     invite = OrganizationInvite.get_or_none(
         (OrganizationInvite.token == token) & (OrganizationInvite.status == "pending")
@@ -2086,7 +3228,7 @@ async def get_invite(token: str):
 
 
 @api.post("/invites/{token}/accept")
-async def accept_invite(
+def accept_invite(
     token: str,
     current_user: User = Depends(get_current_user_or_api_key),
 ):
@@ -2117,7 +3259,7 @@ async def accept_invite(
 
 
 @api.post("/organizations/{org_id}/teams", response_model=TeamResponse)
-async def create_team(
+def create_team(
     org_id: int,
     team_data: TeamCreate,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -2142,7 +3284,8 @@ async def create_team(
 
 
 @api.get("/organizations/{org_id}/teams", response_model=list)
-async def list_organization_teams(
+@read_only
+def list_organization_teams(
     org_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     org = Organization.get_or_none(Organization.id == org_id)
@@ -2168,7 +3311,7 @@ async def list_organization_teams(
 
 
 @api.put("/teams/{team_id}", response_model=TeamResponse)
-async def update_team(
+def update_team(
     team_id: int,
     team_data: TeamUpdate,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -2195,7 +3338,7 @@ async def update_team(
 
 
 @api.delete("/teams/{team_id}")
-async def delete_team(
+def delete_team(
     team_id: int,
     current_user: User = Depends(get_current_user_or_api_key),
 ):
@@ -2208,15 +3351,15 @@ async def delete_team(
         raise HTTPException(status_code=403, detail="Not authorized")
 
     with db.atomic():
-        Board.update(shared_team=None).where(Board.shared_team == team)
-        TeamMember.delete().where(TeamMember.team == team)
+        unshare_team_boards([team])
+        TeamMember.delete().where(TeamMember.team == team).execute()
         team.delete_instance()
 
     return {"ok": True}
 
 
 @api.post("/teams/{team_id}/members", response_model=TeamMemberResponse)
-async def add_team_member(
+def add_team_member(
     team_id: int,
     request: UsernameRequest,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -2263,7 +3406,8 @@ async def add_team_member(
 
 
 @api.get("/teams/{team_id}/members", response_model=list)
-async def list_team_members(
+@read_only
+def list_team_members(
     team_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     team = Team.get_or_none(Team.id == team_id)
@@ -2290,7 +3434,7 @@ async def list_team_members(
 
 
 @api.delete("/teams/{team_id}/members/{user_id}")
-async def remove_team_member(
+def remove_team_member(
     team_id: int,
     user_id: int,
     current_user: User = Depends(get_current_user_or_api_key),
@@ -2322,7 +3466,8 @@ async def remove_team_member(
 
 # Documentation routes for serving markdown files
 @api.get("/docs.md", response_class=PlainTextResponse)
-async def docs_markdown():
+@read_only
+def docs_markdown():
     """Serve main documentation as raw markdown"""
     docs_path = os.path.join(
         os.path.dirname(os.path.dirname(__file__)), "frontend", "content", "docs.md"
@@ -2336,7 +3481,8 @@ async def docs_markdown():
 
 
 @api.get("/docs/{section}.md", response_class=PlainTextResponse)
-async def docs_section_markdown(section: str):
+@read_only
+def docs_section_markdown(section: str):
     """Serve specific documentation section as raw markdown"""
     # Validate section name to prevent directory traversal
     allowed_sections = ["quickstart", "reference", "workflows"]
@@ -2361,7 +3507,7 @@ async def docs_section_markdown(section: str):
 
 # Beta signup endpoint (public, no auth required)
 @api.post("/beta-signup")
-async def beta_signup(request: BetaSignupRequest):
+def beta_signup(request: BetaSignupRequest):
     """Register interest for beta access"""
     if not re.match(EMAIL_PATTERN, request.email):
         raise HTTPException(status_code=400, detail="Invalid email address")
@@ -2378,7 +3524,8 @@ async def beta_signup(request: BetaSignupRequest):
 
 # API Key management endpoints
 @api.get("/api-keys", response_model=list[ApiKeyResponse])
-async def list_api_keys(current_user: User = Depends(get_current_user_or_api_key)):
+@read_only
+def list_api_keys(current_user: User = Depends(get_current_user_or_api_key)):
     """List all API keys for the current user"""
     keys = (
         ApiKey.select()
@@ -2391,7 +3538,8 @@ async def list_api_keys(current_user: User = Depends(get_current_user_or_api_key
             "name": key.name,
             "prefix": key.prefix,
             "created_at": key.created_at,
-            "last_used_at": key.last_used_at,
+            # This worker's unwritten use, if any, is the newer.
+            "last_used_at": api_key_usage.pending(key.id) or key.last_used_at,
             "expires_at": key.expires_at,
             "is_active": key.is_active,
         }
@@ -2400,7 +3548,7 @@ async def list_api_keys(current_user: User = Depends(get_current_user_or_api_key
 
 
 @api.post("/api-keys", response_model=ApiKeyCreateResponse)
-async def create_api_key(
+def create_api_key(
     key_data: ApiKeyCreate, current_user: User = Depends(get_current_user_or_api_key)
 ):
     """Create a new API key. Returns the key only once - save it securely!"""
@@ -2417,7 +3565,7 @@ async def create_api_key(
 
 
 @api.delete("/api-keys/{key_id}")
-async def delete_api_key(
+def delete_api_key(
     key_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     """Deactivate an API key"""
@@ -2430,7 +3578,7 @@ async def delete_api_key(
 
 
 @api.post("/api-keys/{key_id}/activate")
-async def activate_api_key(
+def activate_api_key(
     key_id: int, current_user: User = Depends(get_current_user_or_api_key)
 ):
     """Reactivate a deactivated API key"""
@@ -2441,3 +3589,78 @@ async def activate_api_key(
     key.is_active = True
     key.save()
     return {"ok": True, "message": "API key has been activated"}
+
+
+# Batch endpoint
+class BatchCall(BaseModel):
+    method: str
+    # From /api/, with any query string, e.g. "/api/boards/3/changes?since=7".
+    path: str
+    # The JSON body, for the calls that take one.
+    body: Any = None
+
+
+class BatchRequest(BaseModel):
+    calls: list[BatchCall]
+    # One transaction for every call: the first to fail rolls back those
+    # before it, and those after it do not run.
+    atomic: bool = False
+
+
+NOT_RUN = {"status": 424, "body": {"detail": "Not run: an earlier call failed"}}
+
+
+@api.post("/batch", response_model=dict)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user_or_api_key),
+):
+    """Run many API calls, in order, in one request.
+
+    Returns {"responses": [{"status": ..., "body": ...}, ...], "rolled_back":
+    ...}, a response per call. A call failing does not fail the batch;
+    look at each status. With atomic, "rolled_back" says whether the calls
+    before a failure were undone.
+    """
+    if len(batch.calls) > BATCH_MAX_CALLS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {BATCH_MAX_CALLS} calls per batch"
+        )
+    if not batch.atomic:
+        responses = []
+        for call in batch.calls:
+            responses.append(await run_call(request, call.method, call.path, call.body))
+        return {"responses": responses, "rolled_back": False}
+
+    # Calls each run on whatever threadpool thread is free; one transaction
+    # across them needs one connection across them too. A shard's writes
+    # would go through connections of their own, outside it.
+    if sharding_enabled():
+        raise HTTPException(
+            status_code=400, detail="Atomic batches need DATABASE_SHARD_DIR unset"
+        )
+    responses = []
+    with db.shared_connection():
+        transaction_stack = ExitStack()
+        transaction = await run_in_threadpool(
+            transaction_stack.enter_context, db.atomic()
+        )
+        try:
+            for call in batch.calls:
+                if responses and responses[-1]["status"] >= 400:
+                    responses.append(NOT_RUN)
+                    continue
+                responses.append(
+                    await run_call(request, call.method, call.path, call.body)
+                )
+            failed = any(response["status"] >= 400 for response in responses)
+            if failed:
+                await run_in_threadpool(transaction.rollback)
+        except BaseException as exc:
+            await run_in_threadpool(
+                transaction_stack.__exit__, type(exc), exc, exc.__traceback__
+            )
+            raise
+        await run_in_threadpool(transaction_stack.close)
+    return {"responses": responses, "rolled_back": failed}
@@ -157,8 +157,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def decode_token(token: str):
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+def decode_token(token: str, claims: Optional[dict] = None):
+    """TokenData from `token`, or from its `claims` when already decoded."""
+    payload = claims
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     user_id_str = payload.get("sub", "0")
     user_id = int(user_id_str) if user_id_str else 0
     username: str = str(payload.get("username", ""))
@@ -171,17 +174,20 @@ def decode_token(token: str):
     return TokenData(user_id=user_id, username=username)
 
 
-def renew_access_token(token: str) -> Optional[str]:
+def renew_access_token(token: str, claims: Optional[dict] = None) -> Optional[str]:
     """Return a replacement for a token nearing expiry, or None to leave it be.
 
     None covers every uninteresting case -- the token is invalid, it has plenty
     of life left, or the session has run past its absolute cap -- so a caller
-    can hand this any Authorization header it happens to see.
+    can hand this any Authorization header it happens to see. Pass `claims`
+    when the token has already been decoded.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        return None
+    payload = claims
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
 
     expires_at = payload.get("exp")
     if not expires_at:
@@ -211,15 +217,58 @@ def renew_access_token(token: str) -> Optional[str]:
     )
 
 
-async def get_current_user(
+def token_claims(request: Request, token: str) -> dict:
+    """The claims of bearer `token`, decoded at most once per request.
+
+    The auth dependency decodes it and the session-renewal middleware reads
+    the result back, rather than each verifying the signature for itself.
+    Raises JWTError for a token that does not verify, every time it is asked.
+    """
+    decoded = getattr(request.state, "token_claims", None)
+    if decoded is None or decoded[0] != token:
+        try:
+            decoded = (token, jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+        except JWTError as exc:
+            decoded = (token, exc)
+        request.state.token_claims = decoded
+    if isinstance(decoded[1], JWTError):
+        raise decoded[1]
+    return decoded[1]
+
+
+def decoded_claims(request: Request, token: str) -> Optional[dict]:
+    """token_claims() if this request has already decoded `token`, else None
+    -- without decoding it."""
+    decoded = getattr(request.state, "token_claims", None)
+    if decoded is None or decoded[0] != token or isinstance(decoded[1], JWTError):
+        return None
+    return decoded[1]
+
+
+def load_user(user_id):
+    """The User with `user_id`, or None. Served from user_cache when warm."""
+    from backend.database import db
+    from backend.models import User
+    from backend.usercache import user_cache
+
+    user = user_cache.get(user_id)
+    if user is None:
+        user = User.get_or_none(User.id == user_id)
+        # Not a row read inside a transaction, e.g. an atomic /api/batch's:
+        # it may be rolled back.
+        if user is not None and not db.in_transaction():
+            user_cache.put(user)
+    return user
+
+
+def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
 ):
     token = credentials.credentials
-    token_data = decode_token(token)
+    token_data = decode_token(token, token_claims(request, token))
 
-    from backend.models import User
-
-    user = User.get_or_none(User.id == token_data.user_id)
+    user = load_user(token_data.user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -229,15 +278,14 @@ async def get_current_user(
     return user
 
 
-async def get_current_admin(
+def get_current_admin(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
 ):
     token = credentials.credentials
-    token_data = decode_token(token)
-
-    from backend.models import User
+    token_data = decode_token(token, token_claims(request, token))
 
-    user = User.get_or_none(User.id == token_data.user_id)
+    user = load_user(token_data.user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -252,47 +300,54 @@ async def get_current_admin(
     return user
 
 
-async def get_current_user_from_api_key_header(api_key: str):
-    """Validate an API key from the header value."""
-    from backend.models import ApiKey
-    from datetime import timezone as tz
-
-    # Look up API key by prefix (first 8 chars)
-    prefix = api_key[:8]
-    api_key_record = ApiKey.get_or_none(ApiKey.prefix == prefix)
-
-    if api_key_record is None:
-        return None
-
-    if not api_key_record.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="API key is inactive",
-        )
+def get_current_user_from_api_key_header(api_key: str):
+    """Validate an API key from the header value.
 
-    # Check expiration
-    if api_key_record.expires_at and api_key_record.expires_at.replace(
-        tzinfo=tz.utc
-    ) < datetime.now(tz.utc):
+    A key verified recently is answered from the verified-key cache, and one
+    recently found to be no key is refused from it; any other costs one
+    indexed lookup by its digest (backend.keycache).
+    """
+    from backend.keycache import verified_keys
+    from backend.keyusage import api_key_usage
+    from backend.models import ApiKey, _as_datetime, digest_api_key
+
+    digest = digest_api_key(api_key)
+    cached = verified_keys.get(digest)
+    if cached is None:
+        if verified_keys.is_unknown(digest):
+            return None
+        api_key_record = ApiKey.find(api_key)
+        if api_key_record is None:
+            verified_keys.put_unknown(digest)
+            return None
+
+        if not api_key_record.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="API key is inactive",
+            )
+        expires_at = api_key_record.expires_at
+        if expires_at is not None:
+            expires_at = _as_datetime(expires_at)
+        cached = (api_key_record.id, api_key_record.user_id, expires_at)
+        verified_keys.put(digest, *cached)
+    key_id, user_id, expires_at = cached
+
+    # Check expiration -- on every request, cached or not.
+    if expires_at is not None and expires_at < datetime.now(timezone.utc):
+        verified_keys.discard(key_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API key has expired",
         )
 
-    # Verify the key
-    if not api_key_record.verify(api_key):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid API key",
-        )
+    # Written in the background, batched with every other key's
+    api_key_usage.record(key_id)
 
-    # Update last used timestamp
-    api_key_record.update_last_used()
+    return load_user(user_id)
 
-    return api_key_record.user
 
-
-async def get_current_user_or_api_key(
+def get_current_user_or_api_key(
     request: Request,
 ):
     """
@@ -302,7 +357,7 @@ async def get_current_user_or_api_key(
     # Check for API key first
     api_key = request.headers.get("X-API-Key")
     if api_key:
-        user_from_api_key = await get_current_user_from_api_key_header(api_key)
+        user_from_api_key = get_current_user_from_api_key_header(api_key)
         if user_from_api_key is not None:
             return user_from_api_key
 
@@ -311,10 +366,8 @@ async def get_current_user_or_api_key(
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header[7:]
         try:
-            token_data = decode_token(token)
-            from backend.models import User
-
-            user = User.get_or_none(User.id == token_data.user_id)
+            token_data = decode_token(token, token_claims(request, token))
+            user = load_user(token_data.user_id)
             if user is not None:
                 return user
         except Exception:
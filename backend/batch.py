@@ -0,0 +1,128 @@
+"""/api/batch: many API calls in one round trip.
+
+A script that lists boards, reads each and adds cards pays a TLS round
+trip, an auth check and a JSON envelope for every call. A batch sends them
+as one POST instead. Each call then runs through the app in-process, one
+after another and in order, exactly as it would have on its own: the same
+middleware, routes, validation and errors.
+
+Calls are authenticated as the batch was. They carry its credentials, and
+the token the batch's own auth check decoded is handed on rather than
+decoded again; the user behind it comes from the user cache.
+"""
+
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+
+import anyio
+
+# Most calls one batch may carry.
+BATCH_MAX_CALLS = int(os.environ.get("BATCH_MAX_CALLS", "100"))
+BATCH_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+# What a call inherits from the batch's headers: who is asking. Nothing
+# about the batch's own body, nor its conditional headers.
+FORWARDED_HEADERS = {b"authorization", b"x-api-key", b"host", b"user-agent"}
+
+
+def refusal(method, path):
+    """Why a call cannot run in a batch, or None if it can."""
+    if method not in BATCH_METHODS:
+        return f"Method {method} cannot be batched"
+    target = urlsplit(path).path
+    if not target.startswith("/api/"):
+        return "Only /api/ paths can be batched"
+    if target.rstrip("/") == "/api/batch":
+        return "A batch cannot contain another batch"
+    if target.endswith("/events"):
+        # A stream never finishes, and the batch would wait for it forever.
+        return "Event streams cannot be batched"
+    return None
+
+
+def _scope(request, method, path, payload):
+    outer = request.scope
+    target = urlsplit(path)
+    headers = [
+        (name, value) for name, value in outer["headers"] if name in FORWARDED_HEADERS
+    ]
+    if payload:
+        headers += [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ]
+    # A state of its own -- the RequestScope kept there must not carry rows
+    # from one call into the next -- but with the batch's decoded token.
+    state = {}
+    claims = outer.get("state", {}).get("token_claims")
+    if claims is not None:
+        state["token_claims"] = claims
+    return {
+        "type": "http",
+        "asgi": outer.get("asgi", {"version": "3.0"}),
+        "http_version": outer.get("http_version", "1.1"),
+        "method": method,
+        "scheme": outer.get("scheme", "http"),
+        "server": outer.get("server"),
+        "client": outer.get("client"),
+        "root_path": outer.get("root_path", ""),
+        "path": target.path,
+        "raw_path": target.path.encode(),
+        "query_string": target.query.encode(),
+        "headers": headers,
+        "state": state,
+    }
+
+
+async def run_call(request, method, path, body):
+    """Run one call through `request`'s app; {"status": ..., "body": ...}.
+
+    The body comes back parsed when it is JSON, as text otherwise.
+    """
+    method = method.upper()
+    refused = refusal(method, path)
+    if refused:
+        return {"status": 400, "body": {"detail": refused}}
+
+    payload = b"" if body is None else json.dumps(body).encode()
+    received = False
+    finished = anyio.Event()
+    status = None
+    chunks = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # As a server does: the client is only gone once it has its answer.
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                finished.set()
+
+    try:
+        await request.app(_scope(request, method, path, payload), receive, send)
+    except Exception as exc:
+        # The app has answered 500 already, if it could, and re-raised for
+        # the server to log; the batch carries on.
+        print(f"kanban: batch call {method} {path} failed: {exc!r}", file=sys.stderr)
+    finally:
+        finished.set()
+    if status is None:
+        return {"status": 500, "body": {"detail": "Internal Server Error"}}
+
+    content = b"".join(chunks)
+    try:
+        parsed = json.loads(content) if content else None
+    except ValueError:
+        parsed = content.decode("utf-8", "replace")
+    return {"status": status, "body": parsed}
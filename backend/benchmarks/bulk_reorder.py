@@ -0,0 +1,78 @@
+"""Latency of one /api/cards/reorder carrying a whole long column.
+
+Starts a uvicorn worker on a throwaway database holding one column of CARDS
+cards, then sends ROUNDS reorders of every card in it, each reversing the
+order the last one left, so every request really moves every row. What is
+timed is the whole request: loading and checking the cards, writing their
+positions and logging the change.
+
+    python -m backend.benchmarks.bulk_reorder [--cards 1000] [--rounds 20]
+
+Run it on two checkouts to compare them; the numbers are per request.
+"""
+
+import argparse
+import tempfile
+import time
+
+import httpx
+
+from backend.benchmarks.health_under_login import _start_worker, _summary
+from backend.benchmarks.reads_with_writes import _token
+
+SETUP = """
+from backend.database import init_db
+from backend.models import Board, Card, User
+
+init_db()
+user = User.create_user("bench", "bench-password")
+board = Board.create_with_columns(owner=user, name="Bench", column_names=["Long"])
+Card.insert_many(
+    [
+        {{"column": board.columns[0], "title": f"card {{n}}", "position": n}}
+        for n in range({cards})
+    ]
+).execute()
+"""
+
+
+def _reorder(url, headers, card_ids, rounds):
+    latencies = []
+    with httpx.Client(base_url=url, headers=headers, timeout=60) as client:
+        for n in range(rounds):
+            order = card_ids if n % 2 else card_ids[::-1]
+            payload = {
+                "cards": [
+                    {"id": card_id, "position": position}
+                    for position, card_id in enumerate(order)
+                ]
+            }
+            started = time.perf_counter()
+            client.post("/api/cards/reorder", json=payload).raise_for_status()
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=1000, help="in the column")
+    parser.add_argument("--rounds", type=int, default=20, help="reorders to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        worker, url = _start_worker(directory, SETUP.format(cards=args.cards))
+        try:
+            headers = {"Authorization": f"Bearer {_token(url)}"}
+            board = httpx.get(f"{url}/api/boards/1", headers=headers).json()
+            card_ids = [card["id"] for card in board["columns"][0]["cards"]]
+            _reorder(url, headers, card_ids, 2)  # warm up
+            latencies = _reorder(url, headers, card_ids, args.rounds)
+        finally:
+            worker.terminate()
+            worker.wait()
+
+    print(f"reorder of {len(card_ids)} cards: {_summary(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
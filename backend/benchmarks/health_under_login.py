@@ -0,0 +1,139 @@
+"""p99 latency of /api/health while logins hammer the same worker.
+
+Starts one uvicorn worker on a throwaway database, times /api/health on its
+own, then times it again while LOGINS clients log in back to back. Each login
+is a bcrypt check of a quarter second or so; were that to run on the event
+loop, every health check queued behind it would wait for it, and the loaded
+p99 would be about one bcrypt long. Run on the threadpool, it stays flat.
+
+    python -m backend.benchmarks.health_under_login [--logins 8] [--seconds 5]
+
+API_THREADPOOL_SIZE in the environment is passed through to the worker.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+SETUP = """
+from backend.database import init_db
+from backend.models import User
+
+init_db()
+User.create_user("bench", "bench-password")
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_worker(directory, setup=SETUP, **settings):
+    """A uvicorn worker on a fresh database in `directory`, once `setup` has
+    run against it. `settings` are added to its environment."""
+    env = dict(
+        os.environ,
+        DATABASE_PATH=os.path.join(directory, "bench.db"),
+        JWT_SECRET_KEY="benchmark-only-key",
+        **settings,
+    )
+    subprocess.run(
+        [sys.executable, "-c", setup], cwd=REPO_ROOT, env=env, check=True
+    )
+    port = _free_port()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            httpx.get(f"{url}/api/health", timeout=1)
+            return worker, url
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                worker.kill()
+                raise
+            time.sleep(0.1)
+
+
+def _sample_health(url, seconds):
+    latencies = []
+    with httpx.Client(base_url=url) as client:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            client.get("/api/health").raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+    return latencies
+
+
+def _log_in_until(url, stop, counts):
+    with httpx.Client(base_url=url, timeout=60) as client:
+        while not stop.is_set():
+            client.post(
+                "/api/token", json={"username": "bench", "password": "bench-password"}
+            ).raise_for_status()
+            counts.append(1)
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"n={len(ordered)} p50={statistics.median(ordered) * 1000:.1f}ms "
+        f"p99={p99 * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=8, help="concurrent logins")
+    parser.add_argument("--seconds", type=float, default=5, help="per phase")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        worker, url = _start_worker(directory)
+        try:
+            idle = _sample_health(url, args.seconds)
+
+            stop = threading.Event()
+            counts = []
+            clients = [
+                threading.Thread(target=_log_in_until, args=(url, stop, counts))
+                for _ in range(args.logins)
+            ]
+            for client in clients:
+                client.start()
+            loaded = _sample_health(url, args.seconds)
+            stop.set()
+            for client in clients:
+                client.join()
+        finally:
+            worker.terminate()
+            worker.wait()
+
+    print(f"health, idle:               {_summary(idle)}")
+    print(f"health, {args.logins:>2} logins running: {_summary(loaded)}")
+    print(f"logins completed: {len(counts)} in {args.seconds:g}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Board reads and card writes against one worker, with and without the
+read-only connection pool.
+
+Starts a uvicorn worker on a throwaway database holding one board of
+COLUMNS x CARDS cards, then for SECONDS runs READERS clients fetching the
+board back to back while WRITERS clients retitle its cards. Each write
+changes the board, so the readers rebuild it from the database every time
+rather than from the snapshot cache. It does this twice: once with
+SQLITE_READ_POOL_SIZE=0, every query on the read-write connections, and once
+with the pool, where GET routes read from read-only ones.
+
+    python -m backend.benchmarks.reads_with_writes [--readers 8] [--writers 2]
+
+The database is in WAL mode either way; what changes is whether readers
+share connections and locks with the writer.
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+
+import httpx
+
+from backend.benchmarks.health_under_login import _start_worker, _summary
+
+SETUP = """
+from backend.database import init_db
+from backend.models import Board, Card, User
+
+init_db()
+user = User.create_user("bench", "bench-password")
+board = Board.create_with_columns(
+    owner=user, name="Bench", column_names=[f"Column {{i}}" for i in range({columns})]
+)
+for column in board.columns:
+    for position in range({cards}):
+        Card.create(column=column, title=f"card {{position}}", position=position)
+"""
+
+
+def _token(url):
+    response = httpx.post(
+        f"{url}/api/token",
+        json={"username": "bench", "password": "bench-password"},
+        timeout=60,
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def _read_until(url, headers, stop, latencies):
+    with httpx.Client(base_url=url, headers=headers, timeout=60) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get("/api/boards/1").raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+
+def _write_until(url, headers, card_ids, stop, latencies):
+    with httpx.Client(base_url=url, headers=headers, timeout=60) as client:
+        n = 0
+        while not stop.is_set():
+            card_id = card_ids[n % len(card_ids)]
+            started = time.perf_counter()
+            client.put(
+                f"/api/cards/{card_id}", json={"title": f"edit {n}"}
+            ).raise_for_status()
+            latencies.append(time.perf_counter() - started)
+            n += 1
+
+
+def _run(args, pool_size):
+    setup = SETUP.format(columns=args.columns, cards=args.cards)
+    with tempfile.TemporaryDirectory() as directory:
+        worker, url = _start_worker(
+            directory, setup, SQLITE_READ_POOL_SIZE=str(pool_size)
+        )
+        try:
+            headers = {"Authorization": f"Bearer {_token(url)}"}
+            board = httpx.get(f"{url}/api/boards/1", headers=headers).json()
+            card_ids = [card["id"] for c in board["columns"] for card in c["cards"]]
+
+            stop = threading.Event()
+            reads, writes = [], []
+            clients = [
+                threading.Thread(target=_read_until, args=(url, headers, stop, reads))
+                for _ in range(args.readers)
+            ] + [
+                threading.Thread(
+                    target=_write_until, args=(url, headers, card_ids, stop, writes)
+                )
+                for _ in range(args.writers)
+            ]
+            for client in clients:
+                client.start()
+            time.sleep(args.seconds)
+            stop.set()
+            for client in clients:
+                client.join()
+        finally:
+            worker.terminate()
+            worker.wait()
+    return reads, writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8, help="concurrent reads")
+    parser.add_argument("--writers", type=int, default=2, help="concurrent writes")
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--cards", type=int, default=40, help="per column")
+    parser.add_argument("--seconds", type=float, default=5, help="per run")
+    parser.add_argument("--pool", type=int, default=16, help="read pool size")
+    args = parser.parse_args()
+
+    for label, pool_size in (("no read pool", 0), (f"pool of {args.pool}", args.pool)):
+        reads, writes = _run(args, pool_size)
+        print(f"{label}:")
+        print(f"  board reads: {len(reads) / args.seconds:7.1f}/s  {_summary(reads)}")
+        print(f"  card writes: {len(writes) / args.seconds:7.1f}/s  {_summary(writes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Assembling a board's nested columns -> cards -> comments payload.
+
+get_board used to walk the ORM graph: board.columns, then column.cards, then a
+Comment query per card, then a lazy User fetch per comment for the username.
+Every one of those is a round trip, so the cost of a single GET grew with the
+size of the board -- a 40-column, 2,000-card board ran thousands of queries.
+
+This fetches each level in one query, whatever the board's size, and stitches
+the tree together in memory. The output is exactly what the old walk produced:
+same keys, same values, same ordering.
+
+board_pages reads the same tree a page of cards at a time, for the streamed
+GET /api/boards/{id}?stream=..., which sends a board as it is read rather
+than building all of it first.
+"""
+
+import os
+
+from backend.models import Card, Column, Comment, User, not_deleted
+
+# Cards per query when a board is streamed rather than loaded whole: what
+# bounds the memory a streamed board takes, however big it is.
+BOARD_STREAM_PAGE_SIZE = int(os.environ.get("BOARD_STREAM_PAGE_SIZE", "500"))
+
+
+def _comment_payload(row):
+    return {
+        "id": row["id"],
+        "card_id": row["card"],
+        "user_id": row["user"],
+        "username": row["username"],
+        "content": row["content"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def load_columns(board):
+    """Every column on `board`, each carrying its cards and their comments.
+
+    Three queries regardless of size. Ties in position fall back to id, which
+    is the order SQLite happened to return them in before, now made explicit.
+    Cards and comments come column by column, then card by card: the order
+    the indexes on (board, position), (column, position) and (card,
+    created_at) already hold them in, so nothing is sorted.
+    """
+    columns = (
+        Column.select(Column.id, Column.name, Column.position)
+        .where((Column.board == board) & Column.deleted_at.is_null())
+        .order_by(Column.position, Column.id)
+        .dicts()
+    )
+    cards = (
+        Card.select(
+            Card.id, Card.column, Card.title, Card.description, Card.position
+        )
+        .join(Column)
+        .where(Column.board == board, *not_deleted(Column, Card))
+        .order_by(Column.position, Column.id, Card.position, Card.id)
+        .dicts()
+    )
+    # Joining User here is what removes the per-comment username lookup.
+    comments = (
+        Comment.select(
+            Comment.id,
+            Comment.card,
+            Comment.user,
+            User.username,
+            Comment.content,
+            Comment.created_at,
+            Comment.updated_at,
+        )
+        .join(User)
+        .switch(Comment)
+        .join(Card)
+        .join(Column)
+        .where(Column.board == board, *not_deleted(Column, Card))
+        .order_by(
+            Column.position,
+            Column.id,
+            Card.position,
+            Card.id,
+            Comment.created_at,
+            Comment.id,
+        )
+        .dicts()
+    )
+
+    comments_by_card = {}
+    for row in comments:
+        comments_by_card.setdefault(row["card"], []).append(_comment_payload(row))
+
+    cards_by_column = {}
+    for row in cards:
+        cards_by_column.setdefault(row["column"], []).append(
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "position": row["position"],
+                "comments": comments_by_card.get(row["id"], []),
+            }
+        )
+
+    return [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "position": row["position"],
+            "cards": cards_by_column.get(row["id"], []),
+        }
+        for row in columns
+    ]
+
+
+def board_pages(board):
+    """load_columns(board) a page of cards at a time.
+
+    Yields (column, cards): every column with its first page of cards, which
+    may be empty, then the same column dict again with each further page.
+    Pages are found by keyset on (position, id) -- the order, and the index,
+    load_columns reads them in -- so a late page costs what the first does.
+    Each page's queries have finished before it is yielded; nothing is left
+    open while the caller is busy with it.
+    """
+    columns = list(
+        Column.select(Column.id, Column.name, Column.position)
+        .where((Column.board == board) & Column.deleted_at.is_null())
+        .order_by(Column.position, Column.id)
+        .dicts()
+    )
+    for column in columns:
+        after = None
+        while True:
+            query = Card.select(
+                Card.id, Card.title, Card.description, Card.position
+            ).where(Card.column == column["id"], Card.deleted_at.is_null())
+            if after is not None:
+                position, card_id = after
+                query = query.where(
+                    (Card.position > position)
+                    | ((Card.position == position) & (Card.id > card_id))
+                )
+            query = query.order_by(Card.position, Card.id)
+            rows = list(query.limit(BOARD_STREAM_PAGE_SIZE).dicts())
+            cards = _with_comments(rows)
+            yield column, cards
+            if len(rows) < BOARD_STREAM_PAGE_SIZE:
+                break
+            after = (rows[-1]["position"], rows[-1]["id"])
+
+
+def _with_comments(rows):
+    if not rows:
+        return []
+    comments = (
+        Comment.select(
+            Comment.id,
+            Comment.card,
+            Comment.user,
+            User.username,
+            Comment.content,
+            Comment.created_at,
+            Comment.updated_at,
+        )
+        .join(User)
+        .where(Comment.card.in_([row["id"] for row in rows]))
+        .order_by(Comment.card, Comment.created_at, Comment.id)
+        .dicts()
+    )
+    comments_by_card = {}
+    for row in comments:
+        comments_by_card.setdefault(row["card"], []).append(_comment_payload(row))
+    return [
+        {**row, "comments": comments_by_card.get(row["id"], [])} for row in rows
+    ]
+
+
+def board_fields(board):
+    """`board`'s part of its GET /api/boards/{id} body: all but the columns."""
+    return {
+        "id": board.id,
+        "name": board.name,
+        "created_at": board.created_at,
+        "shared_team_id": board.shared_team_id,
+        "is_public_to_org": board.is_public_to_org,
+        "owner_id": board.owner_id,
+    }
+
+
+def board_payload(board):
+    """The full GET /api/boards/{id} body for `board`."""
+    return {**board_fields(board), "columns": load_columns(board)}
+
@@ -0,0 +1,50 @@
+"""Set-based writes: many rows per statement rather than one statement per row.
+
+For routes taking a batch -- /cards/reorder, /cards/bulk -- where a loop of
+single-row INSERTs and UPDATEs would cost a round trip to SQLite, and a
+statement's worth of parsing and locking, per item. Each helper splits its
+rows into batches sized by the parameters a row binds, so a statement never
+carries more than the database accepts.
+"""
+
+from peewee import Case, chunked
+
+# Parameters one statement may bind: SQLite builds before 3.32 accept no more.
+MAX_PARAMETERS = 999
+
+
+def rows_per_statement(params_per_row, fixed=0):
+    """How many rows binding `params_per_row` each fit in one statement that
+    binds `fixed` more besides."""
+    return max(1, (MAX_PARAMETERS - fixed) // params_per_row)
+
+
+def insert_rows(model, rows):
+    """INSERT `rows` -- dicts of field values -- and return their new ids, in
+    order."""
+    ids = []
+    # One parameter per column per row.
+    columns = max((len(row) for row in rows), default=1)
+    for batch in chunked(rows, rows_per_statement(columns)):
+        query = model.insert_many(batch).returning(model._meta.primary_key)
+        ids.extend(pk for (pk,) in query.tuples().execute())
+    return ids
+
+
+def set_by_id(field, values):
+    """Write {id: value} into `field`: UPDATE ... SET field = CASE id ... END
+    WHERE id IN (...), one statement per batch."""
+    model = field.model
+    pk = model._meta.primary_key
+    # Each row binds its id and value in the CASE, and its id in the IN.
+    for batch in chunked(values.items(), rows_per_statement(3)):
+        model.update({field: Case(pk, batch)}).where(
+            pk.in_([row_id for row_id, _ in batch])
+        ).execute()
+
+
+def update_by_id(model, ids, **fields):
+    """Set the same `fields` on every row in `ids`."""
+    pk = model._meta.primary_key
+    for batch in chunked(ids, rows_per_statement(1, fixed=len(fields))):
+        model.update(**fields).where(pk.in_(batch)).execute()
@@ -0,0 +1,317 @@
+"""Board versions and the change log behind GET /api/boards/{id}/changes.
+
+Every write that changes a board's payload goes through record_changes(),
+inside the write's own transaction. That bumps the board's version by exactly
+one and logs which objects the write touched, so a client holding version N
+can ask for everything after N and receive only those objects -- kilobytes,
+where re-fetching a busy board is the whole tree.
+
+The log is bounded per board. Trimming always removes whole versions, oldest
+first, so what remains is an unbroken run up to the current version. A
+client whose version has fallen off the bottom of that run gets a full
+snapshot instead of a delta.
+"""
+
+import os
+from datetime import datetime, timezone
+
+from peewee import chunked
+
+from backend import shards
+from backend.boards import board_payload
+from backend.bulk import rows_per_statement
+from backend.database import current_shard, using_shard
+from backend.events import note_board_changed
+from backend.outbox import announce
+from backend.models import (
+    Board,
+    BoardChange,
+    Card,
+    Column,
+    Comment,
+    User,
+    not_deleted,
+)
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+# Per board. A busy board reaching this only means clients that were away for
+# more than this many changes re-download the board once.
+CHANGE_LOG_MAX_ENTRIES = int(os.environ.get("BOARD_CHANGE_LOG_MAX_ENTRIES", "500"))
+# Rows per INSERT: each binds its six columns.
+CHANGE_LOG_BATCH_SIZE = rows_per_statement(6)
+
+
+def record_changes(changes):
+    """Log `changes` -- (board_id, kind, object_id, op) tuples -- and bump the
+    version of every board they touch, once each.
+
+    Call it inside the same transaction as the write, so a reader can never see
+    the new data under the old version. Returns {board_id: new_version}.
+
+    Inside a shard's transaction, where the boards cannot be written, this is
+    put off until the shard commits (see shards.on_catalog) and returns {}.
+    The write's route then answers once its content has committed, even if
+    the catalog's side fails and is left owed: for that window its board
+    reads as the version before.
+    """
+    if current_shard():
+        changes = list(changes)
+        shards.on_catalog(lambda: record_changes(changes))
+        return {}
+    by_board = {}
+    for board_id, kind, object_id, op in changes:
+        by_board.setdefault(board_id, []).append((kind, object_id, op))
+    if not by_board:
+        return {}
+
+    Board.update(version=Board.version + 1).where(
+        Board.id.in_(list(by_board))
+    ).execute()
+    versions = dict(
+        Board.select(Board.id, Board.version)
+        .where(Board.id.in_(list(by_board)))
+        .tuples()
+    )
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "board": board_id,
+            "version": versions[board_id],
+            "kind": kind,
+            "object_id": object_id,
+            "op": op,
+            "created_at": now,
+        }
+        for board_id, entries in by_board.items()
+        if board_id in versions
+        for kind, object_id, op in entries
+    ]
+    # Batched: deleting a column of thousands of cards logs thousands of
+    # rows, more than one statement may carry parameters for.
+    for batch in chunked(rows, CHANGE_LOG_BATCH_SIZE):
+        BoardChange.insert_many(batch).execute()
+    for board_id in versions:
+        _trim(board_id)
+        note_board_changed(board_id)
+    announce(versions)
+    return versions
+
+
+def _trim(board_id):
+    """Drop the oldest versions once a board's log exceeds its bound.
+
+    Cut at a version boundary -- everything at or below the version of the
+    first entry past the limit -- so no version is ever left half-logged.
+    """
+    cutoff = (
+        BoardChange.select(BoardChange.version)
+        .where(BoardChange.board == board_id)
+        .order_by(BoardChange.version.desc(), BoardChange.id.desc())
+        .offset(CHANGE_LOG_MAX_ENTRIES)
+        .limit(1)
+        .scalar()
+    )
+    if cutoff is not None:
+        BoardChange.delete().where(
+            (BoardChange.board == board_id) & (BoardChange.version <= cutoff)
+        ).execute()
+
+
+def forget_board(board_id):
+    """Drop a deleted board's log, so a board later handed the same id by
+    SQLite does not inherit its history."""
+    BoardChange.delete().where(BoardChange.board == board_id).execute()
+    # Streams on the board, on every worker, hear about it and close.
+    note_board_changed(board_id)
+    announce([board_id])
+
+
+def comments_by(user):
+    """(board_id, comment_id) for every comment `user` has written.
+
+    Comment authors' usernames are part of the board payload, so renaming or
+    deleting a user changes every one of these. Looks in every shard.
+    """
+    found = []
+    for shard in shards.all_shards():
+        with using_shard(shard):
+            found.extend(
+                Comment.select(Column.board, Comment.id)
+                .join(Card)
+                .join(Column)
+                .where(Comment.user == user)
+                .tuples()
+            )
+    return found
+
+
+def _empty_delta(board, since):
+    return {
+        "board_id": board.id,
+        "since": since,
+        "version": board.version,
+        "full": False,
+        "board": None,
+        "columns": [],
+        "cards": [],
+        "comments": [],
+        "deleted": {"columns": [], "cards": [], "comments": []},
+        "snapshot": None,
+    }
+
+
+def board_delta(board, since):
+    """Everything on `board` that changed after version `since`.
+
+    Upserted objects come back as they stand now; deleted ones as ids in
+    `deleted`. An object touched several times appears once, under whatever
+    happened to it last. If the log no longer reaches back to `since`, the
+    result is marked `full` and carries the whole board in `snapshot`.
+    """
+    delta = _empty_delta(board, since)
+    if since == board.version:
+        return delta
+
+    entries = list(
+        BoardChange.select(
+            BoardChange.version,
+            BoardChange.kind,
+            BoardChange.object_id,
+            BoardChange.op,
+        )
+        .where(
+            (BoardChange.board == board)
+            & (BoardChange.version > since)
+            # Ignore writes that landed after `board` was read, so the delta
+            # describes exactly the version it reports.
+            & (BoardChange.version <= board.version)
+        )
+        .order_by(BoardChange.version, BoardChange.id)
+        .tuples()
+    )
+    # Every version logs at least one entry, so an unbroken log starts at
+    # since + 1. Anything else -- trimmed history, a board older than the log,
+    # a `since` from the future -- can only be answered with the whole board.
+    if since > board.version or not entries or entries[0][0] != since + 1:
+        delta["full"] = True
+        delta["snapshot"] = board_payload(board)
+        return delta
+
+    latest = {}
+    for _, kind, object_id, op in entries:
+        latest[(kind, object_id)] = op
+
+    wanted = {"board": set(), "column": set(), "card": set(), "comment": set()}
+    for (kind, object_id), op in latest.items():
+        if op == DELETE:
+            delta["deleted"][f"{kind}s"].append(object_id)
+        else:
+            wanted[kind].add(object_id)
+
+    if wanted["board"]:
+        delta["board"] = {
+            "id": board.id,
+            "name": board.name,
+            "shared_team_id": board.shared_team_id,
+            "is_public_to_org": board.is_public_to_org,
+            "owner_id": board.owner_id,
+        }
+
+    delta["columns"] = _current_columns(board, wanted["column"])
+    delta["cards"] = _current_cards(board, wanted["card"])
+    delta["comments"] = _current_comments(board, wanted["comment"])
+
+    # An upsert whose object has since left the board without a tombstone of
+    # its own is gone as far as this client is concerned.
+    for kind, found in (
+        ("column", delta["columns"]),
+        ("card", delta["cards"]),
+        ("comment", delta["comments"]),
+    ):
+        missing = wanted[kind] - {row["id"] for row in found}
+        delta["deleted"][f"{kind}s"].extend(sorted(missing))
+
+    return delta
+
+
+def _current_columns(board, ids):
+    if not ids:
+        return []
+    return list(
+        Column.select(Column.id, Column.name, Column.position)
+        .where(
+            (Column.board == board)
+            & Column.id.in_(list(ids))
+            & Column.deleted_at.is_null()
+        )
+        .order_by(Column.position, Column.id)
+        .dicts()
+    )
+
+
+def _current_cards(board, ids):
+    if not ids:
+        return []
+    rows = (
+        Card.select(
+            Card.id, Card.column, Card.title, Card.description, Card.position
+        )
+        .join(Column)
+        .where(
+            (Column.board == board) & Card.id.in_(list(ids)),
+            *not_deleted(Column, Card),
+        )
+        .order_by(Card.position, Card.id)
+        .dicts()
+    )
+    return [
+        {
+            "id": row["id"],
+            "column_id": row["column"],
+            "title": row["title"],
+            "description": row["description"],
+            "position": row["position"],
+        }
+        for row in rows
+    ]
+
+
+def _current_comments(board, ids):
+    if not ids:
+        return []
+    rows = (
+        Comment.select(
+            Comment.id,
+            Comment.card,
+            Comment.user,
+            User.username,
+            Comment.content,
+            Comment.created_at,
+            Comment.updated_at,
+        )
+        .join(User)
+        .switch(Comment)
+        .join(Card)
+        .join(Column)
+        .where(
+            (Column.board == board) & Comment.id.in_(list(ids)),
+            *not_deleted(Column, Card),
+        )
+        .order_by(Comment.created_at, Comment.id)
+        .dicts()
+    )
+    return [
+        {
+            "id": row["id"],
+            "card_id": row["card"],
+            "user_id": row["user"],
+            "username": row["username"],
+            "content": row["content"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        for row in rows
+    ]
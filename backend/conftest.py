@@ -18,12 +18,24 @@ import os
 # empty database; cache=shared makes them the same one for the process.
 os.environ["DATABASE_PATH"] = "file:kanban_test?mode=memory&cache=shared"
 
+# KANBAN_TEST_DATABASE_URL runs the suite against that database instead, e.g.
+# a throwaway local postgres:
+#
+#   KANBAN_TEST_DATABASE_URL=postgresql://postgres@localhost/kanban_test pytest
+#
+# Its tables are dropped and recreated first. Any DATABASE_URL already in the
+# environment is overridden either way, so the suite can never reach a real
+# database through it.
+TEST_DATABASE_URL = os.environ.get("KANBAN_TEST_DATABASE_URL", "")
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
 # Also set before import: backend.auth resolves its signing key at import time
 # and would otherwise generate one and write it to disk. Tests get a fixed key
 # so token fixtures are reproducible and the suite leaves no files behind.
 os.environ["JWT_SECRET_KEY"] = "test-only-signing-key-not-used-anywhere-real"
 
 import pytest  # noqa: E402
+from peewee import sort_models  # noqa: E402
 import random  # noqa: E402
 import string  # noqa: E402
 
@@ -49,7 +61,7 @@ def _models():
 @pytest.fixture(scope="session")
 def _setup_test_db():
     """Session-scoped fixture to create tables once."""
-    assert _db.database.startswith("file:kanban_test"), (
+    assert TEST_DATABASE_URL or _db.database.startswith("file:kanban_test"), (
         f"tests are pointed at {_db.database!r}, not the test database. "
         "Something imported backend.database before conftest set DATABASE_PATH."
     )
@@ -57,6 +69,10 @@ def _setup_test_db():
     # Held open for the whole session: the shared-cache in-memory database is
     # discarded once the last connection to it closes.
     _db.connect()
+    if TEST_DATABASE_URL:
+        # A real server keeps its tables between runs, from whatever schema
+        # the last run had.
+        _db.drop_tables(_models())
     _db.create_tables(_models())
     yield
     _db.close()
@@ -65,13 +81,22 @@ def _setup_test_db():
 @pytest.fixture
 def db_session(_setup_test_db):
     """Per-test database fixture that clears all data between tests."""
-    # Reversed, so children go before the parents they reference. ALL_MODELS is
-    # ordered parents-first for create_tables; deletion wants the opposite.
-    for table in reversed(_models()):
+    # Children before the parents they reference, which foreign_keys=ON
+    # insists on. sort_models rather than ALL_MODELS' own order: Board comes
+    # before Team there, yet references it through shared_team.
+    for table in reversed(sort_models(_models())):
         try:
             table.delete().execute()
         except Exception:
             pass
+    # Per-process state keyed by row ids, which this test's rows will reuse.
+    from backend.keycache import verified_keys
+    from backend.keyusage import api_key_usage
+    from backend.usercache import user_cache
+
+    verified_keys.clear()
+    api_key_usage.clear()
+    user_cache.clear()
     yield _db
 
 
@@ -0,0 +1,175 @@
+"""Waking GET /api/boards/{id}/events streams when their board changes.
+
+What travels through here is only "board N changed" -- never the change
+itself. Each stream reads its own delta from the change log (backend.changes)
+starting at the last version it sent, so a stream that misses or merges
+wake-ups still sends exactly the right thing, and resuming from Last-Event-ID
+is the same code path as a live update.
+
+Every subscriber gets a bounded queue. One that stops reading -- a stalled
+client whose socket buffer is full -- fills it and is dropped rather than
+buffered for without limit. Its stream ends, the client reconnects with
+Last-Event-ID, and it catches up from the log (or, if it was gone for long
+enough, from a full snapshot).
+
+This wakes streams on the worker that handled the write, as soon as it has
+finished. Streams on other workers hear about it through backend.outbox.
+"""
+
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+EVENTS_QUEUE_SIZE = int(os.environ.get("BOARD_EVENTS_QUEUE_SIZE", "64"))
+# Comment lines sent on an idle stream, so proxies do not time it out and a
+# vanished client is noticed.
+EVENTS_KEEPALIVE_SECONDS = float(
+    os.environ.get("BOARD_EVENTS_KEEPALIVE_SECONDS", "15")
+)
+
+# Boards changed by the current request, published once it has finished -- and
+# so committed. Waking a stream any earlier could have it read the board
+# before the write lands and go back to sleep having missed it.
+_changed_boards = ContextVar("changed_boards", default=None)
+
+
+def note_board_changed(board_id):
+    """Mark `board_id` to be published when the current request finishes.
+
+    Outside a request (manage.py, tests calling helpers directly) there is no
+    one to wake on this worker, so this does nothing.
+    """
+    changed = _changed_boards.get()
+    if changed is not None:
+        changed.add(board_id)
+
+
+@contextmanager
+def collect_changed_boards():
+    token = _changed_boards.set(set())
+    try:
+        yield _changed_boards.get()
+    finally:
+        _changed_boards.reset(token)
+
+
+class Subscription:
+    """One stream's wake-up queue, bound to the event loop serving it."""
+
+    def __init__(self, board_id, loop, size):
+        self.board_id = board_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.dropped = False
+
+    async def wait(self, timeout):
+        """True when woken, False on timeout, None once dropped."""
+        try:
+            woken = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return None if woken is None else True
+
+
+class BoardEventHub:
+    def __init__(self, queue_size=EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = {}
+        # Requests may be served on the threadpool; publish() can come from
+        # any thread.
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, board_id):
+        """Start receiving wake-ups for `board_id`. Call from the event loop
+        that will read the subscription."""
+        subscription = Subscription(
+            board_id, asyncio.get_running_loop(), self.queue_size
+        )
+        with self._lock:
+            self._subscriptions.setdefault(board_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.board_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.board_id]
+
+    def subscriber_count(self, board_id=None):
+        with self._lock:
+            if board_id is not None:
+                return len(self._subscriptions.get(board_id, ()))
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, board_id):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(board_id, ()))
+            self.published += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscription in subscriptions:
+            if subscription.loop is running:
+                self._offer(subscription)
+            else:
+                subscription.loop.call_soon_threadsafe(self._offer, subscription)
+
+    def _offer(self, subscription):
+        if subscription.dropped:
+            return
+        try:
+            subscription.queue.put_nowait(True)
+        except asyncio.QueueFull:
+            # Too far behind to be worth queueing for. Replace the backlog
+            # with the signal to hang up; the client resumes from its
+            # Last-Event-ID.
+            subscription.dropped = True
+            with self._lock:
+                self.dropped += 1
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": sum(len(s) for s in self._subscriptions.values()),
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+board_events = BoardEventHub()
+
+
+async def publish_board_events(request, call_next):
+    """Middleware: wake the streams of every board the request changed.
+
+    A call run inside /api/batch leaves that to the batch: its transaction
+    may not have committed when the call returns.
+    """
+    if _changed_boards.get() is not None:
+        return await call_next(request)
+    with collect_changed_boards() as changed:
+        response = await call_next(request)
+    for board_id in changed:
+        board_events.publish(board_id)
+    return response
+
+
+def sse_message(data, event=None, event_id=None):
+    """One Server-Sent Events message; `data` is already-serialised JSON."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode()
@@ -0,0 +1,155 @@
+"""bcrypt on a dedicated pool of processes.
+
+Hashing a password or an API key is a quarter second of pure CPU. Done on
+the request threadpool, forty logins at once were forty hashes fighting over
+the cores with everything else the worker had to do. Here hashing has
+processes of its own, one per core by default: at most one hash runs per core,
+the async routes wait for it without holding a thread, and login throughput
+scales with cores rather than with one uvicorn worker's share of them.
+
+The pool is bounded. Once PASSWORD_HASH_MAX_PENDING hashes are waiting, new
+ones are refused with HashingBusy, which main.py answers with a 503, rather
+than queueing them for longer than any client would wait.
+
+Set PASSWORD_HASH_WORKERS=0 to hash in the calling thread instead (manage.py
+on a small box, say).
+
+This module is imported by the pool's worker processes, so it imports
+nothing from the rest of the app.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import bcrypt  # type: ignore
+
+HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# A hash takes ~250ms on one core, so 16 per process is a wait of about four
+# seconds at the back of the queue.
+HASH_MAX_PENDING = int(
+    os.environ.get("PASSWORD_HASH_MAX_PENDING", max(HASH_WORKERS, 1) * 16)
+)
+# How many recent hashes the latency percentiles are taken over.
+LATENCY_WINDOW = 1000
+
+
+class HashingBusy(Exception):
+    """Every slot in the hashing queue is taken; try again shortly."""
+
+
+# The work itself, at module level so the worker processes can unpickle it.
+
+
+def _hash(secret):
+    return bcrypt.hashpw(secret.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def _check(secret, hashed):
+    return bcrypt.checkpw(secret.encode("utf-8"), hashed.encode("utf-8"))
+
+
+class HashingService:
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the server forking itself would copy its
+                # threads' locks and its open SQLite connections into every
+                # worker.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusy()
+            self.pending += 1
+        started = time.perf_counter()
+
+        def finished(_):
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self._latencies.append(time.perf_counter() - started)
+
+        if self.workers > 0:
+            try:
+                future = self._pool().submit(fn, *args)
+            except BaseException:
+                finished(None)
+                raise
+        else:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+        future.add_done_callback(finished)
+        return future
+
+    def hash(self, secret):
+        """bcrypt hash of `secret`. Blocks the calling thread until done."""
+        return self._submit(_hash, secret).result()
+
+    def check(self, secret, hashed):
+        """Whether `secret` matches `hashed`. Blocks until done."""
+        return self._submit(_check, secret, hashed).result()
+
+    async def hash_async(self, secret):
+        """hash(), awaited without tying up a thread while it runs."""
+        if self.workers == 0:
+            return await asyncio.to_thread(self.hash, secret)
+        return await asyncio.wrap_future(self._submit(_hash, secret))
+
+    async def check_async(self, secret, hashed):
+        """check(), awaited without tying up a thread while it runs."""
+        if self.workers == 0:
+            return await asyncio.to_thread(self.check, secret, hashed)
+        return await asyncio.wrap_future(self._submit(_check, secret, hashed))
+
+    def stats(self):
+        """Queue depth and latency -- submission to result, queueing
+        included -- over the last LATENCY_WINDOW hashes."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "p50_ms": None,
+                "p99_ms": None,
+            }
+        if latencies:
+            stats["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            stats["p99_ms"] = round(p99 * 1000, 1)
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = HashingService()
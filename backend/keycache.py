@@ -0,0 +1,124 @@
+"""In-process cache of recently verified API keys.
+
+CI agents authenticate with the same key thousands of times a minute. Once a
+key has been found and checked, its digest maps here to what authentication
+needs -- the key's id, its user's id and its expiry -- so the next request
+with it skips the lookup altogether.
+
+Entries are dropped when the key is deactivated on this worker, and are
+otherwise trusted for at most API_KEY_CACHE_TTL_SECONDS: that is how long a
+key deactivated through another worker can go on working here. Expiry is
+checked on every hit against the expires_at cached with the entry, so an
+expiring key stops working on time everywhere.
+
+Keys that were looked up and found to be no key at all are remembered too,
+for the same TTL: a client retrying a wrong key, or one sharing its prefix
+with keys from before digests, would otherwise cost a lookup -- and a bcrypt
+per such key -- on every request. A key created in the meantime cannot be
+one of them: it is new random bytes.
+
+Per process, bounded to API_KEY_CACHE_SIZE entries of each kind, least
+recently used out first.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+API_KEY_CACHE_SIZE = int(os.environ.get("API_KEY_CACHE_SIZE", "1024"))
+API_KEY_CACHE_TTL_SECONDS = float(os.environ.get("API_KEY_CACHE_TTL_SECONDS", "30"))
+
+
+class VerifiedKeyCache:
+    """digest -> (key id, user id, expires_at), LRU and time-bounded."""
+
+    def __init__(self, size=API_KEY_CACHE_SIZE, ttl=API_KEY_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # key id -> digest, for dropping a key by id when it is deactivated.
+        self._digests = {}
+        # digest -> expiry, for digests no key has.
+        self._unknown = OrderedDict()
+        # Auth dependencies run on the threadpool.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, digest, key_id, user_id, expires_at):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._drop(digest)
+            self._entries[digest] = (
+                time.monotonic() + self.ttl,
+                (key_id, user_id, expires_at),
+            )
+            self._digests[key_id] = digest
+            while len(self._entries) > self.size:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def is_unknown(self, digest):
+        """Whether `digest` was recently looked up and matched no key."""
+        with self._lock:
+            expires = self._unknown.get(digest)
+            if expires is None or expires < time.monotonic():
+                if expires is not None:
+                    del self._unknown[digest]
+                return False
+            self._unknown.move_to_end(digest)
+            return True
+
+    def put_unknown(self, digest):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._unknown.pop(digest, None)
+            self._unknown[digest] = time.monotonic() + self.ttl
+            while len(self._unknown) > self.size:
+                self._unknown.popitem(last=False)
+
+    def discard(self, key_id):
+        """Forget a key, e.g. once it is deactivated."""
+        with self._lock:
+            digest = self._digests.get(key_id)
+            if digest is not None:
+                self._drop(digest)
+
+    def _drop(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            self._digests.pop(entry[1][0], None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._unknown.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "unknown": len(self._unknown),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+verified_keys = VerifiedKeyCache()
@@ -0,0 +1,142 @@
+"""Write-behind for ApiKey.last_used_at.
+
+Stamping the key on every request it authenticates turned each read-only GET
+from an agent into a write, queued for SQLite's one write lock behind the
+writes that matter. Uses are collected here instead, and written every
+API_KEY_USAGE_FLUSH_SECONDS in one UPDATE per batch of keys, and once more at
+shutdown.
+
+Timestamps are kept to API_KEY_USAGE_PRECISION_SECONDS -- a minute by
+default, which is all "last used" is read for. A key used again within the
+minute it was last written for is not written again at all.
+
+Per process. A worker that dies without shutting down loses at most one
+interval's stamps, and GET /api/api-keys shows this worker's unwritten ones
+over what the database holds.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+from peewee import Case
+
+from backend.models import ApiKey
+
+API_KEY_USAGE_FLUSH_SECONDS = float(
+    os.environ.get("API_KEY_USAGE_FLUSH_SECONDS", "30")
+)
+# 0 keeps full precision, and writes on every flush a key was used in.
+API_KEY_USAGE_PRECISION_SECONDS = int(
+    os.environ.get("API_KEY_USAGE_PRECISION_SECONDS", "60")
+)
+# Keys per UPDATE: two bound parameters each in the CASE, one in the IN, and
+# well under SQLite's limit of 999 on older builds.
+FLUSH_BATCH = 300
+
+
+class KeyUsageRecorder:
+    def __init__(
+        self,
+        interval=API_KEY_USAGE_FLUSH_SECONDS,
+        precision=API_KEY_USAGE_PRECISION_SECONDS,
+    ):
+        self.interval = interval
+        self.precision = precision
+        # key id -> timestamp not yet written
+        self._pending = {}
+        # key id -> the timestamp last written, so a repeat is skipped. Only
+        # stamps as new as _newest can be repeated; older ones are dropped at
+        # each flush, which keeps this to the keys used in the latest stamp.
+        self._written = {}
+        self._newest = None
+        self._lock = threading.Lock()
+        self._task = None
+        self.flushes = 0
+
+    def _stamp(self, now):
+        if self.precision <= 0:
+            return now
+        seconds = int(now.timestamp()) // self.precision * self.precision
+        return datetime.fromtimestamp(seconds, timezone.utc)
+
+    def record(self, key_id, now=None):
+        """Note that `key_id` was used just now. Writes nothing."""
+        stamp = self._stamp(now or datetime.now(timezone.utc))
+        with self._lock:
+            if self._newest is None or stamp > self._newest:
+                self._newest = stamp
+            if self._written.get(key_id) != stamp:
+                self._pending[key_id] = stamp
+
+    def pending(self, key_id):
+        """The timestamp waiting to be written for `key_id`, if any."""
+        with self._lock:
+            return self._pending.get(key_id)
+
+    def flush(self):
+        """Write every pending timestamp. Returns how many keys it wrote."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._written = {
+                key_id: stamp
+                for key_id, stamp in self._written.items()
+                if stamp >= self._newest
+            }
+        if not pending:
+            return 0
+        items = sorted(pending.items())
+        try:
+            for start in range(0, len(items), FLUSH_BATCH):
+                batch = items[start : start + FLUSH_BATCH]
+                ApiKey.update(last_used_at=Case(ApiKey.id, batch)).where(
+                    ApiKey.id.in_([key_id for key_id, _ in batch])
+                ).execute()
+        except Exception:
+            # Put them back for the next flush, under anything newer that
+            # arrived meanwhile.
+            with self._lock:
+                for key_id, stamp in pending.items():
+                    self._pending.setdefault(key_id, stamp)
+            raise
+        with self._lock:
+            self._written.update(pending)
+            self.flushes += 1
+        return len(pending)
+
+    def clear(self):
+        """Drop everything unwritten, without writing it."""
+        with self._lock:
+            self._pending.clear()
+            self._written.clear()
+            self._newest = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """Stop flushing on a timer, and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as exc:
+                # Kept for the next interval; a locked database is no reason
+                # to stop recording.
+                print(f"kanban: API key usage flush failed: {exc}", file=sys.stderr)
+
+
+api_key_usage = KeyUsageRecorder()
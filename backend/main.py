@@ -1,23 +1,47 @@
 import os
 from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 
 from backend.api import api
-from backend.auth import RENEWED_TOKEN_HEADER, renew_access_token
-from backend.database import init_db
+from backend.auth import RENEWED_TOKEN_HEADER, decoded_claims, renew_access_token
+from backend.database import db, init_db
+from backend.events import board_events, publish_board_events
+from backend.hashing import HashingBusy, password_hasher
+from backend.keyusage import api_key_usage
+from backend.outbox import OutboxTailer
+from backend.purge import purger
 
 STATIC_PATH = os.environ.get(
     "STATIC_PATH", os.path.join(os.path.dirname(__file__), "static")
 )
 
+# Threads per worker for blocking work. The API routes and auth dependencies
+# are plain `def` -- peewee and bcrypt both block -- so FastAPI runs them on
+# this pool and the event loop stays free for event streams and health
+# checks. Past this many requests at once the rest wait for a thread. 40 is
+# anyio's own default.
+THREADPOOL_SIZE = int(os.environ.get("API_THREADPOOL_SIZE", "40"))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     init_db()
+    # Wakes this worker's event streams for writes made by the others.
+    tailer = OutboxTailer(board_events)
+    tailer.start()
+    api_key_usage.start()
+    purger.start()
     yield
+    await purger.stop()
+    await tailer.stop()
+    await api_key_usage.stop()
+    password_hasher.shutdown()
+    db.close_readers()
 
 
 app = FastAPI(
@@ -45,11 +69,22 @@ app.add_middleware(
     allow_methods=["*"],
     # Without this the browser hides the renewal header from the app entirely,
     # and every session would still die at its 24h cliff.
-    expose_headers=[RENEWED_TOKEN_HEADER],
+    expose_headers=[RENEWED_TOKEN_HEADER, "X-Board-Version"],
     allow_headers=["*"],
 )
 
 
+@app.exception_handler(HashingBusy)
+async def hashing_busy(request, exc):
+    """Every hashing slot is taken: shed the request now rather than queue it
+    behind more bcrypt than the client will wait for."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.middleware("http")
 async def renew_session_token(request, call_next):
     """Hand back a fresh token when the one presented is nearing expiry.
@@ -64,12 +99,40 @@ async def renew_session_token(request, call_next):
 
     auth_header = request.headers.get("Authorization", "")
     if auth_header.startswith("Bearer "):
-        renewed = renew_access_token(auth_header[7:])
+        token = auth_header[7:]
+        # Reuses the claims the auth dependency decoded, if it ran.
+        renewed = renew_access_token(token, decoded_claims(request, token))
         if renewed:
             response.headers[RENEWED_TOKEN_HEADER] = renewed
 
     return response
 
+
+# Wakes /api/boards/{id}/events streams once a write's response is ready, by
+# which point its transaction has committed.
+app.middleware("http")(publish_board_events)
+
+
+class ConnectionPerRequest:
+    """Scope each request's database work to db.connection_per_request().
+
+    Plain ASGI rather than @app.middleware, and added last so it is
+    outermost: the connection must outlive a streamed response's body, which
+    the decorator's call_next returns before sending.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with db.connection_per_request():
+            await self.app(scope, receive, send)
+
+
+app.add_middleware(ConnectionPerRequest)
+
 if os.path.exists(STATIC_PATH):
     app.mount("/static", StaticFiles(directory=STATIC_PATH), name="static")
 
@@ -0,0 +1,50 @@
+"""Peewee migrations -- 003_board_version.
+
+Add Board.version, the counter every board write bumps. GET /api/boards/{id}
+keys its snapshot cache on it.
+
+Existing boards start at 0 like new ones. Nothing has been cached against a
+version yet, so there is no earlier value for 0 to collide with.
+
+A fresh install is a no-op: create_tables() already built the column.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def _table_exists(database, table):
+    rows = database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchall()
+    return bool(rows)
+
+
+def _columns(database, table):
+    return [row[1] for row in database.execute_sql(f"PRAGMA table_info({table})")]
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    if not _table_exists(database, "board"):
+        print("  board table does not exist yet, nothing to migrate")
+        return
+
+    if "version" in _columns(database, "board"):
+        print("  board.version already exists")
+        return
+
+    database.execute_sql(
+        "ALTER TABLE board ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+    )
+    print("  Added board.version")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Nothing to undo.
+
+    SQLite cannot drop a column without rebuilding the table, and older code
+    never selects this one, so it is left in place.
+    """
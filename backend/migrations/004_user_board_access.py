@@ -0,0 +1,71 @@
+"""Peewee migrations -- 004_user_board_access.
+
+Add user_board_access, the materialized "who can open which board" table
+behind list_boards and every board permission check, and fill it from the
+boards and team memberships already there: a board's owner, plus every
+member of the team it is shared with.
+
+Re-runnable. init_db() may already have created the (empty) table when the
+server started ahead of this migration, so the table is created only if
+missing and rows are inserted with OR IGNORE. On a fresh install there is
+nothing to backfill.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def _table_exists(database, table):
+    rows = database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchall()
+    return bool(rows)
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    for table in ("board", "teammember"):
+        if not _table_exists(database, table):
+            print(f"  {table} table does not exist yet, nothing to migrate")
+            return
+
+    if _table_exists(database, "user_board_access"):
+        print("  user_board_access already exists")
+    else:
+        # Exactly what create_tables() builds from UserBoardAccess.
+        database.execute_sql(
+            'CREATE TABLE "user_board_access" ('
+            '"user_id" INTEGER NOT NULL, "board_id" INTEGER NOT NULL, '
+            'PRIMARY KEY ("user_id", "board_id"), '
+            'FOREIGN KEY ("user_id") REFERENCES "user" ("id"), '
+            'FOREIGN KEY ("board_id") REFERENCES "board" ("id"))'
+        )
+        database.execute_sql(
+            'CREATE INDEX "userboardaccess_user_id" '
+            'ON "user_board_access" ("user_id")'
+        )
+        database.execute_sql(
+            'CREATE INDEX "userboardaccess_board_id" '
+            'ON "user_board_access" ("board_id")'
+        )
+        print("  Created user_board_access")
+
+    database.execute_sql("""
+        INSERT OR IGNORE INTO user_board_access (user_id, board_id)
+        SELECT owner_id, id FROM board
+        UNION
+        SELECT tm.user_id, b.id
+        FROM board b JOIN teammember tm ON tm.team_id = b.shared_team_id
+    """)
+    count = database.execute_sql("SELECT COUNT(*) FROM user_board_access").fetchone()
+    print(f"  user_board_access holds {count[0]} grants")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Drop the table. Nothing else reads it, and it can be rebuilt from the
+    boards and team memberships at any time by running this again."""
+    if fake:
+        return
+    database.execute_sql('DROP TABLE IF EXISTS "user_board_access"')
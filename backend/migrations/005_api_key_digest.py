@@ -0,0 +1,72 @@
+"""Peewee migrations -- 005_api_key_digest.
+
+Add ApiKey.key_digest, the SHA-256 of the key that authentication now looks
+keys up by, with the unique index that makes that one lookup, and an index on
+ApiKey.prefix.
+
+Existing keys cannot be backfilled: only the bcrypt hash of each was ever
+stored, and a digest needs the key itself. They are left with a null digest
+and keep working -- the first request that presents one is checked against
+its bcrypt hash, and records its digest for every request after it
+(ApiKey.find).
+
+Re-runnable, and a no-op on a fresh install, where create_tables() already
+built the column and both indexes.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def _table_exists(database, table):
+    rows = database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchall()
+    return bool(rows)
+
+
+def _columns(database, table):
+    return [row[1] for row in database.execute_sql(f"PRAGMA table_info({table})")]
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    if not _table_exists(database, "apikey"):
+        print("  apikey table does not exist yet, nothing to migrate")
+        return
+
+    if "key_digest" in _columns(database, "apikey"):
+        print("  apikey.key_digest already exists")
+    else:
+        database.execute_sql("ALTER TABLE apikey ADD COLUMN key_digest VARCHAR(64)")
+        print("  Added apikey.key_digest")
+
+    # Exactly what create_tables() builds from ApiKey.
+    database.execute_sql(
+        'CREATE UNIQUE INDEX IF NOT EXISTS "apikey_key_digest" '
+        'ON "apikey" ("key_digest")'
+    )
+    database.execute_sql(
+        'CREATE INDEX IF NOT EXISTS "apikey_prefix" ON "apikey" ("prefix")'
+    )
+
+    pending = database.execute_sql(
+        "SELECT COUNT(*) FROM apikey WHERE key_digest IS NULL"
+    ).fetchone()[0]
+    print(f"  {pending} existing keys will record their digest on first use")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Drop the indexes; the column stays.
+
+    SQLite cannot drop a column without rebuilding the table. Older code
+    never reads it, and still finds keys by prefix and bcrypt -- except that
+    keys already upgraded had their bcrypt hash cleared, and keys created
+    since never had one, so those have to be reissued.
+    """
+    if fake:
+        return
+    database.execute_sql('DROP INDEX IF EXISTS "apikey_key_digest"')
+    database.execute_sql('DROP INDEX IF EXISTS "apikey_prefix"')
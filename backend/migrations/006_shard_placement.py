@@ -0,0 +1,41 @@
+"""Peewee migrations -- 006_shard_placement.
+
+Add shard_placement, which records the shard each board's content lives in
+once DATABASE_SHARD_DIR turns sharding on. Empty until then: unsharded, every
+board is in the catalog, which is what no row means.
+
+Re-runnable. init_db() may already have created the table when the server
+started ahead of this migration, so it is created only if missing.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    rows = database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        ("shard_placement",),
+    ).fetchall()
+    if rows:
+        print("  shard_placement already exists")
+        return
+    # Exactly what create_tables() builds from ShardPlacement.
+    database.execute_sql(
+        'CREATE TABLE "shard_placement" ('
+        '"kind" VARCHAR(20) NOT NULL, "row_id" INTEGER NOT NULL, '
+        '"shard" INTEGER NOT NULL, PRIMARY KEY ("kind", "row_id"))'
+    )
+    print("  Created shard_placement")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Drop the table. Only do this with every board merged back into the
+    catalog (`manage.py shard-merge`), or their content can no longer be
+    found."""
+    if fake:
+        return
+    database.execute_sql('DROP TABLE IF EXISTS "shard_placement"')
@@ -0,0 +1,49 @@
+"""Peewee migrations -- 007_purge_orphans.
+
+Delete columns, cards and comments whose parent is gone. Board, column and
+user deletes once went row by row, and not all of them reached every child:
+delete_board left the comments on its cards behind, and the admin board
+delete built card deletes it never ran. Before foreign keys were enforced
+nothing stopped those rows surviving; now they are unreachable, still
+counted by `manage.py status`, and in the way of a foreign key check.
+
+Parents first, so a column whose board is gone takes its cards and their
+comments with it. Re-runnable: a second run finds nothing to delete.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+# (table, what its rows hang off, the table holding those), children last.
+ORPHANS = (
+    ("column", "board_id", "board"),
+    ("card", "column_id", "column"),
+    ("comment", "card_id", "card"),
+    ("comment", "user_id", "user"),
+)
+
+
+def _table_exists(database, table):
+    rows = database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchall()
+    return bool(rows)
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    for table, column, parent in ORPHANS:
+        if not (_table_exists(database, table) and _table_exists(database, parent)):
+            print(f"  {table} or {parent} does not exist yet, nothing to purge")
+            continue
+        cursor = database.execute_sql(
+            f'DELETE FROM "{table}" WHERE "{column}" NOT IN '
+            f'(SELECT "id" FROM "{parent}")'
+        )
+        print(f"  {table}: deleted {cursor.rowcount} rows without a {parent}")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Nothing to undo: the rows were unreachable, and are gone."""
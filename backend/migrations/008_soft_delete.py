@@ -0,0 +1,56 @@
+"""Peewee migrations -- 008_soft_delete.
+
+Add deleted_at to board, column and card. A delete now only sets it, which
+hides the row from every route at once; backend.purge removes the row for
+good once the retention window has passed. Indexed, so the purge worker
+finds the expired rows without reading the whole table.
+
+Re-runnable: each column and index is added only if missing. Existing shard
+files keep the tables they were created with, so `manage.py migrate` refuses
+to run until the shards are merged back into the catalog (`shard-merge`).
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+TABLES = ("board", "column", "card")
+
+
+def _columns(database, table):
+    return [
+        row[1] for row in database.execute_sql(f'PRAGMA table_info("{table}")')
+    ]
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    for table in TABLES:
+        columns = _columns(database, table)
+        if not columns:
+            print(f"  {table} table does not exist yet, nothing to migrate")
+            continue
+        if "deleted_at" in columns:
+            print(f"  {table}.deleted_at already exists")
+        else:
+            database.execute_sql(
+                f'ALTER TABLE "{table}" ADD COLUMN "deleted_at" DATETIME'
+            )
+            print(f"  Added {table}.deleted_at")
+        # Named as create_tables() names the index on a field.
+        database.execute_sql(
+            f'CREATE INDEX IF NOT EXISTS "{table}_deleted_at" '
+            f'ON "{table}" ("deleted_at")'
+        )
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Drop the columns. Rows still waiting for the purge reappear, as if
+    they had never been deleted."""
+    if fake:
+        return
+    for table in TABLES:
+        if "deleted_at" in _columns(database, table):
+            database.execute_sql(f'DROP INDEX IF EXISTS "{table}_deleted_at"')
+            database.execute_sql(f'ALTER TABLE "{table}" DROP COLUMN "deleted_at"')
@@ -0,0 +1,90 @@
+"""Peewee migrations -- 009_hot_path_indexes.
+
+Add the composite indexes the hottest reads are shaped around: a board's
+columns and a column's cards by position, a card's comments by age, an
+organization's invites by status and a user's verification tokens by age.
+Each replaces a lookup on the foreign key alone followed by a sort, or a
+filter on every row it found.
+
+Also make the deleted_at indexes 008 added partial, holding deleted rows
+only. With every live row's NULL in them, SQLite answered "deleted_at IS
+NULL" -- the filter on nearly every read -- by walking the whole table
+through them instead of using the index that fits the rest of the query.
+
+Re-runnable: indexes are created only if missing, and a deleted_at index is
+rebuilt only while it is not yet partial.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+# Exactly what create_tables() builds from the models' Meta.indexes.
+INDEXES = (
+    ("column_board_id_position", "column", ("board_id", "position")),
+    ("card_column_id_position", "card", ("column_id", "position")),
+    ("comment_card_id_created_at", "comment", ("card_id", "created_at")),
+    (
+        "organizationinvite_organization_id_status",
+        "organizationinvite",
+        ("organization_id", "status"),
+    ),
+    (
+        "emailverificationtoken_user_id_created_at",
+        "emailverificationtoken",
+        ("user_id", "created_at"),
+    ),
+)
+SOFT_DELETED = ("board", "column", "card")
+
+
+def _table_exists(database, table):
+    rows = database.execute_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchall()
+    return bool(rows)
+
+
+def _index_partial(database, table, name):
+    """Whether index `name` on `table` is partial; None if it is missing."""
+    for row in database.execute_sql(f'PRAGMA index_list("{table}")'):
+        if row[1] == name:
+            return bool(row[4])
+    return None
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+
+    for name, table, columns in INDEXES:
+        if not _table_exists(database, table):
+            print(f"  {table} table does not exist yet, skipping {name}")
+            continue
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        database.execute_sql(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})'
+        )
+        print(f"  {name} in place")
+
+    for table in SOFT_DELETED:
+        name = f"{table}_deleted_at"
+        if not _table_exists(database, table):
+            continue
+        if _index_partial(database, table, name):
+            print(f"  {name} already partial")
+            continue
+        database.execute_sql(f'DROP INDEX IF EXISTS "{name}"')
+        database.execute_sql(
+            f'CREATE INDEX "{name}" ON "{table}" ("deleted_at") '
+            f'WHERE ("deleted_at" IS NOT NULL)'
+        )
+        print(f"  {name} rebuilt as a partial index")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Drop the composite indexes. The deleted_at indexes stay partial,
+    which serves the purge exactly as well."""
+    if fake:
+        return
+    for name, _, _ in INDEXES:
+        database.execute_sql(f'DROP INDEX IF EXISTS "{name}"')
@@ -0,0 +1,38 @@
+"""Peewee migrations -- 010_bigint_positions.
+
+Widen column.position and card.position to 64 bits. Positions are handed out
+POSITION_GAP (65536) apart, so a 32-bit column overflows after some 32
+thousand appends to one column, or a rebalance of one that long.
+
+Postgres only: SQLite's INTEGER is 64-bit already, and a BigIntegerField is
+the same INTEGER there, so SQLite files have nothing to change.
+"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+TABLES = ("column", "card")
+
+
+def _alter(database, sql_type):
+    if not isinstance(database, pw.PostgresqlDatabase):
+        print("  SQLite integers are 64-bit already, nothing to do")
+        return
+    for table in TABLES:
+        database.execute_sql(
+            f'ALTER TABLE "{table}" ALTER COLUMN "position" TYPE {sql_type}'
+        )
+        print(f"  {table}.position is now {sql_type}")
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    if fake:
+        return
+    _alter(database, "BIGINT")
+
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Narrow the columns again; fails while any position is past 32 bits."""
+    if fake:
+        return
+    _alter(database, "INTEGER")
@@ -1,6 +1,11 @@
-import bcrypt  # type: ignore
+import hashlib
+import hmac
+import os
+
 from peewee import (
+    BigIntegerField,
     CharField,
+    CompositeKey,
     IntegerField,
     ForeignKeyField,
     DateTimeField,
@@ -10,7 +15,11 @@ from peewee import (
 from playhouse.sqlite_ext import Model  # type: ignore
 from datetime import datetime, timezone, timedelta
 
-from backend.database import db
+from backend.database import SHARD_ID_BITS, SHARD_LIMIT, db, using_shard
+from backend.hashing import password_hasher
+from backend.keycache import verified_keys
+from backend.ordering import POSITION_GAP
+from backend.usercache import user_cache
 
 
 class BaseModel(Model):
@@ -19,6 +28,12 @@ class BaseModel(Model):
 
 
 PASSWORD_MAX_LENGTH = 72
+# Keys from before digests are told apart by bcrypt alone. A key that is no
+# key at all is checked against at most this many of those sharing its
+# prefix, the most recently used first: each is a bcrypt that a client
+# making up keys can make the server spend, and a made-up key is never in
+# the cache of unknown keys.
+API_KEY_LEGACY_CHECKS = int(os.environ.get("API_KEY_LEGACY_CHECKS", "2"))
 
 
 def _as_datetime(value):
@@ -51,15 +66,19 @@ class User(BaseModel):
 
     @classmethod
     def create_user(
-        cls, username, password, email=None, admin=False, email_verified=True
+        cls,
+        username,
+        password,
+        email=None,
+        admin=False,
+        email_verified=True,
+        password_hash=None,
     ):
-        if len(password) > PASSWORD_MAX_LENGTH:
-            raise ValueError(
-                f"Password must be {PASSWORD_MAX_LENGTH} characters or fewer"
-            )
-        password_hash = bcrypt.hashpw(
-            password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        """`password_hash` -- when the caller has already hashed `password`,
+        through password_hasher.hash_async say -- skips hashing it again."""
+        check_password_length(password)
+        if password_hash is None:
+            password_hash = password_hasher.hash(password)
         return cls.create(
             username=username,
             password_hash=password_hash,
@@ -69,9 +88,25 @@ class User(BaseModel):
         )
 
     def verify_password(self, password):
-        return bcrypt.checkpw(
-            password.encode("utf-8"), self.password_hash.encode("utf-8")
-        )  # type: ignore
+        return password_hasher.check(password, self.password_hash)
+
+    # Authentication serves users from user_cache; any change to one drops
+    # this worker's cached copy.
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        user_cache.discard(self.id)
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        result = super().delete_instance(*args, **kwargs)
+        user_cache.discard(self.id)
+        return result
+
+
+def check_password_length(password):
+    """bcrypt ignores everything past 72 bytes; refuse rather than truncate."""
+    if len(password) > PASSWORD_MAX_LENGTH:
+        raise ValueError(f"Password must be {PASSWORD_MAX_LENGTH} characters or fewer")
 
 
 API_KEY_PREFIX = "kanban_"
@@ -89,8 +124,21 @@ def generate_api_key():
 
 
 def hash_api_key(key):
-    """Hash an API key for storage (like passwords)."""
-    return bcrypt.hashpw(key.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    """Hash an API key for storage (like passwords).
+
+    How keys were stored before key_digest; kept for checking those.
+    """
+    return password_hasher.hash(key)
+
+
+def digest_api_key(key):
+    """SHA-256 of an API key, hex: what ApiKey.key_digest holds.
+
+    A fast hash is enough here, unlike for passwords. A key is 192 random
+    bits, so there is no dictionary to run through a stolen digest, and an
+    indexed lookup on the digest finds the one row it belongs to.
+    """
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
 
 def get_api_key_prefix(key):
@@ -103,8 +151,16 @@ class ApiKey(BaseModel):
 
     user = ForeignKeyField(User, backref="api_keys")
     name = CharField(max_length=100)  # Friendly name (e.g., "CI Agent")
-    key_hash = CharField(max_length=255)  # bcrypt hash of the key
-    prefix = CharField(max_length=8)  # First 8 chars for identification
+    # bcrypt hash of the key, for keys created before key_digest existed;
+    # empty for newer ones. Cleared once such a key has been used and its
+    # digest recorded.
+    key_hash = CharField(max_length=255)
+    # SHA-256 of the key. Null only on old keys not yet used since it was
+    # added; authentication fills it in the first time one is.
+    key_digest = CharField(max_length=64, null=True, unique=True)
+    # First 8 chars for identification. "kanban_" plus one character, so
+    # shown in listings but never trusted to pick out a single key.
+    prefix = CharField(max_length=8, index=True)
     created_at = DateTimeField(default=datetime.now)
     last_used_at = DateTimeField(null=True)
     expires_at = DateTimeField(null=True)  # Optional expiration
@@ -114,29 +170,68 @@ class ApiKey(BaseModel):
     def create_key(cls, user, name, expires_at=None):
         """Create a new API key for a user."""
         key = generate_api_key()
-        prefix = get_api_key_prefix(key)
-        key_hash = hash_api_key(key)
         return cls.create(
             user=user,
             name=name,
-            key_hash=key_hash,
-            prefix=prefix,
+            key_hash="",
+            key_digest=digest_api_key(key),
+            prefix=get_api_key_prefix(key),
             expires_at=expires_at,
         ), key
 
+    @classmethod
+    def find(cls, key):
+        """The ApiKey row `key` belongs to, or None -- active or not.
+
+        One indexed lookup by digest. Keys from before key_digest are found
+        among those sharing the prefix by bcrypt, once: the match then has its
+        digest recorded, and the next request takes the fast path. Only the
+        API_KEY_LEGACY_CHECKS most recently used of them are tried, so an old
+        key left unused behind that many others has to be reissued.
+        """
+        digest = digest_api_key(key)
+        row = cls.get_or_none(cls.key_digest == digest)
+        if row is not None:
+            return row
+        legacy = (
+            cls.select()
+            .where((cls.prefix == get_api_key_prefix(key)) & cls.key_digest.is_null())
+            .order_by(cls.last_used_at.desc(nulls="LAST"), cls.id.desc())
+            .limit(API_KEY_LEGACY_CHECKS)
+        )
+        for row in legacy:
+            if password_hasher.check(key, row.key_hash):
+                cls.update(key_digest=digest, key_hash="").where(
+                    cls.id == row.id
+                ).execute()
+                row.key_digest, row.key_hash = digest, ""
+                return row
+        return None
+
     def verify(self, key):
-        """Verify an API key against the stored hash."""
-        return bcrypt.checkpw(key.encode("utf-8"), self.key_hash.encode("utf-8"))
+        """Verify an API key against the stored digest (or, for a key from
+        before digests, its bcrypt hash)."""
+        if self.key_digest is not None:
+            return hmac.compare_digest(digest_api_key(key), self.key_digest)
+        return password_hasher.check(key, self.key_hash)
 
     def deactivate(self):
         """Deactivate this API key."""
         self.is_active = False
         self.save()
+        verified_keys.discard(self.id)
 
     def update_last_used(self):
         """Update the last used timestamp."""
-        self.last_used_at = datetime.now(timezone.utc)
-        self.save()
+        self.last_used_at = type(self).mark_used(self.id)
+
+    @classmethod
+    def mark_used(cls, key_id):
+        """Stamp last_used_at on a key known only by id, as one served from
+        the verified-key cache is. Touches no other column."""
+        now = datetime.now(timezone.utc)
+        cls.update(last_used_at=now).where(cls.id == key_id).execute()
+        return now
 
 
 class Organization(BaseModel):
@@ -181,6 +276,19 @@ class TeamMember(BaseModel):
     class Meta:  # type: ignore
         indexes = ((("user", "team"), True),)
 
+    # Joining or leaving a team changes who can see the boards shared with it.
+    # Bulk TeamMember.delete() queries bypass these; callers of those refresh
+    # UserBoardAccess themselves.
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        UserBoardAccess.refresh_team(self.team_id)
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        result = super().delete_instance(*args, **kwargs)
+        UserBoardAccess.refresh_team(self.team_id)
+        return result
+
 
 class Board(BaseModel):
     owner = ForeignKeyField(User, backref="boards")
@@ -188,6 +296,38 @@ class Board(BaseModel):
     shared_team = ForeignKeyField(Team, null=True, backref="boards")
     is_public_to_org = BooleanField(default=False)
     created_at = DateTimeField()
+    # Bumped by every write that changes what GET /api/boards/{id} returns, so
+    # "has this board changed?" is one integer comparison. See
+    # backend.changes.record_changes.
+    version = IntegerField(default=0)
+    # Set by a delete, which hides the board at once; backend.purge removes
+    # it for good once DELETED_RETENTION_HOURS have passed, and until then it
+    # can be restored. Indexed by index_deleted.
+    deleted_at = DateTimeField(null=True)
+
+    class Meta:  # type: ignore
+        # save() otherwise writes every column, version included -- and the
+        # version it read may have been bumped by another request since,
+        # which would roll that bump back and let two states share a number.
+        only_save_dirty = True
+
+    def save(self, *args, **kwargs):
+        # Owner and shared team are what UserBoardAccess is derived from.
+        creating = self._pk is None or kwargs.get("force_insert", False)
+        dirty = {field.name for field in self.dirty_fields}
+        result = super().save(*args, **kwargs)
+        if creating or dirty & {"owner", "shared_team"}:
+            UserBoardAccess.refresh([self.id])
+        if creating and db.shard_directory:
+            ShardPlacement.place_board(self)
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        # Before the board goes: SQLite may hand its id to the next board, which
+        # must not inherit these grants, nor its shard.
+        UserBoardAccess.delete().where(UserBoardAccess.board == self.id).execute()
+        ShardPlacement.forget_boards([self.id])
+        return super().delete_instance(*args, **kwargs)
 
     @classmethod
     def create_with_columns(
@@ -203,22 +343,117 @@ class Board(BaseModel):
             is_public_to_org=is_public_to_org,
             created_at=datetime.now(timezone.utc),
         )
-        for i, col_name in enumerate(column_names):
-            Column.create(board=board, name=col_name, position=i)
+        shard = ShardPlacement.shard_of("board", board.id)
+        if not shard:
+            for i, col_name in enumerate(column_names):
+                Column.create(board=board, name=col_name, position=i * POSITION_GAP)
+            return board
+
+        # Once the board is committed: a request never writes a shard inside
+        # a catalog transaction, or the other way round, so it never holds
+        # two files' write locks at once.
+        def add_columns():
+            with using_shard(shard), db.atomic():
+                for i, col_name in enumerate(column_names):
+                    Column.create(
+                        board=board, name=col_name, position=i * POSITION_GAP
+                    )
+
+        db.after_commit(add_columns)
         return board
 
 
+def index_deleted(model):
+    """Index `model`'s deleted rows, for the purge.
+
+    Partial: a plain index holds the NULL of every live row too, and SQLite
+    would then answer "deleted_at IS NULL" -- every live row -- through it,
+    rather than through the index that fits the rest of the query.
+    """
+    model.add_index(model.deleted_at, where=model.deleted_at.is_null(False))
+
+
+def not_deleted(*models):
+    """Conditions keeping only the rows of `models` -- Board, Column, Card --
+    that have not been deleted, for .where(*not_deleted(...))."""
+    return [model.deleted_at.is_null() for model in models]
+
+
+class UserBoardAccess(BaseModel):
+    """Who can open which board, kept up to date as boards are shared and team
+    memberships change.
+
+    A user can access a board they own or one shared with a team they belong
+    to. Both list_boards and every permission check used to work that out from
+    boards, teams and memberships on each request; with this table the first is
+    one indexed query and the second a primary-key lookup.
+    """
+
+    user = ForeignKeyField(User, backref="board_access")
+    board = ForeignKeyField(Board, backref="access")
+
+    class Meta:  # type: ignore
+        table_name = "user_board_access"
+        primary_key = CompositeKey("user", "board")
+
+    @classmethod
+    def refresh(cls, boards):
+        """Rebuild the rows for `boards`: a list of ids or a subquery."""
+        cls.delete().where(cls.board.in_(boards)).execute()
+        owners = Board.select(Board.owner, Board.id).where(Board.id.in_(boards))
+        members = (
+            TeamMember.select(TeamMember.user, Board.id)
+            .join(Board, on=(Board.shared_team == TeamMember.team))
+            .where(Board.id.in_(boards))
+        )
+        cls.insert_from(owners | members, [cls.user, cls.board]).execute()
+
+    @classmethod
+    def refresh_team(cls, team):
+        cls.refresh(Board.select(Board.id).where(Board.shared_team == team))
+
+
 class Column(BaseModel):
     board = ForeignKeyField(Board, backref="columns")
     name = CharField(max_length=200)
-    position = IntegerField()
+    # 64-bit: positions are handed out POSITION_GAP apart (backend.ordering),
+    # which a 32-bit column runs out of after some 32 thousand appends.
+    position = BigIntegerField()
+    deleted_at = DateTimeField(null=True)  # as Board.deleted_at
+
+    class Meta:  # type: ignore
+        # A board's columns in order, with no sort.
+        indexes = ((("board", "position"), False),)
+
+    @classmethod
+    def delete_with_cards(cls, columns):
+        """Delete `columns` -- a list of ids or a subquery -- with their cards
+        and comments. Three statements, however many rows that is."""
+        Card.delete_with_comments(Card.select(Card.id).where(Card.column.in_(columns)))
+        cls.delete().where(cls.id.in_(columns)).execute()
 
 
 class Card(BaseModel):
     column = ForeignKeyField(Column, backref="cards")
     title = CharField(max_length=500)
     description = TextField(null=True)
-    position = IntegerField()
+    position = BigIntegerField()  # as Column.position
+    deleted_at = DateTimeField(null=True)  # as Board.deleted_at
+
+    class Meta:  # type: ignore
+        # A column's cards in order, and so a board's, column by column.
+        indexes = ((("column", "position"), False),)
+
+    @classmethod
+    def delete_with_comments(cls, cards):
+        """Delete `cards` -- a list of ids or a subquery -- and their comments,
+        in two statements. Comments first: foreign keys are enforced."""
+        Comment.delete().where(Comment.card.in_(cards)).execute()
+        cls.delete().where(cls.id.in_(cards)).execute()
+
+
+for model in (Board, Column, Card):
+    index_deleted(model)
 
 
 class Comment(BaseModel):
@@ -228,6 +463,10 @@ class Comment(BaseModel):
     created_at = DateTimeField()
     updated_at = DateTimeField(null=True)
 
+    class Meta:  # type: ignore
+        # A card's comments, oldest first.
+        indexes = ((("card", "created_at"), False),)
+
     @classmethod
     def create_comment(cls, card, user, content):
         return cls.create(
@@ -235,6 +474,112 @@ class Comment(BaseModel):
         )
 
 
+class ShardPlacement(BaseModel):
+    """Which shard a board's columns, cards and comments live in, when
+    DATABASE_SHARD_DIR turns sharding on (see backend.shards).
+
+    Every board outside the catalog has a "board" row. A column, card or
+    comment is found from its id -- a shard hands out ids from its own offset
+    up -- and needs a row of its own only where that would say otherwise: rows
+    `manage.py shard-split` moved out of the catalog keep the ids they had.
+    """
+
+    kind = CharField(max_length=20)  # board, column, card, comment
+    row_id = IntegerField()
+    shard = IntegerField()
+
+    class Meta:  # type: ignore
+        table_name = "shard_placement"
+        primary_key = CompositeKey("kind", "row_id")
+
+    @classmethod
+    def shard_of(cls, kind, row_id):
+        """The shard holding `kind` `row_id`; 0, the catalog, with sharding off."""
+        if not db.shard_directory:
+            return 0
+        shard = (
+            cls.select(cls.shard)
+            .where((cls.kind == kind) & (cls.row_id == row_id))
+            .scalar()
+        )
+        if shard is not None:
+            return shard
+        return 0 if kind == "board" else row_id >> SHARD_ID_BITS
+
+    @classmethod
+    def home_shard(cls, board):
+        """Where `board` belongs: with the organization of the team it is
+        shared with, else of its owner's first membership, else the catalog.
+        The catalog too for an organization numbered past SHARD_LIMIT, whose
+        shard's ids would not survive a trip through JSON.parse."""
+        if board.shared_team_id is not None:
+            organization = (
+                Team.select(Team.organization)
+                .where(Team.id == board.shared_team_id)
+                .scalar()
+            )
+        else:
+            organization = (
+                OrganizationMember.select(OrganizationMember.organization)
+                .where(OrganizationMember.user == board.owner_id)
+                .order_by(OrganizationMember.id)
+                .limit(1)
+                .scalar()
+            )
+        if not organization or organization >= SHARD_LIMIT:
+            return 0
+        return organization
+
+    @classmethod
+    def place_board(cls, board, shard=None):
+        """Record `board` as living in `shard` (its home shard by default)."""
+        if shard is None:
+            shard = cls.home_shard(board)
+        if shard:
+            cls.insert(kind="board", row_id=board.id, shard=shard).on_conflict(
+                "replace"
+            ).execute()
+        else:
+            cls.forget_boards([board.id])
+        return shard
+
+    @classmethod
+    def forget_boards(cls, boards):
+        """Drop the placements of `boards`: a list of ids or a subquery."""
+        cls.delete().where((cls.kind == "board") & cls.row_id.in_(boards)).execute()
+
+
+class BoardChange(BaseModel):
+    """One object touched by one board version: the log behind
+    GET /api/boards/{id}/changes.
+
+    Deliberately holds no copy of the data, only what changed. A delta reads
+    the objects as they stand now, which is what the client wants anyway, and
+    keeps the log small enough to retain a useful window of history.
+    """
+
+    board = ForeignKeyField(Board, backref="changes")
+    version = IntegerField()
+    kind = CharField(max_length=20)  # board, column, card, comment
+    object_id = IntegerField()
+    op = CharField(max_length=10)  # upsert, delete
+    created_at = DateTimeField()
+
+    class Meta:  # type: ignore
+        indexes = ((("board", "version"), False),)
+
+
+class BoardEvent(BaseModel):
+    """Outbox of "board N changed", tailed by every worker (backend.outbox).
+
+    A plain board id rather than a foreign key: the row announcing a board's
+    deletion has to outlive the board.
+    """
+
+    board_id = IntegerField()
+    created_at = DateTimeField(index=True)
+
+
 class BetaSignup(BaseModel):
     email = CharField(max_length=255, unique=True)
     created_at = DateTimeField()
@@ -267,6 +612,10 @@ class OrganizationInvite(BaseModel):
     created_at = DateTimeField()
     expires_at = DateTimeField()
 
+    class Meta:  # type: ignore
+        # An organization's pending invites.
+        indexes = ((("organization", "status"), False),)
+
     @classmethod
     def create_invite(cls, organization, created_by, email=None, expires_in_days=7):
         """Create a new invite token."""
@@ -322,6 +671,10 @@ class EmailVerificationToken(BaseModel):
     expires_at = DateTimeField()
     used_at = DateTimeField(null=True)
 
+    class Meta:  # type: ignore
+        # A user's latest token, for the resend cooldown.
+        indexes = ((("user", "created_at"), False),)
+
     @classmethod
     def create_for(cls, user):
         """Issue a fresh token for a user. Returns (record, token)."""
@@ -356,9 +709,12 @@ class EmailVerificationToken(BaseModel):
 ALL_MODELS = [
     User,
     Board,
+    UserBoardAccess,
     Column,
     Card,
     Comment,
+    BoardChange,
+    BoardEvent,
     Organization,
     OrganizationMember,
     Team,
@@ -367,4 +723,5 @@ ALL_MODELS = [
     ApiKey,
     OrganizationInvite,
     EmailVerificationToken,
+    ShardPlacement,
 ]
@@ -0,0 +1,152 @@
+"""Positions with room between them, so a move writes one row.
+
+Cards and columns are ordered by (position, id). A client dragging a card
+into the middle of a column used to renumber the column and send every
+sibling back through /reorder: n writes for a one-card move. Instead the
+server picks a position strictly between the two neighbours, and only the
+moved row changes -- a fractional index, kept in the integer `position`
+every client already reads and sorts by.
+
+Positions handed out here are POSITION_GAP apart, which leaves room for
+about sixteen moves into the same slot. When two neighbours end up on
+adjacent (or equal) positions there is no room left; the siblings are then
+respaced in one statement and the move carries on. That is the only time a
+move writes more than its own row, and it buys the next run of one-row
+moves. Positions are 64-bit, so appending, rebalancing a long column or
+moving rows ahead of the first one again and again never runs them out of
+range.
+"""
+
+from peewee import fn
+
+POSITION_GAP = 1 << 16
+
+
+def _ordered(model):
+    return (model.position, model.id)
+
+
+def _siblings(parent_field, parent_id, moving_id):
+    model = parent_field.model
+    return model.select(model.id, model.position).where(
+        (parent_field == parent_id)
+        & (model.id != moving_id)
+        & model.deleted_at.is_null()
+    )
+
+
+def _next(parent_field, parent_id, moving_id, row):
+    """The sibling right after `row`, or None."""
+    model = parent_field.model
+    return (
+        _siblings(parent_field, parent_id, moving_id)
+        .where(
+            (model.position > row.position)
+            | ((model.position == row.position) & (model.id > row.id))
+        )
+        .order_by(*_ordered(model))
+        .first()
+    )
+
+
+def _previous(parent_field, parent_id, moving_id, row):
+    """The sibling right before `row`, or None."""
+    model = parent_field.model
+    return (
+        _siblings(parent_field, parent_id, moving_id)
+        .where(
+            (model.position < row.position)
+            | ((model.position == row.position) & (model.id < row.id))
+        )
+        .order_by(model.position.desc(), model.id.desc())
+        .first()
+    )
+
+
+def _bounds(parent_field, parent_id, moving_id, after_id, before_id):
+    """(low, high): the positions the move has to land strictly between,
+    None for an open end."""
+    model = parent_field.model
+    siblings = _siblings(parent_field, parent_id, moving_id)
+    after = before = None
+    if after_id is not None:
+        after = siblings.where(model.id == after_id).first()
+    if before_id is not None:
+        before = siblings.where(model.id == before_id).first()
+    if after_id is not None and after is None:
+        raise ValueError(f"{after_id} is not a sibling of {moving_id}")
+    if before_id is not None and before is None:
+        raise ValueError(f"{before_id} is not a sibling of {moving_id}")
+
+    if after is not None and before is not None:
+        if (after.position, after.id) >= (before.position, before.id):
+            raise ValueError(f"{after_id} does not come before {before_id}")
+        return after.position, before.position
+    if after is not None:
+        following = _next(parent_field, parent_id, moving_id, after)
+        return after.position, following.position if following else None
+    if before is not None:
+        preceding = _previous(parent_field, parent_id, moving_id, before)
+        return preceding.position if preceding else None, before.position
+    return siblings.select(fn.MAX(model.position)).scalar(), None
+
+
+def rebalance(parent_field, parent_id):
+    """Respace every row under `parent_id` POSITION_GAP apart, order kept.
+
+    One UPDATE. Deleted rows are respaced with the rest, so a restore puts
+    one back where it was.
+    """
+    model = parent_field.model
+    ranked = (
+        model.select(
+            model.id,
+            fn.ROW_NUMBER().over(order_by=list(_ordered(model))).alias("n"),
+        )
+        .where(parent_field == parent_id)
+        .alias("ranked")
+    )
+    model.update(position=ranked.c.n * POSITION_GAP).from_(ranked).where(
+        model.id == ranked.c.id
+    ).execute()
+
+
+def place(parent_field, parent_id, moving_id, after_id=None, before_id=None):
+    """The position putting row `moving_id` under `parent_id` right after
+    sibling `after_id` and/or right before sibling `before_id`; with neither,
+    at the end.
+
+    Returns (position, rebalanced). When the neighbours leave no room the
+    siblings are respaced first and `rebalanced` is True: every one of them
+    has a new position the caller should log. Raises ValueError when a
+    sibling named is not one, or `after_id` does not come before `before_id`.
+    """
+    rebalanced = False
+    while True:
+        low, high = _bounds(parent_field, parent_id, moving_id, after_id, before_id)
+        if low is None and high is None:
+            return 0, rebalanced
+        if high is None:
+            return low + POSITION_GAP, rebalanced
+        if low is None:
+            return high - POSITION_GAP, rebalanced
+        if high - low > 1:
+            return (low + high) // 2, rebalanced
+        if rebalanced:
+            # Respacing always leaves room; anything else is a bug, not a
+            # reason to loop.
+            raise RuntimeError("no room between siblings after a rebalance")
+        rebalance(parent_field, parent_id)
+        rebalanced = True
+
+
+def moved(parent_field, parent_id, row_id, rebalanced):
+    """Ids of the rows whose position a place() for `row_id` changed: the
+    row itself, or after a rebalance every row still under `parent_id`."""
+    if not rebalanced:
+        return [row_id]
+    model = parent_field.model
+    rows = model.select(model.id).where(
+        (parent_field == parent_id) & model.deleted_at.is_null()
+    )
+    return [pk for (pk,) in rows.tuples()]
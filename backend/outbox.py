@@ -0,0 +1,159 @@
+"""Fanning board changes out to every uvicorn worker, through the database.
+
+backend.events wakes streams on the worker that handled a write, and nowhere
+else. Under `uvicorn --workers N` a client's stream is on one worker and its
+teammate's writes land on any of them, so each write also leaves a row in
+the BoardEvent outbox -- in its own transaction, so the row exists exactly
+when the write does -- and every worker tails that table, waking its local
+streams for each board it sees.
+
+No broker, no sockets between processes: the database they already share is
+the channel. Delivery to another worker takes at most one poll interval plus
+a query. A worker also sees its own writes come back through the outbox,
+which costs its streams one wake-up that finds nothing new to send.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from peewee import fn
+
+from backend.models import BoardEvent
+
+# How often each worker checks for writes made by the others. 0 disables the
+# tailer, for single-worker deployments that do not need it.
+OUTBOX_POLL_SECONDS = float(os.environ.get("BOARD_OUTBOX_POLL_SECONDS", "0.25"))
+# Rows only have to outlive the slowest worker's next poll. Minutes is ample.
+OUTBOX_RETENTION_SECONDS = float(
+    os.environ.get("BOARD_OUTBOX_RETENTION_SECONDS", "300")
+)
+# Polls between prunes.
+OUTBOX_PRUNE_EVERY = 240
+OUTBOX_BATCH = 1000
+# Postgres hands out an id when a row is inserted, but a reader only sees the
+# row once its transaction commits, so a write that commits late shows up
+# below ids already read. Each poll reads this many ids back again, and counts
+# the rows among them it had not seen before.
+OUTBOX_LOOKBACK_IDS = int(os.environ.get("BOARD_OUTBOX_LOOKBACK_IDS", "1000"))
+
+
+def announce(board_ids):
+    """Queue "these boards changed" for every worker. Call inside the write's
+    transaction."""
+    now = datetime.now(timezone.utc)
+    rows = [{"board_id": board_id, "created_at": now} for board_id in board_ids]
+    if rows:
+        BoardEvent.insert_many(rows).execute()
+
+
+def latest_event_id():
+    return BoardEvent.select(fn.MAX(BoardEvent.id)).scalar() or 0
+
+
+def read_events(after_id, limit=OUTBOX_BATCH, seen=None):
+    """(last id read, set of board ids, whether more remain) for the outbox
+    rows past `after_id`.
+
+    With `seen`, the set of ids read so far, the OUTBOX_LOOKBACK_IDS ids up
+    to `after_id` are read again and any row among them not in `seen` counts
+    too. `seen` is updated in place, and trimmed to the window.
+    """
+    events = BoardEvent.select(BoardEvent.id, BoardEvent.board_id)
+    late = []
+    if seen is not None:
+        window = events.where(
+            (BoardEvent.id > after_id - OUTBOX_LOOKBACK_IDS)
+            & (BoardEvent.id <= after_id)
+        )
+        late = [row for row in window.tuples() if row[0] not in seen]
+    rows = list(
+        events.where(BoardEvent.id > after_id)
+        .order_by(BoardEvent.id)
+        .limit(limit)
+        .tuples()
+    )
+    last_id = rows[-1][0] if rows else after_id
+    if seen is not None:
+        seen.update(event_id for event_id, _ in late + rows)
+        floor = last_id - OUTBOX_LOOKBACK_IDS
+        seen.difference_update([event_id for event_id in seen if event_id <= floor])
+    board_ids = {board_id for _, board_id in late + rows}
+    return last_id, board_ids, len(rows) == limit
+
+
+def prune_events(retention=None):
+    """Delete rows every worker has long since read.
+
+    The newest row always stays: SQLite hands out max(id) + 1, so emptying the
+    table would restart ids below every tailer's position and they would skip
+    the next writes.
+    """
+    if retention is None:
+        retention = OUTBOX_RETENTION_SECONDS
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention)
+    newest = latest_event_id()
+    return (
+        BoardEvent.delete()
+        .where((BoardEvent.created_at < cutoff) & (BoardEvent.id < newest))
+        .execute()
+    )
+
+
+class OutboxTailer:
+    """Polls the outbox and publishes every board it finds to `hub`."""
+
+    def __init__(self, hub, interval=None):
+        self.hub = hub
+        self.interval = OUTBOX_POLL_SECONDS if interval is None else interval
+        self.last_id = None
+        self.seen = set()
+        self._task = None
+
+    def skip_to_latest(self):
+        """Count every row written so far as read."""
+        self.last_id = latest_event_id()
+        read_events(self.last_id, seen=self.seen)
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        # Start from now: streams opened on this worker catch up on anything
+        # older from the change log themselves. Every read is off the event
+        # loop, so a writer holding the database lock stalls this task rather
+        # than every request on the worker.
+        await asyncio.to_thread(self.skip_to_latest)
+        polls = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+                polls += 1
+                if polls % OUTBOX_PRUNE_EVERY == 0:
+                    await asyncio.to_thread(prune_events)
+            except Exception as exc:
+                # A locked or briefly unavailable database must not kill fan-out
+                # for the life of the worker; the next poll tries again.
+                print(f"kanban: board outbox poll failed: {exc}", file=sys.stderr)
+
+    async def poll(self):
+        """Publish every board written to since the last poll."""
+        more = True
+        while more:
+            self.last_id, board_ids, more = await asyncio.to_thread(
+                read_events, self.last_id, seen=self.seen
+            )
+            for board_id in board_ids:
+                self.hub.publish(board_id)
@@ -0,0 +1,137 @@
+"""Removes deleted boards, columns and cards for good, a batch at a time.
+
+Deleting a big board or column used to delete every row on it there and
+then, holding SQLite's one write lock -- and every other writer -- for the
+whole time. A delete now only sets deleted_at, which hides the row and all
+it holds from every route at once; the rows stay, restorable, for
+DELETED_RETENTION_HOURS. After that this worker deletes them: at most
+PURGE_BATCH_SIZE rows per transaction, with PURGE_PAUSE_SECONDS between
+transactions for the writes queued behind each.
+
+Cards first, then columns, then boards, so nothing is ever deleted out from
+under a row that still points at it; and each shard before the catalog,
+which holds the boards. Every worker runs one, every PURGE_INTERVAL_SECONDS;
+two purging at once only find less to do.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.database import db, using_shard
+from backend.models import (
+    Board,
+    BoardChange,
+    Card,
+    Column,
+    ShardPlacement,
+    UserBoardAccess,
+)
+from backend.shards import all_shards, settle_owed
+
+DELETED_RETENTION_HOURS = float(os.environ.get("DELETED_RETENTION_HOURS", "72"))
+PURGE_INTERVAL_SECONDS = float(os.environ.get("PURGE_INTERVAL_SECONDS", "300"))
+PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "500"))
+PURGE_PAUSE_SECONDS = float(os.environ.get("PURGE_PAUSE_SECONDS", "0.1"))
+
+
+def retention_cutoff(hours=None):
+    """Rows deleted before this are purged, and can no longer be restored."""
+    if hours is None:
+        hours = DELETED_RETENTION_HOURS
+    return datetime.now(timezone.utc) - timedelta(hours=hours)
+
+
+def _drop_boards(ids):
+    """Delete boards whose content is already gone, with what hangs off them
+    in the catalog."""
+    BoardChange.delete().where(BoardChange.board.in_(ids)).execute()
+    UserBoardAccess.delete().where(UserBoardAccess.board.in_(ids)).execute()
+    ShardPlacement.forget_boards(ids)
+    Board.delete().where(Board.id.in_(ids)).execute()
+
+
+class Purger:
+    def __init__(
+        self,
+        interval=PURGE_INTERVAL_SECONDS,
+        batch_size=PURGE_BATCH_SIZE,
+        pause=PURGE_PAUSE_SECONDS,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task = None
+        self._stopping = threading.Event()
+
+    def _drain(self, query, delete):
+        """Pass `delete` the ids `query` selects, a batch per transaction,
+        until it selects none. Returns how many it passed."""
+        total = 0
+        while True:
+            if self._stopping.is_set():
+                return total
+            ids = [row_id for (row_id,) in query.limit(self.batch_size).tuples()]
+            if not ids:
+                return total
+            with db.atomic():
+                delete(ids)
+            total += len(ids)
+            time.sleep(self.pause)
+
+    def purge(self, cutoff=None):
+        """Delete everything deleted before `cutoff` -- by default, the end of
+        the retention window. Returns {"boards"|"columns"|"cards": count}."""
+        if cutoff is None:
+            cutoff = retention_cutoff()
+        boards = Board.select(Board.id).where(Board.deleted_at < cutoff)
+        counts = {"boards": 0, "columns": 0, "cards": 0}
+        # Each side of every OR has an index of its own -- deleted_at, or the
+        # foreign key -- so no batch reads more than it deletes.
+        columns = Column.select(Column.id).where(
+            (Column.deleted_at < cutoff) | Column.board.in_(boards)
+        )
+        # Deleted cards, and every card on a deleted column or board.
+        cards = Card.select(Card.id).where(
+            (Card.deleted_at < cutoff) | Card.column.in_(columns)
+        )
+        for shard in all_shards():
+            with using_shard(shard):
+                counts["cards"] += self._drain(cards, Card.delete_with_comments)
+                counts["columns"] += self._drain(columns, Column.delete_with_cards)
+        counts["boards"] = self._drain(boards, _drop_boards)
+        return counts
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """Stop purging; a purge under way stops at its next batch."""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            # Catalog work left owed by a shard write (shards.on_catalog);
+            # reports its own failures.
+            await asyncio.to_thread(settle_owed)
+            try:
+                await asyncio.to_thread(self.purge)
+            except Exception as exc:
+                # Whatever is left is found again next interval.
+                print(f"kanban: purge of deleted rows failed: {exc}", file=sys.stderr)
+
+
+purger = Purger()
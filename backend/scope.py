@@ -0,0 +1,102 @@
+"""Per-request identity map and memo, attached to the FastAPI request.
+
+A card route used to fetch the card, then its column, then its board, and
+then fetch them all over again on the way to a second permission check. A
+reorder re-ran that chain once for every item. With a RequestScope a row is
+loaded at most once per request, however many places ask for it, and a
+question like "may this user modify this board?" is answered once.
+
+Only for the life of one request: nothing here is ever stale for longer than
+that, and nothing is shared between users.
+
+FastAPI runs dependencies and plain `def` handlers on a threadpool, so one
+request can touch its scope from more than one thread; every access goes
+through a lock.
+"""
+
+import threading
+
+from fastapi import Request
+
+_create_lock = threading.Lock()
+
+
+class RequestScope:
+    def __init__(self):
+        self._rows = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, model, pk, query=None):
+        """The `model` row with primary key `pk`, or None.
+
+        `query` -- a select with joins, say -- is used on a miss; every row it
+        brings along through those joins is remembered as well.
+        """
+        key = (model, pk)
+        with self._lock:
+            if key in self._rows:
+                self.hits += 1
+                return self._rows[key]
+        if query is None:
+            query = model.select()
+        row = query.where(model._meta.primary_key == pk).first()
+        self.remember(row)
+        with self._lock:
+            self._rows.setdefault(key, row)
+            return self._rows[key]
+
+    def get_many(self, model, pks, query=None):
+        """{pk: row} for every `pk` that exists, in one query for the misses."""
+        found = {}
+        missing = []
+        with self._lock:
+            for pk in pks:
+                if (model, pk) in self._rows:
+                    self.hits += 1
+                    found[pk] = self._rows[(model, pk)]
+                else:
+                    missing.append(pk)
+        if missing:
+            if query is None:
+                query = model.select()
+            for row in query.where(model._meta.primary_key.in_(missing)):
+                self.remember(row)
+                found[row._pk] = row
+        return {pk: found[pk] for pk in pks if found.get(pk) is not None}
+
+    def remember(self, row):
+        """Add `row`, and any related rows already loaded onto it, to the map."""
+        if row is None:
+            return
+        with self._lock:
+            self._remember(row)
+
+    def _remember(self, row):
+        self._rows.setdefault((type(row), row._pk), row)
+        # Rows joined in by the query that loaded this one.
+        for name in row.__rel__:
+            self._remember(row.__rel__[name])
+
+    def memo(self, key, compute):
+        """compute(), once per `key` per request."""
+        with self._lock:
+            if key in self._memo:
+                self.hits += 1
+                return self._memo[key]
+        value = compute()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+
+def request_scope(request: Request) -> RequestScope:
+    """The RequestScope for `request`, created on first use. Also usable as a
+    dependency: `scope: RequestScope = Depends(request_scope)`."""
+    scope = getattr(request.state, "scope", None)
+    if scope is None:
+        with _create_lock:
+            scope = getattr(request.state, "scope", None)
+            if scope is None:
+                scope = request.state.scope = RequestScope()
+    return scope
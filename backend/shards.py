@@ -0,0 +1,248 @@
+"""Per-organization shards: which database a board's content lives in.
+
+Every tenant used to share one SQLite file, so one organization's bulk import
+held the single write lock while everyone else's writes queued behind it.
+With DATABASE_SHARD_DIR set, each organization's columns, cards and comments
+live in a file of their own, and only that organization waits on it. The
+catalog -- DATABASE_PATH -- keeps everything else: users, auth, memberships,
+boards, access and the change log.
+
+Every shard connection has the catalog attached read-only, so a query joining
+cards to boards or comments to users runs there unchanged. What a route has to
+do is pick the shard before it touches content: route_to_board for a board
+id, route_to_row for a column, card or comment id. A write then runs in a
+transaction on the shard, and its catalog side -- the board's version and
+change log, via record_changes -- in a short catalog transaction right after
+the shard's commits (on_catalog).
+
+Off, all of this routes to the catalog without a query.
+"""
+
+import glob
+import os
+import sys
+import threading
+
+from peewee import chunked
+
+from backend.database import (
+    SHARD_ID_BITS,
+    current_shard,
+    db,
+    route_to_shard,
+    using_shard,
+)
+from backend.models import Board, Card, Column, Comment, ShardPlacement
+
+# Moved per statement by split and merge.
+MOVE_BATCH_SIZE = 500
+
+# Catalog work whose shard has committed but which failed itself, oldest
+# first; see on_catalog. Per process.
+_owed = []
+_owed_lock = threading.Lock()
+
+
+def enabled():
+    return bool(db.shard_directory)
+
+
+def route_to_board(board_id):
+    """Send the rest of this route's queries to `board_id`'s shard."""
+    shard = ShardPlacement.shard_of("board", board_id)
+    if enabled():
+        route_to_shard(shard)
+    return shard
+
+
+def route_to_row(kind, row_id):
+    """Send the rest of this route's queries to the shard holding a column,
+    card or comment."""
+    shard = ShardPlacement.shard_of(kind, row_id)
+    if enabled():
+        route_to_shard(shard)
+    return shard
+
+
+def on_catalog(work):
+    """Run `work` -- writes to catalog tables -- where it belongs.
+
+    On the catalog, that is now, in whatever transaction is open. On a shard,
+    whose connection sees the catalog read-only, it is in a catalog
+    transaction of its own once the shard's commits: never the other way
+    round, so a reader can never find a board version newer than its content.
+
+    Between the two commits the content is new and the version old. If the
+    catalog's then fails, the shard's still stands, and so does the write's
+    response: the work is owed instead, and retried before the next catalog
+    work this worker does and on every purge (settle_owed). Until then,
+    snapshots, ETags, /changes and event streams go on showing the board as
+    it was -- and a crash loses what is owed, until the board's next write.
+    """
+    shard = current_shard()
+    if not shard:
+        return work()
+    db.after_commit(lambda: settle_owed(work))
+
+
+def settle_owed(work=None):
+    """Apply the catalog work owed, then `work`; owe whatever fails."""
+    with _owed_lock:
+        pending = _owed[:] + ([work] if work is not None else [])
+        _owed.clear()
+    for n, item in enumerate(pending):
+        try:
+            with using_shard(0), db.atomic():
+                item()
+        except Exception as exc:
+            print(
+                f"kanban: catalog update after a shard write failed, "
+                f"will retry: {exc!r}",
+                file=sys.stderr,
+            )
+            # Ahead of anything owed since: each bumps a version in order.
+            with _owed_lock:
+                _owed[:0] = pending[n:]
+            return
+
+
+def all_shards():
+    """0, the catalog, then every shard a board lives in."""
+    if not enabled():
+        return [0]
+    shards = (
+        ShardPlacement.select(ShardPlacement.shard)
+        .where(ShardPlacement.kind == "board")
+        .distinct()
+        .order_by(ShardPlacement.shard)
+        .tuples()
+    )
+    return [0] + [shard for (shard,) in shards]
+
+
+def delete_board_content(boards):
+    """Delete every column, card and comment on `boards` -- a list of ids or
+    a subquery -- from the current database."""
+    Column.delete_with_cards(Column.select(Column.id).where(Column.board.in_(boards)))
+
+
+def delete_user_content(user):
+    """From the current database, what goes with `user` beyond their own
+    rows: their comments, and everything on the boards they own."""
+    Comment.delete().where(Comment.user == user).execute()
+    delete_board_content(Board.select(Board.id).where(Board.owner == user))
+
+
+def _content(board_id):
+    """{model: rows} of everything on `board_id` in the current database."""
+    return {
+        Column: list(Column.select().where(Column.board == board_id).dicts()),
+        Card: list(
+            Card.select(Card).join(Column).where(Column.board == board_id).dicts()
+        ),
+        Comment: list(
+            Comment.select(Comment)
+            .join(Card)
+            .join(Column)
+            .where(Column.board == board_id)
+            .dicts()
+        ),
+    }
+
+
+def _above(content, target):
+    """Ids in `content` above shard `target`'s range. SQLite hands out ids
+    past the largest in a table, so one of these would send `target`'s next
+    ids into another shard's range."""
+    ceiling = (target + 1) << SHARD_ID_BITS
+    return [
+        row["id"]
+        for rows in content.values()
+        for row in rows
+        if row["id"] >= ceiling
+    ]
+
+
+def _move_board(board_id, source, target):
+    """Move `board_id`'s content from shard `source` to `target`, ids kept.
+
+    Copied, then re-placed, then deleted: stopped part way, the content is
+    in both files and the catalog still points at one of them.
+    """
+    with using_shard(source):
+        content = _content(board_id)
+    with using_shard(target), db.atomic():
+        for model, rows in content.items():
+            for batch in chunked(rows, MOVE_BATCH_SIZE):
+                model.insert_many(batch).execute()
+    kinds = {Column: "column", Card: "card", Comment: "comment"}
+    with db.atomic():
+        for model, rows in content.items():
+            ids = [row["id"] for row in rows]
+            for batch in chunked(ids, MOVE_BATCH_SIZE):
+                ShardPlacement.delete().where(
+                    (ShardPlacement.kind == kinds[model])
+                    & ShardPlacement.row_id.in_(batch)
+                ).execute()
+            # Only rows whose id names another shard need telling apart.
+            placements = [
+                {"kind": kinds[model], "row_id": row_id, "shard": target}
+                for row_id in ids
+                if row_id >> SHARD_ID_BITS != target
+            ]
+            for batch in chunked(placements, MOVE_BATCH_SIZE):
+                ShardPlacement.insert_many(batch).execute()
+        ShardPlacement.place_board(Board(id=board_id), target)
+    with using_shard(source), db.atomic():
+        delete_board_content([board_id])
+    return sum(len(rows) for rows in content.values())
+
+
+def split():
+    """Move every board in the catalog to its home shard.
+
+    Offline, like any bulk move: stop the server first. Returns
+    [(board_id, shard, rows moved)]; boards already in a shard, and those
+    whose home is the catalog, are left where they are.
+    """
+    plan = []
+    for board in Board.select().order_by(Board.id):
+        if ShardPlacement.shard_of("board", board.id):
+            continue
+        target = ShardPlacement.home_shard(board)
+        if not target:
+            continue
+        above = _above(_content(board.id), target)
+        if above:
+            raise ValueError(
+                f"board {board.id} holds ids merged back from a higher shard "
+                f"(e.g. {above[0]}); it cannot move to shard {target}"
+            )
+        plan.append((board.id, target))
+    return [
+        (board_id, target, _move_board(board_id, 0, target))
+        for board_id, target in plan
+    ]
+
+
+def merge():
+    """Move every board's content back into the catalog and delete the
+    emptied shard files. Offline, as split is. Returns
+    [(board_id, shard, rows moved)]."""
+    moved = []
+    for shard in all_shards()[1:]:
+        boards = (
+            ShardPlacement.select(ShardPlacement.row_id)
+            .where(
+                (ShardPlacement.kind == "board") & (ShardPlacement.shard == shard)
+            )
+            .order_by(ShardPlacement.row_id)
+            .tuples()
+        )
+        for (board_id,) in list(boards):
+            moved.append((board_id, shard, _move_board(board_id, shard, 0)))
+    ShardPlacement.delete().execute()
+    db.close_shards()
+    for path in glob.glob(os.path.join(db.shard_directory, "org_*.db*")):
+        os.remove(path)
+    return moved
@@ -0,0 +1,107 @@
+"""In-process cache of rendered GET /api/boards/{id} bodies.
+
+The frontend and agents poll boards constantly, and almost every poll finds
+nothing changed. Entries are keyed on the board's version, which every write
+bumps (backend.changes.record_changes), so an entry can never go stale --
+a write simply makes the next read miss. Superseded versions of a board are
+dropped as soon as a newer one is stored, and the whole cache is capped in
+bytes, evicting least-recently-used bodies first.
+
+Per process. Under several uvicorn workers each keeps its own copy, which is
+still correct: the version lives in the database, so every worker misses on
+the same writes.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Rendered bodies, not objects: a hit is then a memcpy into the response
+# rather than a re-validation and re-serialisation of the whole tree.
+BOARD_CACHE_MAX_BYTES = int(
+    os.environ.get("BOARD_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+
+
+def snapshot_key(board):
+    """Cache key for a board row as it stands.
+
+    created_at rides along with (id, version) because SQLite hands a deleted
+    board's id to the next board created when it held the highest one. The
+    newcomer starts back at version 0, and without a third component it would
+    be served the old board's body -- by another worker, which never saw the
+    delete, if not by this one.
+    """
+    return (board.id, board.version, str(board.created_at))
+
+
+class BoardSnapshotCache:
+    """A byte-bounded LRU of serialised board bodies."""
+
+    def __init__(self, max_bytes=BOARD_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        # board id -> its one live key. Storing a version drops the previous
+        # one, so there is never more than one per board.
+        self._keys_by_board = {}
+        self._size = 0
+        # Handlers may run on the threadpool, so every touch of the dict and
+        # the counters happens under this.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard_board(key[0])
+            self._entries[key] = body
+            self._keys_by_board[key[0]] = key
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                del self._keys_by_board[evicted_key[0]]
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def discard(self, board_id):
+        """Forget every cached version of a board, e.g. once it is deleted."""
+        with self._lock:
+            self._discard_board(board_id)
+
+    def _discard_board(self, board_id):
+        key = self._keys_by_board.pop(board_id, None)
+        if key is not None:
+            self._size -= len(self._entries.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_board.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+board_snapshots = BoardSnapshotCache()
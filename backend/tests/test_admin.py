@@ -638,9 +638,14 @@ def test_delete_board_admin(client, admin_token, admin_user):
     )
     assert response.status_code == 200
 
-    # Verify it's deleted
+    # Verify it's deleted: hidden at once, the rows left to the purge
     from backend.models import Board
-    assert Board.get_or_none(Board.id == board_id) is None
+    assert Board.get_by_id(board_id).deleted_at is not None
+    response = client.get(
+        "/api/admin/boards",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert board_id not in [board["id"] for board in response.json()]
 
 
 # Admin team member management tests
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from playhouse.test_utils import count_queries
 
 import sys
 import os
@@ -9,16 +10,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.main import app
 from backend.database import db
+from backend.purge import Purger, retention_cutoff
 from backend.models import (
     User,
     Board,
     Column,
     Card,
+    Comment,
     Organization,
     OrganizationMember,
     Team,
     TeamMember,
 )
+from backend.ordering import POSITION_GAP
 
 
 @pytest.fixture
@@ -268,6 +272,69 @@ def test_delete_board(client, auth_headers, test_user):
     assert response.status_code == 404
 
 
+def _filled_board(owner, cards_per_column):
+    board = Board.create_with_columns(owner=owner, name="Full")
+    for column in board.columns:
+        Card.insert_many(
+            [
+                {"column": column, "title": f"card {n}", "position": n}
+                for n in range(cards_per_column)
+            ]
+        ).execute()
+    for card in Card.select().join(Column).where(Column.board == board):
+        Comment.create_comment(card, owner, "note")
+    return board
+
+
+def _delete_queries(client, auth_headers, path):
+    with count_queries() as counter:
+        response = client.delete(path, headers=auth_headers)
+    assert response.status_code == 200
+    return counter.count
+
+
+def test_deleting_a_board_is_the_same_work_however_big(
+    client, auth_headers, test_user
+):
+    small = _filled_board(test_user, cards_per_column=1)
+    large = _filled_board(test_user, cards_per_column=40)
+    # Authenticated once beforehand, so both measurements find it cached.
+    client.get("/api/boards", headers=auth_headers)
+
+    small_count = _delete_queries(client, auth_headers, f"/api/boards/{small.id}")
+    large_count = _delete_queries(client, auth_headers, f"/api/boards/{large.id}")
+
+    assert large_count == small_count
+    # The rows go later, in the purge's batches.
+    assert Card.select().count() == 123
+    Purger(batch_size=25, pause=0).purge(retention_cutoff(0))
+    assert Column.select().count() == Card.select().count() == 0
+    assert Comment.select().count() == 0
+
+
+def test_deleting_a_column_is_the_same_work_however_big(
+    client, auth_headers, test_user
+):
+    board = _filled_board(test_user, cards_per_column=1)
+    small, large = board.columns[0], board.columns[1]
+    Card.insert_many(
+        [{"column": large, "title": f"more {n}", "position": n} for n in range(40)]
+    ).execute()
+    client.get("/api/boards", headers=auth_headers)
+
+    small_count = _delete_queries(client, auth_headers, f"/api/columns/{small.id}")
+    large_count = _delete_queries(client, auth_headers, f"/api/columns/{large.id}")
+
+    assert large_count == small_count
+    body = client.get(f"/api/boards/{board.id}", headers=auth_headers).json()
+    assert [column["id"] for column in body["columns"]] == [board.columns[2].id]
+    # Each card still gets its tombstone for clients polling /changes.
+    delta = client.get(
+        f"/api/boards/{board.id}/changes", params={"since": 1}, headers=auth_headers
+    ).json()
+    assert len(delta["deleted"]["cards"]) == 41
+
+
 def test_reorder_cards(client, auth_headers, test_user):
     """Test reordering cards within a column"""
     # Create board (gets default columns: To Do, In Progress, For Review)
@@ -466,7 +533,7 @@ def test_create_column_without_position_appends(client, auth_headers, test_user)
     existing = client.get(f"/api/boards/{board_id}", headers=auth_headers).json()[
         "columns"
     ]
-    end = max(c["position"] for c in existing) + 1
+    end = max(c["position"] for c in existing) + POSITION_GAP
 
     first = client.post(
         "/api/columns",
@@ -481,20 +548,20 @@ def test_create_column_without_position_appends(client, auth_headers, test_user)
         json={"board_id": board_id, "name": "Second"},
         headers=auth_headers,
     )
-    assert second.json()["position"] == end + 1
+    assert second.json()["position"] == end + POSITION_GAP
 
 
 def test_create_column_appends_after_the_highest_position(
     client, auth_headers, test_user
 ):
-    """Append means one past the highest position, not one past the count --
+    """Append means a gap past the highest position, not past the count --
     positions need not be contiguous."""
     board_id = client.post(
         "/api/boards", json={"name": "Sparse Board"}, headers=auth_headers
     ).json()["id"]
     client.post(
         "/api/columns",
-        json={"board_id": board_id, "name": "Far", "position": 9},
+        json={"board_id": board_id, "name": "Far", "position": 1_000_000},
         headers=auth_headers,
     )
 
@@ -503,7 +570,33 @@ def test_create_column_appends_after_the_highest_position(
         json={"board_id": board_id, "name": "After"},
         headers=auth_headers,
     )
-    assert appended.json()["position"] == 10
+    assert appended.json()["position"] == 1_000_000 + POSITION_GAP
+
+
+def test_create_column_appends_after_the_highest_live_position(
+    client, auth_headers, test_user
+):
+    """As for cards: a deleted column does not push the next one along."""
+    board_id = client.post(
+        "/api/boards", json={"name": "Pruned Board"}, headers=auth_headers
+    ).json()["id"]
+    far = client.post(
+        "/api/columns",
+        json={"board_id": board_id, "name": "Far", "position": 1_000_000},
+        headers=auth_headers,
+    ).json()
+    client.delete(f"/api/columns/{far['id']}", headers=auth_headers)
+    live = client.get(f"/api/boards/{board_id}", headers=auth_headers).json()[
+        "columns"
+    ]
+
+    appended = client.post(
+        "/api/columns",
+        json={"board_id": board_id, "name": "After"},
+        headers=auth_headers,
+    )
+    end = max(c["position"] for c in live)
+    assert appended.json()["position"] == end + POSITION_GAP
 
 
 def test_create_column_with_explicit_position_is_unchanged(
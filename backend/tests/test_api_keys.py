@@ -259,3 +259,236 @@ class TestApiKeyAuthentication:
         """Test that requests without auth return 401"""
         response = client.get("/api/boards")
         assert response.status_code == 401
+
+
+def _store_key(user, key, legacy=False):
+    """An ApiKey row for a key chosen by the test. `legacy` stores it the
+    way keys were before digests: a bcrypt hash and no digest."""
+    from backend.models import digest_api_key, get_api_key_prefix, hash_api_key
+
+    return ApiKey.create(
+        user=user,
+        name="Chosen",
+        key_hash=hash_api_key(key) if legacy else "",
+        key_digest=None if legacy else digest_api_key(key),
+        prefix=get_api_key_prefix(key),
+    )
+
+
+class TestApiKeyLookup:
+    """Keys are found by digest, not by their barely-distinguishing prefix."""
+
+    def test_keys_sharing_a_prefix_each_find_their_own_user(self, client, test_user):
+        other = User.create_user("prefix_twin", "pw")
+        _store_key(test_user, "kanban_A" + "1" * 31)
+        _store_key(other, "kanban_A" + "2" * 31)
+
+        for key, user in (("1", test_user), ("2", other)):
+            response = client.get(
+                "/api/api-keys", headers={"X-API-Key": "kanban_A" + key * 31}
+            )
+            assert response.status_code == 200
+            # Listed: the key's own user's keys, so it authenticated as them.
+            [listed] = response.json()
+            assert listed["id"] == ApiKey.get(ApiKey.user == user).id
+
+    def test_a_legacy_key_is_upgraded_on_first_use(self, client, test_user):
+        other = User.create_user("legacy_twin", "pw")
+        _store_key(other, "kanban_B" + "1" * 31, legacy=True)
+        row = _store_key(test_user, "kanban_B" + "2" * 31, legacy=True)
+
+        response = client.get(
+            "/api/boards", headers={"X-API-Key": "kanban_B" + "2" * 31}
+        )
+
+        assert response.status_code == 200
+        row = ApiKey.get_by_id(row.id)
+        assert row.key_digest is not None and row.key_hash == ""
+        assert ApiKey.get(ApiKey.user == other).key_digest is None
+
+    def test_a_wrong_key_is_looked_up_once(self, client, test_user):
+        from playhouse.test_utils import count_queries
+
+        wrong = {"X-API-Key": "kanban_C" + "9" * 31}
+        assert client.get("/api/boards", headers=wrong).status_code == 401
+
+        with count_queries() as queries:
+            response = client.get("/api/boards", headers=wrong)
+
+        assert response.status_code == 401
+        assert not any('FROM "apikey"' in q.msg[0] for q in queries.get_queries())
+
+    def test_a_wrong_key_is_checked_against_few_legacy_keys(
+        self, client, test_user, monkeypatch
+    ):
+        from backend.hashing import password_hasher
+
+        for n in range(4):
+            _store_key(test_user, "kanban_D" + str(n) * 31, legacy=True)
+        checked = []
+        check = password_hasher.check
+
+        def counted(secret, hashed):
+            checked.append(hashed)
+            return check(secret, hashed)
+
+        monkeypatch.setattr(password_hasher, "check", counted)
+        response = client.get(
+            "/api/boards", headers={"X-API-Key": "kanban_D" + "9" * 31}
+        )
+
+        assert response.status_code == 401
+        assert len(checked) <= 2
+
+    def test_a_repeat_request_skips_the_key_lookup(self, client, test_user):
+        from playhouse.test_utils import count_queries
+
+        _, raw_key = ApiKey.create_key(test_user, "Cached")
+        client.get("/api/boards", headers={"X-API-Key": raw_key})
+
+        with count_queries() as queries:
+            response = client.get("/api/boards", headers={"X-API-Key": raw_key})
+
+        assert response.status_code == 200
+        lookups = [
+            q
+            for q in queries.get_queries()
+            if q.msg[0].startswith("SELECT") and 'FROM "apikey"' in q.msg[0]
+        ]
+        assert lookups == []
+
+    def test_deactivating_a_cached_key_takes_effect_at_once(
+        self, client, test_user, auth_headers
+    ):
+        api_key, raw_key = ApiKey.create_key(test_user, "Revoked")
+        response = client.get("/api/boards", headers={"X-API-Key": raw_key})
+        assert response.status_code == 200
+
+        client.delete(f"/api/api-keys/{api_key.id}", headers=auth_headers)
+
+        response = client.get("/api/boards", headers={"X-API-Key": raw_key})
+        assert response.status_code == 401
+
+    def test_a_cached_key_still_expires_on_time(self, client, test_user):
+        from datetime import datetime, timedelta, timezone
+        import time
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=1)
+        _, raw_key = ApiKey.create_key(test_user, "Brief", expires_at=expires_at)
+        response = client.get("/api/boards", headers={"X-API-Key": raw_key})
+        assert response.status_code == 200
+
+        time.sleep(1.1)
+
+        response = client.get("/api/boards", headers={"X-API-Key": raw_key})
+        assert response.status_code == 401
+        assert response.json()["detail"] == "API key has expired"
+
+    def test_the_migration_adds_the_digest_to_an_old_table(self, tmp_path):
+        import importlib.util
+
+        from peewee import SqliteDatabase
+
+        path = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            "migrations",
+            "005_api_key_digest.py",
+        )
+        spec = importlib.util.spec_from_file_location("migration_005", path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        old = SqliteDatabase(str(tmp_path / "old.db"))
+        old.execute_sql(
+            'CREATE TABLE "apikey" ("id" INTEGER NOT NULL PRIMARY KEY, '
+            '"key_hash" VARCHAR(255) NOT NULL, "prefix" VARCHAR(8) NOT NULL)'
+        )
+
+        migration.migrate(None, old)
+        migration.migrate(None, old)
+
+        columns = [row[1] for row in old.execute_sql("PRAGMA table_info(apikey)")]
+        indexes = {row[1] for row in old.execute_sql("PRAGMA index_list(apikey)")}
+        assert "key_digest" in columns
+        assert {"apikey_key_digest", "apikey_prefix"} <= indexes
+
+
+class TestApiKeyUsage:
+    """last_used_at is written behind, in batches, at a set precision."""
+
+    def test_an_authenticated_read_writes_nothing(self, client, test_user):
+        from playhouse.test_utils import count_queries
+
+        _, raw_key = ApiKey.create_key(test_user, "Reader")
+
+        with count_queries() as queries:
+            response = client.get("/api/boards", headers={"X-API-Key": raw_key})
+
+        assert response.status_code == 200
+        assert not [q for q in queries.get_queries() if "UPDATE" in q.msg[0]]
+
+    def test_one_update_stamps_every_key(self, test_user):
+        from datetime import datetime, timezone
+
+        from playhouse.test_utils import count_queries
+
+        from backend.keyusage import KeyUsageRecorder
+
+        keys = [ApiKey.create_key(test_user, f"Key {n}")[0] for n in range(5)]
+        usage = KeyUsageRecorder(precision=60)
+        now = datetime(2026, 3, 1, 12, 34, 56, tzinfo=timezone.utc)
+        for key in keys:
+            usage.record(key.id, now=now)
+
+        with count_queries() as queries:
+            assert usage.flush() == 5
+
+        assert queries.count == 1
+        for key in keys:
+            stamp = ApiKey.get_by_id(key.id).last_used_at
+            assert str(stamp).startswith("2026-03-01 12:34:00")
+
+    def test_a_use_within_the_same_minute_is_not_written_again(self, test_user):
+        from datetime import datetime, timedelta, timezone
+
+        from backend.keyusage import KeyUsageRecorder
+
+        key, _ = ApiKey.create_key(test_user, "Busy")
+        usage = KeyUsageRecorder(precision=60)
+        now = datetime(2026, 3, 1, 12, 34, 0, tzinfo=timezone.utc)
+        usage.record(key.id, now=now)
+        usage.flush()
+
+        usage.record(key.id, now=now + timedelta(seconds=30))
+        assert usage.flush() == 0
+        usage.record(key.id, now=now + timedelta(seconds=60))
+        assert usage.flush() == 1
+
+    def test_only_keys_used_in_the_latest_minute_are_remembered(self, test_user):
+        from datetime import datetime, timedelta, timezone
+
+        from backend.keyusage import KeyUsageRecorder
+
+        keys = [ApiKey.create_key(test_user, f"Key {n}")[0] for n in range(3)]
+        usage = KeyUsageRecorder(precision=60)
+        now = datetime(2026, 3, 1, 12, 34, 0, tzinfo=timezone.utc)
+        for key in keys:
+            usage.record(key.id, now=now)
+        usage.flush()
+
+        usage.record(keys[0].id, now=now + timedelta(minutes=5))
+        usage.flush()
+
+        assert list(usage._written) == [keys[0].id]
+
+    def test_the_listing_shows_an_unwritten_use(self, client, test_user, auth_headers):
+        from backend.keyusage import api_key_usage
+
+        api_key, raw_key = ApiKey.create_key(test_user, "Listed")
+        client.get("/api/boards", headers={"X-API-Key": raw_key})
+        assert ApiKey.get_by_id(api_key.id).last_used_at is None
+
+        listed = client.get("/api/api-keys", headers=auth_headers).json()
+        assert listed[0]["last_used_at"] is not None
+
+        api_key_usage.flush()
+        assert ApiKey.get_by_id(api_key.id).last_used_at is not None
@@ -0,0 +1,107 @@
+"""Authentication on the hot path: each bearer token decoded once per request,
+and users served from user_cache once warm."""
+
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+import backend.auth
+from backend.auth import (
+    RENEWED_TOKEN_HEADER,
+    TOKEN_RENEWAL_WINDOW_MINUTES,
+    create_access_token,
+)
+from backend.main import app
+from backend.models import ApiKey, User
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user, **kwargs):
+    token = create_access_token(
+        data={"sub": user.id, "username": user.username}, **kwargs
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_a_warm_bearer_request_authenticates_without_queries(client, test_user):
+    headers = _headers(test_user)
+    client.get("/api/admin/status", headers=headers)
+
+    with count_queries() as queries:
+        response = client.get("/api/admin/status", headers=headers)
+
+    assert response.status_code == 200
+    assert queries.count == 0
+
+
+def test_a_warm_api_key_request_authenticates_without_queries(client, test_user):
+    _, raw_key = ApiKey.create_key(test_user, "Hot path")
+    client.get("/api/admin/status", headers={"X-API-Key": raw_key})
+
+    with count_queries() as queries:
+        response = client.get("/api/admin/status", headers={"X-API-Key": raw_key})
+
+    assert response.status_code == 200
+    assert queries.count == 0
+
+
+def test_a_renewed_token_is_decoded_once(client, test_user, monkeypatch):
+    decodes = []
+    decode = backend.auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decodes.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(backend.auth.jwt, "decode", counting_decode)
+    # Inside the renewal window, so the middleware needs the claims too.
+    remaining = timedelta(minutes=TOKEN_RENEWAL_WINDOW_MINUTES - 1)
+    headers = _headers(test_user, expires_delta=remaining)
+
+    response = client.get("/api/admin/status", headers=headers)
+
+    assert response.status_code == 200
+    assert RENEWED_TOKEN_HEADER in response.headers
+    assert len(decodes) == 1
+
+
+def test_an_admin_demotion_takes_effect_at_once(client, test_user):
+    admin = User.create_user("cache_admin", "pw", admin=True)
+    demoted = User.create_user("cache_demoted", "pw", admin=True)
+    response = client.get("/api/admin/users", headers=_headers(demoted))
+    assert response.status_code == 200
+
+    response = client.put(
+        f"/api/admin/users/{demoted.id}",
+        json={"username": demoted.username, "admin": False},
+        headers=_headers(admin),
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/admin/users", headers=_headers(demoted))
+    assert response.status_code == 403
+
+
+def test_a_deleted_user_is_not_served_from_the_cache(client, test_user):
+    admin = User.create_user("cache_deleter", "pw", admin=True)
+    headers = _headers(test_user)
+    assert client.get("/api/boards", headers=headers).status_code == 200
+
+    client.delete(f"/api/admin/users/{test_user.id}", headers=_headers(admin))
+
+    assert client.get("/api/boards", headers=headers).status_code == 401
+
+
+def test_a_cached_user_is_a_copy(test_user):
+    from backend.auth import load_user
+
+    first = load_user(test_user.id)
+    first.username = "changed in one request"
+
+    assert load_user(test_user.id).username == test_user.username
@@ -0,0 +1,195 @@
+"""POST /api/batch: many calls in one round trip, run in order through the
+app in-process, optionally in one transaction."""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from backend.auth import create_access_token
+from backend.batch import BATCH_MAX_CALLS
+from backend.main import app
+from backend.models import Board, Card
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def headers(test_user):
+    token = create_access_token(
+        data={"sub": test_user.id, "username": test_user.username}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    return Board.create_with_columns(owner=test_user, name="Batched")
+
+
+def _batch(client, headers, calls, **options):
+    response = client.post(
+        "/api/batch", json={"calls": calls, **options}, headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_calls_run_in_order_and_see_each_other(client, headers, board):
+    column = board.columns[0]
+
+    body = _batch(
+        client,
+        headers,
+        [
+            {"method": "GET", "path": "/api/boards"},
+            {
+                "method": "POST",
+                "path": "/api/cards",
+                "body": {"column_id": column.id, "title": "Batched card"},
+            },
+            {"method": "GET", "path": f"/api/boards/{board.id}"},
+            {"method": "GET", "path": f"/api/boards/{board.id}/changes?since=0"},
+        ],
+    )
+
+    boards, created, loaded, changes = body["responses"]
+    assert [r["status"] for r in body["responses"]] == [200, 200, 200, 200]
+    assert [b["id"] for b in boards["body"]] == [board.id]
+    card_id = created["body"]["id"]
+    assert [c["id"] for c in loaded["body"]["columns"][0]["cards"]] == [card_id]
+    assert card_id in [c["id"] for c in changes["body"]["cards"]]
+
+
+def test_the_token_is_decoded_once(client, headers, board):
+    calls = [{"method": "GET", "path": f"/api/boards/{board.id}"}] * 5
+
+    with patch("backend.auth.jwt.decode", wraps=jwt.decode) as decode:
+        _batch(client, headers, calls)
+
+    assert decode.call_count == 1
+
+
+def test_a_failing_call_does_not_stop_the_others(client, headers, board):
+    body = _batch(
+        client,
+        headers,
+        [
+            {"method": "GET", "path": "/api/boards/999999"},
+            {"method": "POST", "path": "/api/cards", "body": {"title": "no column"}},
+            {"method": "GET", "path": f"/api/boards/{board.id}"},
+        ],
+    )
+
+    assert [r["status"] for r in body["responses"]] == [404, 422, 200]
+    assert body["rolled_back"] is False
+
+
+def test_an_atomic_batch_rolls_back_on_the_first_failure(client, headers, board):
+    column = board.columns[0]
+
+    body = _batch(
+        client,
+        headers,
+        [
+            {
+                "method": "POST",
+                "path": "/api/cards",
+                "body": {"column_id": column.id, "title": "Undone"},
+            },
+            {"method": "DELETE", "path": "/api/cards/999999"},
+            {"method": "GET", "path": f"/api/boards/{board.id}"},
+        ],
+        atomic=True,
+    )
+
+    assert [r["status"] for r in body["responses"]] == [200, 404, 424]
+    assert body["rolled_back"] is True
+    assert Card.select().where(Card.column == column).count() == 0
+    loaded = client.get(f"/api/boards/{board.id}", headers=headers).json()
+    assert loaded["columns"][0]["cards"] == []
+
+
+def test_an_atomic_batch_commits_when_every_call_succeeds(client, headers, board):
+    column = board.columns[0]
+    version = Board.get_by_id(board.id).version
+
+    body = _batch(
+        client,
+        headers,
+        [
+            {
+                "method": "POST",
+                "path": "/api/cards",
+                "body": {"column_id": column.id, "title": title},
+            }
+            for title in ("one", "two")
+        ],
+        atomic=True,
+    )
+
+    assert body["rolled_back"] is False
+    assert [card.title for card in column.cards.order_by(Card.position)] == [
+        "one",
+        "two",
+    ]
+    assert Board.get_by_id(board.id).version == version + 2
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        {"method": "POST", "path": "/api/batch", "body": {"calls": []}},
+        {"method": "GET", "path": "/api/boards/1/events"},
+        {"method": "GET", "path": "/docs/index.md"},
+        {"method": "TRACE", "path": "/api/boards"},
+    ],
+)
+def test_calls_that_cannot_be_batched_are_refused(client, headers, call):
+    (response,) = _batch(client, headers, [call])["responses"]
+    assert response["status"] == 400
+
+
+def test_a_batch_needs_authentication(client):
+    response = client.post(
+        "/api/batch", json={"calls": [{"method": "GET", "path": "/api/boards"}]}
+    )
+    assert response.status_code == 401
+
+
+def test_too_many_calls_are_refused(client, headers):
+    calls = [{"method": "GET", "path": "/api/boards"}] * (BATCH_MAX_CALLS + 1)
+    response = client.post("/api/batch", json={"calls": calls}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_a_rolled_back_batch_leaves_no_snapshot_behind(client, headers, board):
+    """Read inside the batch, the renamed board is at a version the rollback
+    then frees for the next commit to reach with other content."""
+    url = f"/api/boards/{board.id}"
+
+    body = _batch(
+        client,
+        headers,
+        [
+            {"method": "POST", "path": url, "body": {"name": "RolledBack"}},
+            {"method": "GET", "path": url},
+            {"method": "GET", "path": "/api/boards/999999"},
+        ],
+        atomic=True,
+    )
+    assert [r["status"] for r in body["responses"]] == [200, 200, 404]
+    assert body["responses"][1]["body"]["name"] == "RolledBack"
+    assert body["rolled_back"] is True
+
+    client.post(url, json={"name": "Committed"}, headers=headers)
+    response = client.get(url, headers=headers)
+
+    assert response.json()["name"] == "Committed"
+    assert response.headers["X-Board-Version"] == str(
+        Board.get_by_id(board.id).version
+    )
@@ -0,0 +1,207 @@
+"""UserBoardAccess: the materialized "who can open which board" table.
+
+It replaces working access out from boards, teams and memberships on every
+request, so what matters is that it never disagrees with them. Each test
+changes one of its inputs through the API and checks both the table and the
+endpoints that read it.
+"""
+
+import importlib.util
+import os
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.api import can_access_board
+from backend.auth import create_access_token
+from backend.main import app
+from backend.purge import Purger, retention_cutoff
+from backend.models import (
+    Board,
+    Organization,
+    OrganizationMember,
+    Team,
+    TeamMember,
+    User,
+    UserBoardAccess,
+)
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def org(test_user):
+    org = Organization.create_with_columns("Access Org", "access-org", test_user)
+    OrganizationMember.create(user=test_user, organization=org, joined_at=_now())
+    return org
+
+
+@pytest.fixture
+def member(org):
+    user = User.create_user("access_member", "pw")
+    OrganizationMember.create(user=user, organization=org, joined_at=_now())
+    return user
+
+
+@pytest.fixture
+def team(org, test_user, member):
+    team = Team.create_with_columns("Access Team", org)
+    TeamMember.create(user=test_user, team=team, joined_at=_now())
+    TeamMember.create(user=member, team=team, joined_at=_now())
+    return team
+
+
+@pytest.fixture
+def shared_board(client, test_user, team):
+    board = Board.create_with_columns(owner=test_user, name="Shared")
+    client.post(
+        f"/api/boards/{board.id}/share",
+        json={"team_id": team.id},
+        headers=_headers(test_user),
+    )
+    return board
+
+
+def _grants(board):
+    return {
+        row.user_id
+        for row in UserBoardAccess.select().where(UserBoardAccess.board == board)
+    }
+
+
+def _listed(client, user):
+    response = client.get("/api/boards", headers=_headers(user))
+    return [b["id"] for b in response.json()]
+
+
+def test_a_new_board_is_granted_to_its_owner(client, test_user):
+    response = client.post(
+        "/api/boards", json={"name": "Mine"}, headers=_headers(test_user)
+    )
+
+    assert _grants(response.json()["id"]) == {test_user.id}
+
+
+def test_sharing_grants_the_team_and_unsharing_revokes(
+    client, test_user, member, shared_board
+):
+    assert _grants(shared_board) == {test_user.id, member.id}
+    assert _listed(client, member) == [shared_board.id]
+
+    client.post(
+        f"/api/boards/{shared_board.id}/share",
+        json={"team_id": None},
+        headers=_headers(test_user),
+    )
+
+    assert _grants(shared_board) == {test_user.id}
+    assert _listed(client, member) == []
+    response = client.get(f"/api/boards/{shared_board.id}", headers=_headers(member))
+    assert response.status_code == 403
+
+
+def test_joining_and_leaving_a_team_follow_its_boards(
+    client, org, team, member, shared_board
+):
+    newcomer = User.create_user("access_newcomer", "pw")
+    OrganizationMember.create(user=newcomer, organization=org, joined_at=_now())
+
+    client.post(
+        f"/api/teams/{team.id}/members",
+        json={"username": newcomer.username},
+        headers=_headers(member),
+    )
+    assert newcomer.id in _grants(shared_board)
+
+    client.delete(
+        f"/api/teams/{team.id}/members/{newcomer.id}", headers=_headers(newcomer)
+    )
+    assert newcomer.id not in _grants(shared_board)
+
+
+def test_deleting_the_team_unshares_its_boards(
+    client, test_user, member, team, shared_board
+):
+    response = client.delete(f"/api/teams/{team.id}", headers=_headers(test_user))
+
+    assert response.status_code == 200
+    assert Board.get_by_id(shared_board.id).shared_team_id is None
+    assert _grants(shared_board) == {test_user.id}
+
+
+def test_leaving_the_organization_leaves_its_teams_only(
+    client, test_user, org, member, team, shared_board
+):
+    elsewhere = Organization.create_with_columns("Other Org", "other-org", member)
+    other_team = Team.create_with_columns("Other Team", elsewhere)
+    TeamMember.create(user=member, team=other_team, joined_at=_now())
+
+    response = client.delete(
+        f"/api/organizations/{org.id}/members/{member.id}", headers=_headers(member)
+    )
+
+    assert response.status_code == 200
+    assert member.id not in _grants(shared_board)
+    assert TeamMember.get_or_none(team=other_team, user=member) is not None
+
+
+def test_deleting_a_board_drops_its_grants(client, test_user, shared_board):
+    client.delete(f"/api/boards/{shared_board.id}", headers=_headers(test_user))
+    Purger(pause=0).purge(retention_cutoff(0))
+
+    assert _grants(shared_board.id) == set()
+
+
+def test_listing_boards_is_one_query_however_many_teams(client, test_user, org):
+    for n in range(5):
+        team = Team.create_with_columns(f"Team {n}", org)
+        TeamMember.create(user=test_user, team=team, joined_at=_now())
+        Board.create_with_columns(owner=test_user, name=f"Board {n}", shared_team=team)
+
+    with count_queries() as queries:
+        response = client.get("/api/boards", headers=_headers(test_user))
+
+    assert len(response.json()) == 5
+    board_queries = [q for q in queries.get_queries() if '"board"' in q.msg[0]]
+    assert len(board_queries) == 1
+
+
+def test_a_non_owner_check_is_one_lookup(member, shared_board):
+    board = Board.get_by_id(shared_board.id)
+
+    with count_queries() as queries:
+        assert can_access_board(member, board)
+
+    assert queries.count == 1
+
+
+def test_the_migration_backfills_from_boards_and_teams(
+    test_user, member, team, shared_board, db_session
+):
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "migrations",
+        "004_user_board_access.py",
+    )
+    spec = importlib.util.spec_from_file_location("migration_004", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    UserBoardAccess.delete().execute()
+
+    migration.migrate(None, db_session)
+
+    assert _grants(shared_board) == {test_user.id, member.id}
@@ -0,0 +1,278 @@
+"""GET /api/boards/{id}/changes -- deltas from the per-board change log.
+
+A client replaying a delta onto the board it had at `since` must end up with
+exactly what a fresh GET returns, so the tests here apply deltas and compare.
+The other half is the fallback: once the log has been trimmed past `since`,
+the answer has to be the whole board rather than a delta with holes in it.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend import changes
+from backend.auth import create_access_token
+from backend.bulk import MAX_PARAMETERS
+from backend.main import app
+from backend.models import Board, BoardChange, Card, Comment, User
+from backend.purge import Purger, retention_cutoff
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Delta Board")
+    card = Card.create(column=board.columns[0], title="First", position=0)
+    Comment.create_comment(card=card, user=test_user, content="hello")
+    return board
+
+
+def _snapshot(client, user, board):
+    response = client.get(f"/api/boards/{board.id}", headers=_headers(user))
+    return response.json(), int(response.headers["X-Board-Version"])
+
+
+def _delta(client, user, board, since):
+    response = client.get(
+        f"/api/boards/{board.id}/changes",
+        params={"since": since},
+        headers=_headers(user),
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _apply(state, delta):
+    """Replay a delta onto a board body the way a client would."""
+    if delta["full"]:
+        return delta["snapshot"]
+    if delta["board"]:
+        state.update(delta["board"])
+    columns = {c["id"]: c for c in state["columns"]}
+    cards = {}
+    comments = {}
+    card_column = {}
+    for column in state["columns"]:
+        for card in column["cards"]:
+            cards[card["id"]] = card
+            card_column[card["id"]] = column["id"]
+            for comment in card["comments"]:
+                comments[comment["id"]] = comment
+
+    for column_id in delta["deleted"]["columns"]:
+        columns.pop(column_id, None)
+    for card_id in delta["deleted"]["cards"]:
+        cards.pop(card_id, None)
+    for comment_id in delta["deleted"]["comments"]:
+        comments.pop(comment_id, None)
+
+    for column in delta["columns"]:
+        columns.setdefault(column["id"], {"cards": []}).update(column)
+    for card in delta["cards"]:
+        entry = cards.setdefault(card["id"], {"comments": []})
+        entry.update({k: v for k, v in card.items() if k != "column_id"})
+        card_column[card["id"]] = card["column_id"]
+    for comment in delta["comments"]:
+        comments[comment["id"]] = comment
+
+    for card in cards.values():
+        card["comments"] = sorted(
+            (c for c in comments.values() if c["card_id"] == card["id"]),
+            key=lambda c: (c["created_at"], c["id"]),
+        )
+    for column in columns.values():
+        column["cards"] = sorted(
+            (c for c in cards.values() if card_column[c["id"]] == column["id"]),
+            key=lambda c: (c["position"], c["id"]),
+        )
+    state["columns"] = sorted(
+        columns.values(), key=lambda c: (c["position"], c["id"])
+    )
+    return state
+
+
+def test_replaying_a_delta_reproduces_a_fresh_get(client, test_user, board):
+    headers = _headers(test_user)
+    state, version = _snapshot(client, test_user, board)
+    card_id = state["columns"][0]["cards"][0]["id"]
+    comment_id = state["columns"][0]["cards"][0]["comments"][0]["id"]
+    doomed_column = state["columns"][2]["id"]
+
+    client.post(f"/api/boards/{board.id}", json={"name": "Renamed"}, headers=headers)
+    new_card = client.post(
+        "/api/cards",
+        json={"column_id": board.columns[1].id, "title": "Second", "position": 0},
+        headers=headers,
+    ).json()
+    client.put(f"/api/cards/{card_id}", json={"title": "Edited"}, headers=headers)
+    client.post(
+        "/api/comments",
+        json={"card_id": new_card["id"], "content": "hi"},
+        headers=headers,
+    )
+    client.delete(f"/api/comments/{comment_id}", headers=headers)
+    client.delete(f"/api/columns/{doomed_column}", headers=headers)
+
+    delta = _delta(client, test_user, board, version)
+
+    assert delta["full"] is False
+    assert delta["deleted"]["columns"] == [doomed_column]
+    assert delta["deleted"]["comments"] == [comment_id]
+    fresh, fresh_version = _snapshot(client, test_user, board)
+    assert delta["version"] == fresh_version
+    assert _apply(state, delta) == fresh
+
+
+def test_an_object_changed_several_times_is_sent_once(client, test_user, board):
+    headers = _headers(test_user)
+    _, version = _snapshot(client, test_user, board)
+    card_id = Card.select().first().id
+
+    for title in ("one", "two", "three"):
+        client.put(f"/api/cards/{card_id}", json={"title": title}, headers=headers)
+
+    delta = _delta(client, test_user, board, version)
+
+    assert [c["title"] for c in delta["cards"]] == ["three"]
+    assert delta["version"] == version + 3
+
+
+def test_an_object_created_then_deleted_is_a_tombstone(client, test_user, board):
+    headers = _headers(test_user)
+    _, version = _snapshot(client, test_user, board)
+    card = client.post(
+        "/api/cards",
+        json={"column_id": board.columns[0].id, "title": "Brief", "position": 1},
+        headers=headers,
+    ).json()
+    client.delete(f"/api/cards/{card['id']}", headers=headers)
+
+    delta = _delta(client, test_user, board, version)
+
+    assert delta["cards"] == []
+    assert delta["deleted"]["cards"] == [card["id"]]
+
+
+def test_a_card_moved_away_is_a_tombstone_on_its_old_board(client, test_user, board):
+    other = Board.create_with_columns(owner=test_user, name="Other")
+    _, version = _snapshot(client, test_user, board)
+    _, other_version = _snapshot(client, test_user, other)
+    card_id = Card.select().first().id
+
+    client.put(
+        f"/api/cards/{card_id}",
+        json={"column_id": other.columns[0].id},
+        headers=_headers(test_user),
+    )
+
+    assert _delta(client, test_user, board, version)["deleted"]["cards"] == [card_id]
+    moved = _delta(client, test_user, other, other_version)
+    assert [c["id"] for c in moved["cards"]] == [card_id]
+
+
+def test_an_up_to_date_client_gets_an_empty_delta(client, test_user, board):
+    _, version = _snapshot(client, test_user, board)
+
+    delta = _delta(client, test_user, board, version)
+
+    assert delta["full"] is False
+    assert delta["cards"] == [] and delta["snapshot"] is None
+
+
+def test_a_version_older_than_the_log_gets_the_whole_board(client, test_user, board):
+    # A board whose early versions predate the log, as every board does on
+    # an upgraded install.
+    Board.update(version=5).where(Board.id == board.id).execute()
+    client.post(
+        f"/api/boards/{board.id}", json={"name": "Renamed"}, headers=_headers(test_user)
+    )
+
+    delta = _delta(client, test_user, board, 3)
+
+    assert delta["full"] is True
+    assert delta["snapshot"] == _snapshot(client, test_user, board)[0]
+
+
+def test_a_version_from_the_future_gets_the_whole_board(client, test_user, board):
+    _, version = _snapshot(client, test_user, board)
+
+    assert _delta(client, test_user, board, version + 5)["full"] is True
+
+
+def test_the_log_is_trimmed_at_whole_versions(client, test_user, board, monkeypatch):
+    monkeypatch.setattr(changes, "CHANGE_LOG_MAX_ENTRIES", 4)
+    headers = _headers(test_user)
+    _, start = _snapshot(client, test_user, board)
+    card_id = Card.select().first().id
+
+    for n in range(6):
+        client.put(f"/api/cards/{card_id}", json={"title": f"t{n}"}, headers=headers)
+    # Three columns in one write: one version, three entries.
+    client.post(
+        "/api/columns/reorder",
+        json={
+            "columns": [
+                {"id": c.id, "position": 5 - i} for i, c in enumerate(board.columns)
+            ]
+        },
+        headers=headers,
+    )
+
+    versions = [
+        row.version
+        for row in BoardChange.select().where(BoardChange.board == board)
+    ]
+    assert len(versions) <= 4
+    assert versions.count(start + 7) == 3
+    assert _delta(client, test_user, board, start)["full"] is True
+    recent = _delta(client, test_user, board, min(versions) - 1)
+    assert recent["full"] is False
+
+
+def test_a_long_write_logs_within_the_parameter_limit(board):
+    count = changes.CHANGE_LOG_BATCH_SIZE + 10
+
+    with count_queries() as queries:
+        changes.record_changes(
+            (board.id, "card", n, changes.UPSERT) for n in range(count)
+        )
+
+    inserts = [
+        q
+        for q in queries.get_queries()
+        if q.msg[0].startswith('INSERT INTO "boardchange"')
+    ]
+    assert len(inserts) == 2
+    assert all(len(q.msg[1]) <= MAX_PARAMETERS for q in inserts)
+
+
+def test_changes_need_access_to_the_board(client, board):
+    stranger = User.create_user("delta_stranger", "pw")
+
+    response = client.get(
+        f"/api/boards/{board.id}/changes",
+        params={"since": 0},
+        headers=_headers(stranger),
+    )
+
+    assert response.status_code == 403
+
+
+def test_deleting_a_board_drops_its_log(client, test_user, board):
+    client.post(
+        f"/api/boards/{board.id}", json={"name": "x"}, headers=_headers(test_user)
+    )
+
+    client.delete(f"/api/boards/{board.id}", headers=_headers(test_user))
+    Purger(pause=0).purge(retention_cutoff(0))
+
+    assert BoardChange.select().where(BoardChange.board == board.id).count() == 0
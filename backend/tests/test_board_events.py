@@ -0,0 +1,183 @@
+"""GET /api/boards/{id}/events -- Server-Sent Events for board changes.
+
+The TestClient buffers a response until it ends, so an endless stream cannot
+be read through it. The stream's body is driven directly here instead, with
+the routes exercised only for what they decide before streaming starts, and
+the hub tested on its own for the wake-up and drop-slow-consumer rules.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import events
+from backend.api import board_event_stream
+from backend.auth import create_access_token
+from backend.changes import UPSERT, record_changes
+from backend.events import BoardEventHub, board_events, collect_changed_boards
+from backend.main import app
+from backend.models import Board, Card, User
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user, **extra):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}", **extra}
+
+
+@pytest.fixture
+def board(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Streamed")
+    Card.create(column=board.columns[0], title="First", position=0)
+    return board
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+def _parse(message):
+    fields = {}
+    for line in message.decode().strip().split("\n"):
+        name, _, value = line.partition(": ")
+        fields[name] = value
+    return fields
+
+
+async def _next(stream):
+    return _parse(await asyncio.wait_for(stream.__anext__(), 2))
+
+
+def _write(board):
+    """Rename the board as a request would, then publish as the middleware
+    does once the request is over."""
+    with collect_changed_boards() as changed:
+        Board.update(name="Renamed").where(Board.id == board.id).execute()
+        record_changes([(board.id, "board", board.id, UPSERT)])
+    for board_id in changed:
+        board_events.publish(board_id)
+
+
+@pytest.mark.asyncio
+async def test_a_stream_opens_with_ready_then_sends_each_write(test_user, board):
+    stream = board_event_stream(_Request(), board.id, test_user, None)
+
+    ready = await _next(stream)
+    assert ready["event"] == "ready"
+    assert int(ready["id"]) == board.version
+
+    _write(board)
+    delta = await _next(stream)
+
+    assert delta["event"] == "delta"
+    assert int(delta["id"]) == board.version + 1
+    assert json.loads(delta["data"])["board"]["name"] == "Renamed"
+    await stream.aclose()
+    assert board_events.subscriber_count(board.id) == 0
+
+
+@pytest.mark.asyncio
+async def test_last_event_id_catches_up_before_waiting(test_user, board):
+    version = board.version
+    _write(board)
+    _write(board)
+
+    stream = board_event_stream(_Request(), board.id, test_user, version)
+    delta = await _next(stream)
+
+    assert delta["event"] == "delta"
+    assert int(delta["id"]) == version + 2
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_a_deleted_board_ends_the_stream(test_user, board):
+    stream = board_event_stream(_Request(), board.id, test_user, None)
+    await _next(stream)
+
+    board.delete_instance(recursive=True)
+    board_events.publish(board.id)
+
+    assert (await _next(stream))["event"] == "gone"
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_an_idle_stream_sends_keepalives(test_user, board, monkeypatch):
+    monkeypatch.setattr("backend.api.EVENTS_KEEPALIVE_SECONDS", 0.01)
+    stream = board_event_stream(_Request(), board.id, test_user, None)
+    await _next(stream)
+
+    assert await asyncio.wait_for(stream.__anext__(), 2) == b": keepalive\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_a_subscriber_that_falls_behind_is_dropped():
+    hub = BoardEventHub(queue_size=2)
+    slow = hub.subscribe(1)
+    fast = hub.subscribe(1)
+
+    for _ in range(3):
+        hub.publish(1)
+        fast.queue.get_nowait()
+
+    assert slow.dropped and not fast.dropped
+    assert await slow.wait(0.1) is None
+    assert hub.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_only_wakes_that_boards_subscribers():
+    hub = BoardEventHub()
+    watching = hub.subscribe(1)
+    other = hub.subscribe(2)
+
+    hub.publish(1)
+
+    assert await watching.wait(0.1) is True
+    assert await other.wait(0.01) is False
+    hub.unsubscribe(watching)
+    hub.unsubscribe(other)
+    assert hub.subscriber_count() == 0
+
+
+def test_writes_through_the_api_publish_after_the_response(
+    client, test_user, board, monkeypatch
+):
+    published = []
+    monkeypatch.setattr(events.board_events, "publish", published.append)
+
+    client.post(
+        "/api/cards",
+        json={"column_id": board.columns[0].id, "title": "New", "position": 1},
+        headers=_headers(test_user),
+    )
+    client.get(f"/api/boards/{board.id}", headers=_headers(test_user))
+
+    assert published == [board.id]
+
+
+def test_the_stream_checks_access_before_opening(client, board):
+    stranger = User.create_user("events_stranger", "pw")
+
+    response = client.get(f"/api/boards/{board.id}/events", headers=_headers(stranger))
+
+    assert response.status_code == 403
+
+
+def test_a_malformed_last_event_id_is_rejected(client, test_user, board):
+    response = client.get(
+        f"/api/boards/{board.id}/events",
+        headers=_headers(test_user, **{"Last-Event-ID": "yesterday"}),
+    )
+
+    assert response.status_code == 400
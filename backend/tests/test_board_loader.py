@@ -0,0 +1,153 @@
+"""GET /api/boards/{id} builds its tree in a fixed number of queries.
+
+The old handler walked the ORM graph and issued a query per column, per card
+and per comment author. These tests pin the two properties of the set-based
+loader that replaced it: the response is identical to what the walk produced,
+and the query count does not move as the board grows.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.api import BoardResponse
+from backend.auth import create_access_token
+from backend.main import app
+from backend.models import Board, Card, Column, Comment, User
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _populate(board, authors, cards_per_column, comments_per_card):
+    """Fill every column of `board`. Positions are inserted out of order so the
+    loader's sorting is exercised, not just the insertion order."""
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for column in board.columns:
+        for position in reversed(range(cards_per_column)):
+            card = Card.create(
+                column=column,
+                title=f"{column.name} card {position}",
+                description=None if position % 2 else f"about {position}",
+                position=position,
+            )
+            for n in range(comments_per_card):
+                Comment.create(
+                    card=card,
+                    user=authors[n % len(authors)],
+                    content=f"comment {n}",
+                    created_at=base + timedelta(minutes=comments_per_card - n),
+                )
+
+
+def _walked_payload(board):
+    """The board as the handler used to build it, one lazy query at a time."""
+    columns = []
+    for column in board.columns.order_by(Column.position):
+        cards = []
+        for card in column.cards.order_by(Card.position):
+            comments = (
+                Comment.select()
+                .where(Comment.card == card)
+                .order_by(Comment.created_at)
+            )
+            cards.append(
+                {
+                    "id": card.id,
+                    "title": card.title,
+                    "description": card.description,
+                    "position": card.position,
+                    "comments": [
+                        {
+                            "id": comment.id,
+                            "card_id": comment.card.id,
+                            "user_id": comment.user.id,
+                            "username": comment.user.username,
+                            "content": comment.content,
+                            "created_at": comment.created_at,
+                            "updated_at": comment.updated_at,
+                        }
+                        for comment in comments
+                    ],
+                }
+            )
+        columns.append(
+            {
+                "id": column.id,
+                "name": column.name,
+                "position": column.position,
+                "cards": cards,
+            }
+        )
+    return {
+        "id": board.id,
+        "name": board.name,
+        "created_at": board.created_at,
+        "columns": columns,
+        "shared_team_id": board.shared_team_id,
+        "is_public_to_org": board.is_public_to_org,
+        "owner_id": board.owner_id,
+    }
+
+
+def test_response_matches_the_old_walk_byte_for_byte(client, test_user, db_session):
+    other = User.create_user("loader_other_author", "pw")
+    board = Board.create_with_columns(owner=test_user, name="Loader Board")
+    _populate(board, [test_user, other], cards_per_column=4, comments_per_card=3)
+
+    response = client.get(f"/api/boards/{board.id}", headers=_headers(test_user))
+    assert response.status_code == 200
+
+    expected = JSONResponse(
+        jsonable_encoder(BoardResponse.model_validate(_walked_payload(board)))
+    )
+    assert response.content == expected.body
+
+
+def test_empty_columns_and_cards_keep_their_empty_lists(client, test_user, db_session):
+    board = Board.create_with_columns(owner=test_user, name="Sparse")
+    Card.create(column=board.columns[0], title="lonely", position=0)
+
+    data = client.get(f"/api/boards/{board.id}", headers=_headers(test_user)).json()
+
+    assert [len(c["cards"]) for c in data["columns"]] == [1, 0, 0]
+    assert data["columns"][0]["cards"][0]["comments"] == []
+
+
+def _queries_for(client, board, user):
+    # Authenticated once beforehand, so every measurement finds the user
+    # already cached.
+    client.get("/api/admin/status", headers=_headers(user))
+    with count_queries() as counter:
+        response = client.get(f"/api/boards/{board.id}", headers=_headers(user))
+    assert response.status_code == 200
+    return counter.count
+
+
+def test_query_count_does_not_grow_with_the_board(client, test_user, db_session):
+    other = User.create_user("loader_counting_author", "pw")
+
+    small = Board.create_with_columns(owner=test_user, name="Small")
+    _populate(small, [test_user], cards_per_column=1, comments_per_card=1)
+
+    large = Board.create_with_columns(
+        owner=test_user,
+        name="Large",
+        column_names=[f"Column {i}" for i in range(12)],
+    )
+    _populate(large, [test_user, other], cards_per_column=15, comments_per_card=4)
+
+    assert _queries_for(client, small, test_user) == _queries_for(
+        client, large, test_user
+    )
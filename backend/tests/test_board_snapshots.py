@@ -0,0 +1,198 @@
+"""Board versions and the snapshot cache behind GET /api/boards/{id}.
+
+Every write that changes a board's payload bumps Board.version, and the cache
+is keyed on it -- so the interesting failures are a route that forgets to bump
+(a poll keeps serving the old board) and a hit that skips the permission
+check. Both are pinned here, alongside the cache's own bookkeeping.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.auth import create_access_token
+from backend.main import app
+from backend.models import Board, Card, Column, Comment, User
+from backend.snapshots import BoardSnapshotCache, board_snapshots
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Snapshot Board")
+    card = Card.create(column=board.columns[0], title="First", position=0)
+    Comment.create_comment(card=card, user=test_user, content="hello")
+    return board
+
+
+def _version(board):
+    return Board.get_by_id(board.id).version
+
+
+def _card(board):
+    return Card.select().join(Column).where(Column.board == board).first()
+
+
+# Each entry performs one write through the API against the `board` fixture.
+WRITES = {
+    "rename board": lambda c, h, b: c.post(
+        f"/api/boards/{b.id}", json={"name": "Renamed"}, headers=h
+    ),
+    "share board": lambda c, h, b: c.post(
+        f"/api/boards/{b.id}/share", json={"is_public_to_org": True}, headers=h
+    ),
+    "create column": lambda c, h, b: c.post(
+        "/api/columns", json={"board_id": b.id, "name": "Done"}, headers=h
+    ),
+    "update column": lambda c, h, b: c.put(
+        f"/api/columns/{b.columns[0].id}",
+        json={"name": "Backlog", "position": 0},
+        headers=h,
+    ),
+    "delete column": lambda c, h, b: c.delete(
+        f"/api/columns/{b.columns[2].id}", headers=h
+    ),
+    "reorder columns": lambda c, h, b: c.post(
+        "/api/columns/reorder",
+        json={"columns": [{"id": b.columns[0].id, "position": 9}]},
+        headers=h,
+    ),
+    "create card": lambda c, h, b: c.post(
+        "/api/cards",
+        json={"column_id": b.columns[1].id, "title": "New", "position": 0},
+        headers=h,
+    ),
+    "update card": lambda c, h, b: c.put(
+        f"/api/cards/{_card(b).id}", json={"title": "Edited"}, headers=h
+    ),
+    "delete card": lambda c, h, b: c.delete(f"/api/cards/{_card(b).id}", headers=h),
+    "reorder cards": lambda c, h, b: c.post(
+        "/api/cards/reorder",
+        json={"cards": [{"id": _card(b).id, "position": 3}]},
+        headers=h,
+    ),
+    "create comment": lambda c, h, b: c.post(
+        "/api/comments", json={"card_id": _card(b).id, "content": "more"}, headers=h
+    ),
+    "update comment": lambda c, h, b: c.put(
+        f"/api/comments/{Comment.select().first().id}",
+        json={"content": "edited"},
+        headers=h,
+    ),
+    "delete comment": lambda c, h, b: c.delete(
+        f"/api/comments/{Comment.select().first().id}", headers=h
+    ),
+}
+
+
+@pytest.mark.parametrize("write", WRITES.values(), ids=WRITES.keys())
+def test_every_write_bumps_the_version_and_shows_up_on_the_next_get(
+    client, test_user, board, write
+):
+    headers = _headers(test_user)
+    before = client.get(f"/api/boards/{board.id}", headers=headers)
+    version = _version(board)
+
+    assert write(client, headers, board).status_code == 200
+
+    assert _version(board) == version + 1
+    after = client.get(f"/api/boards/{board.id}", headers=headers)
+    assert after.content != before.content
+
+
+def test_moving_a_card_between_boards_bumps_both(client, test_user, board):
+    other = Board.create_with_columns(owner=test_user, name="Other")
+    versions = (_version(board), _version(other))
+
+    response = client.put(
+        f"/api/cards/{_card(board).id}",
+        json={"column_id": other.columns[0].id},
+        headers=_headers(test_user),
+    )
+
+    assert response.status_code == 200
+    assert (_version(board), _version(other)) == (versions[0] + 1, versions[1] + 1)
+
+
+def test_renaming_a_commenter_bumps_the_boards_they_commented_on(client, board):
+    admin = User.create_user("snapshot_admin", "pw", admin=True)
+    author = Comment.select().first().user
+    version = _version(board)
+
+    response = client.put(
+        f"/api/admin/users/{author.id}",
+        json={"username": "renamed_author", "admin": False},
+        headers=_headers(admin),
+    )
+
+    assert response.status_code == 200
+    assert _version(board) == version + 1
+
+
+def test_a_hit_serves_the_same_bytes_without_rebuilding_the_tree(
+    client, test_user, board
+):
+    headers = _headers(test_user)
+    board_snapshots.clear()
+    stats = board_snapshots.stats()
+
+    miss = client.get(f"/api/boards/{board.id}", headers=headers)
+    with count_queries() as queries:
+        hit = client.get(f"/api/boards/{board.id}", headers=headers)
+
+    after = board_snapshots.stats()
+    assert after["misses"] == stats["misses"] + 1
+    assert after["hits"] == stats["hits"] + 1
+    assert hit.content == miss.content
+    assert hit.headers["content-type"] == "application/json"
+    # User, board and owner lookups only: nothing under the board is read.
+    sql = [q.msg[0] for q in queries.get_queries()]
+    assert not any('"card"' in q or '"comment"' in q for q in sql)
+
+
+def test_a_hit_still_checks_permission(client, test_user, board):
+    client.get(f"/api/boards/{board.id}", headers=_headers(test_user))
+    stranger = User.create_user("snapshot_stranger", "pw")
+
+    response = client.get(f"/api/boards/{board.id}", headers=_headers(stranger))
+
+    assert response.status_code == 403
+
+
+def test_cache_evicts_least_recently_used_past_its_byte_limit():
+    cache = BoardSnapshotCache(max_bytes=10)
+    cache.put((1, 0, "a"), b"1111")
+    cache.put((2, 0, "b"), b"2222")
+    cache.get((1, 0, "a"))
+    cache.put((3, 0, "c"), b"3333")
+
+    assert cache.get((2, 0, "b")) is None
+    assert cache.get((1, 0, "a")) == b"1111"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+
+def test_storing_a_new_version_drops_the_old_one():
+    cache = BoardSnapshotCache(max_bytes=100)
+    cache.put((1, 0, "a"), b"old")
+    cache.put((1, 1, "a"), b"new")
+
+    assert cache.get((1, 0, "a")) is None
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == 3
+
+
+def test_a_body_larger_than_the_whole_cache_is_not_stored():
+    cache = BoardSnapshotCache(max_bytes=4)
+    cache.put((1, 0, "a"), b"too large")
+
+    assert cache.stats()["entries"] == 0
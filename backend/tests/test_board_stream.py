@@ -0,0 +1,124 @@
+"""GET /api/boards/{id}?stream=json|ndjson: a board sent a page of cards at a
+time, as it is read, rather than built whole first."""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+import backend.boards
+from backend.auth import create_access_token
+from backend.boards import board_pages, load_columns
+from backend.main import app
+from backend.models import Board, Card, Comment
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def headers(test_user):
+    token = create_access_token(
+        data={"sub": test_user.id, "username": test_user.username}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(backend.boards, "BOARD_STREAM_PAGE_SIZE", 2)
+
+
+@pytest.fixture
+def board(test_user):
+    # The name spells out what the streamed body is split around.
+    board = Board.create_with_columns(owner=test_user, name='Big "columns":[]')
+    todo, doing, _ = board.columns
+    written = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for n in range(5):
+        # Ties in position, for the keyset to break by id.
+        card = Card.create(column=todo, title=f"card {n}", position=n // 2)
+        for content in ("first", "second"):
+            Comment.create(
+                card=card, user=test_user, content=content, created_at=written
+            )
+    Card.create(column=doing, title='"cards":[]', position=0)
+    return board
+
+
+def test_pages_make_up_the_whole_board(board, small_pages):
+    pages = list(board_pages(board))
+
+    assert [len(cards) for _, cards in pages] == [2, 2, 1, 1, 0]
+    columns = []
+    for column, cards in pages:
+        if not columns or columns[-1]["id"] != column["id"]:
+            columns.append({**column, "cards": []})
+        columns[-1]["cards"] += cards
+    assert columns == load_columns(board)
+
+
+def test_a_page_is_a_bounded_query(board, small_pages):
+    with count_queries() as queries:
+        list(board_pages(board))
+
+    card_queries = [
+        q.msg[0] for q in queries.get_queries() if q.msg[0].startswith("SELECT")
+    ]
+    assert all("LIMIT" in sql for sql in card_queries if 'FROM "card"' in sql)
+
+
+def test_streamed_json_is_the_same_bytes(client, headers, board, small_pages):
+    whole = client.get(f"/api/boards/{board.id}", headers=headers)
+
+    streamed = client.get(f"/api/boards/{board.id}?stream=json", headers=headers)
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/json"
+    assert streamed.headers["X-Board-Version"] == whole.headers["X-Board-Version"]
+    assert "ETag" not in streamed.headers
+    assert streamed.content == whole.content
+
+
+def test_an_empty_board_streams_too(client, headers, test_user):
+    empty = Board.create_with_columns(owner=test_user, name="Empty", column_names=[])
+
+    whole = client.get(f"/api/boards/{empty.id}", headers=headers)
+    streamed = client.get(f"/api/boards/{empty.id}?stream=json", headers=headers)
+
+    assert streamed.content == whole.content
+
+
+def test_ndjson_is_a_line_per_column_and_card(client, headers, board, small_pages):
+    whole = client.get(f"/api/boards/{board.id}", headers=headers).json()
+
+    response = client.get(f"/api/boards/{board.id}?stream=ndjson", headers=headers)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == (
+        ["board", "column"] + ["card"] * 5 + ["column", "card", "column"]
+    )
+    fields = {key: value for key, value in whole.items() if key != "columns"}
+    assert records[0] == {"type": "board", **fields}
+    todo = whole["columns"][0]
+    assert records[1] == {
+        "type": "column",
+        **{key: value for key, value in todo.items() if key != "cards"},
+    }
+    assert records[2:7] == [
+        {"type": "card", "column_id": todo["id"], **card} for card in todo["cards"]
+    ]
+
+
+def test_a_stream_is_checked_like_any_read(client, headers, board):
+    def status(url, **kwargs):
+        return client.get(url, **kwargs).status_code
+
+    assert status(f"/api/boards/{board.id}?stream=xml", headers=headers) == 400
+    assert status("/api/boards/999999?stream=json", headers=headers) == 404
+    assert status(f"/api/boards/{board.id}?stream=json") == 401
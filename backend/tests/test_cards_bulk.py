@@ -0,0 +1,236 @@
+"""POST /api/cards/bulk: many card operations in one request and one
+transaction, all or nothing unless asked otherwise."""
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.api import CARDS_BULK_MAX_OPERATIONS
+from backend.auth import create_access_token
+from backend.bulk import MAX_PARAMETERS
+from backend.main import app
+from backend.models import Board, Card, User
+from backend.ordering import POSITION_GAP
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    return Board.create_with_columns(owner=test_user, name="Bulk")
+
+
+def _bulk(client, user, operations, **options):
+    return client.post(
+        "/api/cards/bulk",
+        json={"operations": operations, **options},
+        headers=_headers(user),
+    )
+
+
+def _titles(client, user, board, index=0):
+    body = client.get(f"/api/boards/{board.id}", headers=_headers(user)).json()
+    return [card["title"] for card in body["columns"][index]["cards"]]
+
+
+def test_creates_are_one_insert_however_many(client, test_user, board):
+    column = board.columns[0]
+    Card.create(column=column, title="already there", position=4)
+    client.get("/api/boards", headers=_headers(test_user))  # user cached
+    operations = [
+        {"op": "create", "column_id": column.id, "title": f"card {n}"}
+        for n in range(50)
+    ]
+
+    with count_queries() as queries:
+        response = _bulk(client, test_user, operations)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert all(result["ok"] for result in results)
+    assert [result["card"]["position"] for result in results] == [
+        4 + n * POSITION_GAP for n in range(1, 51)
+    ]
+    inserts = [
+        q for q in queries.get_queries() if q.msg[0].startswith('INSERT INTO "card"')
+    ]
+    assert len(inserts) == 1
+    assert _titles(client, test_user, board) == ["already there"] + [
+        f"card {n}" for n in range(50)
+    ]
+
+
+def test_a_long_create_stays_within_the_parameter_limit(client, test_user, board):
+    column = board.columns[0]
+    operations = [
+        {"op": "create", "column_id": column.id, "title": f"card {n}"}
+        for n in range(CARDS_BULK_MAX_OPERATIONS)
+    ]
+
+    with count_queries() as queries:
+        response = _bulk(client, test_user, operations)
+
+    assert response.status_code == 200
+    inserts = [
+        q for q in queries.get_queries() if q.msg[0].startswith('INSERT INTO "card"')
+    ]
+    assert len(inserts) > 1
+    assert all(len(q.msg[1]) <= MAX_PARAMETERS for q in inserts)
+    assert column.cards.count() == CARDS_BULK_MAX_OPERATIONS
+
+
+def test_every_kind_of_operation_in_one_request(client, test_user, board):
+    todo, doing, _ = board.columns
+    a, b, c, d = (
+        Card.create(column=todo, title=title, position=n)
+        for n, title in enumerate("abcd")
+    )
+
+    response = _bulk(
+        client,
+        test_user,
+        [
+            {"op": "create", "column_id": doing.id, "title": "new"},
+            {"op": "update", "id": a.id, "title": "A", "column_id": doing.id},
+            {"op": "move", "id": d.id, "before_id": b.id},
+            {"op": "delete", "id": c.id},
+        ],
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [True] * 4
+    assert results[1]["card"] == {
+        "id": a.id,
+        "column_id": doing.id,
+        "title": "A",
+        "description": None,
+        "position": 0,
+    }
+    assert results[3] == {"ok": True, "id": c.id}
+    assert _titles(client, test_user, board, 0) == ["d", "b"]
+    assert sorted(_titles(client, test_user, board, 1)) == ["A", "new"]
+
+
+def test_one_failure_writes_nothing(client, test_user, board):
+    column = board.columns[0]
+    card = Card.create(column=column, title="keep", position=0)
+    version = Board.get_by_id(board.id).version
+
+    response = _bulk(
+        client,
+        test_user,
+        [
+            {"op": "create", "column_id": column.id, "title": "new"},
+            {"op": "update", "id": card.id, "title": "changed"},
+            {"op": "delete", "id": 999999},
+        ],
+    )
+
+    assert response.status_code == 404
+    body = response.json()
+    assert body["detail"] == "Operation 2: Card not found"
+    assert [result["status"] for result in body["results"]] == [424, 424, 404]
+    assert _titles(client, test_user, board) == ["keep"]
+    assert Board.get_by_id(board.id).version == version
+
+
+def test_a_move_that_fails_late_rolls_back_the_rest(client, test_user, board):
+    todo, doing, _ = board.columns
+    card = Card.create(column=todo, title="card", position=0)
+    elsewhere = Card.create(column=doing, title="elsewhere", position=0)
+
+    response = _bulk(
+        client,
+        test_user,
+        [
+            {"op": "create", "column_id": todo.id, "title": "new"},
+            # Into todo, next to a card in doing: only found out while placing.
+            {
+                "op": "move",
+                "id": card.id,
+                "column_id": todo.id,
+                "after_id": elsewhere.id,
+            },
+        ],
+    )
+
+    assert response.status_code == 400
+    assert _titles(client, test_user, board) == ["card"]
+
+
+def test_best_effort_applies_the_rest(client, test_user, board):
+    column = board.columns[0]
+
+    response = _bulk(
+        client,
+        test_user,
+        [
+            {"op": "create", "column_id": column.id, "title": "one"},
+            {"op": "create", "column_id": column.id},
+            {"op": "archive", "id": 1},
+            {"op": "create", "column_id": column.id, "title": "two"},
+        ],
+        best_effort=True,
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [True, False, False, True]
+    assert results[1]["detail"] == "A create needs a column_id and a title"
+    assert results[2]["detail"] == "Unknown operation 'archive'"
+    assert _titles(client, test_user, board) == ["one", "two"]
+
+
+def test_someone_elses_board_is_refused(client, test_user, board):
+    stranger = User.create_user("bulk_stranger", "testpassword")
+    theirs = Board.create_with_columns(owner=stranger, name="Theirs")
+
+    response = _bulk(
+        client,
+        test_user,
+        [
+            {"op": "create", "column_id": board.columns[0].id, "title": "mine"},
+            {"op": "create", "column_id": theirs.columns[0].id, "title": "theirs"},
+        ],
+        best_effort=True,
+    )
+
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [True, False]
+    assert results[1]["status"] == 403
+    assert _titles(client, stranger, theirs) == []
+
+
+def test_a_card_may_appear_in_one_operation_only(client, test_user, board):
+    card = Card.create(column=board.columns[0], title="card", position=0)
+
+    response = _bulk(
+        client,
+        test_user,
+        [
+            {"op": "update", "id": card.id, "title": "first"},
+            {"op": "delete", "id": card.id},
+        ],
+    )
+
+    assert response.status_code == 400
+    assert response.json()["results"][1]["detail"] == (
+        f"Card {card.id} is in more than one operation"
+    )
+
+
+def test_too_many_operations_are_refused(client, test_user, board):
+    operations = [
+        {"op": "create", "column_id": board.columns[0].id, "title": "card"}
+    ] * (CARDS_BULK_MAX_OPERATIONS + 1)
+
+    assert _bulk(client, test_user, operations).status_code == 400
@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 import tempfile
@@ -305,6 +306,40 @@ def test_cli_card_create_command(client, auth_headers, test_user):
         )
 
 
+def test_cli_card_import_command(tmp_path):
+    import json
+
+    from kanban.cli import cmd_card_import
+    from kanban.config import set_token
+
+    set_token("test-token")
+    path = tmp_path / "cards.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"title": "Imported"},
+                {"op": "delete", "id": 7},
+            ]
+        )
+    )
+
+    mock_client = MagicMock()
+    mock_client.cards_bulk.return_value = {
+        "results": [{"ok": True, "card": {"id": 8}}, {"ok": True, "id": 7}]
+    }
+
+    with patch("kanban.cli.KanbanClient", return_value=mock_client):
+        cmd_card_import(path=str(path), column=5, best_effort=False)
+
+    mock_client.cards_bulk.assert_called_once_with(
+        [
+            {"title": "Imported", "op": "create", "column_id": 5},
+            {"op": "delete", "id": 7},
+        ],
+        best_effort=False,
+    )
+
+
 def test_cli_card_update_command(client, auth_headers, test_user):
     from kanban.cli import cmd_card_update
     from kanban.config import set_token
@@ -923,6 +958,60 @@ def test_api_key_auth_ignores_a_renewed_token():
     assert get_token() == "stored-token"
 
 
+# === Conditional GETs ===
+#
+# The server tags board, listing and card reads with an ETag. Sending it back
+# turns a poll of something unchanged into a bodiless 304.
+
+
+def _client_with_responses(*responses):
+    from kanban.client import KanbanClient
+
+    kanban_client = KanbanClient(server_url="http://localhost:9999", token="t")
+    kanban_client.session = MagicMock()
+    kanban_client.session.request.side_effect = list(responses)
+    return kanban_client
+
+
+def _response(status_code, body=None, headers=None):
+    import json
+
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = json.dumps(body).encode()
+    response.json.return_value = body
+    return response
+
+
+def test_client_revalidates_a_get_and_reuses_the_body_on_304():
+    kanban_client = _client_with_responses(
+        _response(200, {"id": 7, "name": "Dev"}, {"ETag": '"v1"'}),
+        _response(304),
+    )
+
+    kanban_client.board_get(7)
+    second = kanban_client.board_get(7)
+
+    first_call, second_call = kanban_client.session.request.call_args_list
+    assert "If-None-Match" not in (first_call.kwargs.get("headers") or {})
+    assert second_call.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert second == {"id": 7, "name": "Dev"}
+
+
+def test_client_never_sends_a_validator_on_a_write():
+    kanban_client = _client_with_responses(
+        _response(200, {"id": 7}, {"ETag": '"v1"'}),
+        _response(200, {"id": 7}),
+    )
+
+    kanban_client.board_get(7)
+    kanban_client.board_update(7, "Renamed")
+
+    write_call = kanban_client.session.request.call_args_list[1]
+    assert "If-None-Match" not in (write_call.kwargs.get("headers") or {})
+
+
 def test_expired_session_401_names_expiry():
     """'Not authenticated' alone reads like the credentials were never there."""
     import requests
@@ -937,3 +1026,119 @@ def test_expired_session_401_names_expiry():
 
     assert "expired" in message.lower()
     assert "kanban login" in message
+
+
+def test_client_batch_sends_queued_calls_as_one_request(client, test_user):
+    from kanban.client import KanbanClient, KanbanError
+
+    token = create_access_token(
+        data={"sub": test_user.id, "username": test_user.username}
+    )
+    board = Board.create_with_columns(owner=test_user, name="Batched")
+    kanban = KanbanClient(server_url="http://testserver", token=token)
+    kanban.session = client
+    client.headers.update({"Authorization": f"Bearer {token}"})
+
+    with patch.object(client, "request", wraps=client.request) as request:
+        with kanban.batch() as batch:
+            created = batch.card_create(board.columns[0].id, "From a batch")
+            missing = batch.board_get(999999)
+            with pytest.raises(KanbanError):
+                created.result  # not sent yet
+            loaded = batch.board_get(board.id)
+
+    assert request.call_count == 1
+    assert created.result["title"] == "From a batch"
+    assert [c["id"] for c in loaded.result["columns"][0]["cards"]] == [
+        created.result["id"]
+    ]
+    assert missing.status == 404
+    with pytest.raises(KanbanError, match="Board not found"):
+        missing.result
+    with pytest.raises(AttributeError):
+        batch.login
+
+
+STREAMED_BOARD = {
+    "id": 7,
+    "name": "Big",
+    "created_at": "2024-01-01T00:00:00",
+    "shared_team_id": None,
+    "is_public_to_org": False,
+    "owner_id": 1,
+    "columns": [
+        {
+            "id": 1,
+            "name": "To Do",
+            "position": 0,
+            "cards": [
+                {
+                    "id": 10,
+                    "title": "[] in a title",
+                    "description": None,
+                    "position": 0,
+                    "comments": [{"id": 3, "content": "soon"}],
+                },
+                {
+                    "id": 11,
+                    "title": "b",
+                    "description": "x",
+                    "position": 1,
+                    "comments": [],
+                },
+            ],
+        },
+        {"id": 2, "name": "Done", "position": 1, "cards": []},
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "board", [STREAMED_BOARD, {**STREAMED_BOARD, "columns": []}]
+)
+def test_cli_board_get_json_prints_the_stream_a_card_at_a_time(
+    capsys, json_mode, board
+):
+    """What emit() would print for the whole board, bar the key order."""
+    from kanban.cli import cmd_board_get
+    from kanban.client import board_records
+    from kanban.config import set_token
+
+    set_token("test-token")
+    mock_client = MagicMock()
+    mock_client.board_stream.return_value = board_records(board)
+
+    with patch("kanban.cli.KanbanClient", return_value=mock_client):
+        cmd_board_get(board_id=7)
+
+    mock_client.board_get.assert_not_called()
+    columns_last = {key: value for key, value in board.items() if key != "columns"}
+    columns_last["columns"] = board["columns"]
+    assert capsys.readouterr().out == json.dumps(columns_last, indent=2) + "\n"
+
+
+@pytest.mark.parametrize(
+    "content_type, lines",
+    [
+        ("application/x-ndjson", None),
+        # A server from before ?stream= ignores it.
+        ("application/json", [json.dumps(STREAMED_BOARD).encode()]),
+    ],
+)
+def test_client_board_stream_reads_records(content_type, lines):
+    from kanban.client import KanbanClient, board_records
+
+    records = list(board_records(STREAMED_BOARD))
+    response = MagicMock()
+    response.headers = {"Content-Type": content_type}
+    response.iter_lines.return_value = lines or [
+        json.dumps(record).encode() for record in records
+    ]
+    response.json.return_value = STREAMED_BOARD
+    kanban = KanbanClient(server_url="http://testserver", token="t")
+    kanban.session = MagicMock()
+    kanban.session.request.return_value = response
+
+    assert list(kanban.board_stream(7)) == records
+    kanban.session.request.assert_called_once()
+    assert kanban.session.request.call_args.kwargs["params"] == {"stream": "ndjson"}
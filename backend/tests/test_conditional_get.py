@@ -0,0 +1,131 @@
+"""ETag / If-None-Match on the endpoints clients poll.
+
+A poll that finds nothing changed should cost a version check and a bare 304,
+not a full board body. The validator has to change with every write that
+changes the body, and a matching one must never bypass the permission check.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.auth import create_access_token
+from backend.main import app
+from backend.models import Board, Card, User
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user, etag=None):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    headers = {"Authorization": f"Bearer {token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    return headers
+
+
+@pytest.fixture
+def board(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Polled")
+    Card.create(column=board.columns[0], title="Only card", position=0)
+    return board
+
+
+def _card_id(board):
+    return board.columns[0].cards[0].id
+
+
+def _paths(board):
+    return [
+        f"/api/boards/{board.id}",
+        "/api/boards",
+        "/api/organizations",
+        f"/api/cards/{_card_id(board)}",
+    ]
+
+
+def test_every_polled_endpoint_answers_a_matching_validator_with_304(
+    client, test_user, board
+):
+    client.post("/api/organizations", json={"name": "Org"}, headers=_headers(test_user))
+
+    for path in _paths(board):
+        first = client.get(path, headers=_headers(test_user))
+        assert first.status_code == 200, path
+        etag = first.headers["ETag"]
+        assert etag.startswith('"') and not etag.startswith("W/"), path
+
+        again = client.get(path, headers=_headers(test_user, etag))
+
+        assert again.status_code == 304, path
+        assert again.content == b"", path
+        assert again.headers["ETag"] == etag, path
+
+
+def test_a_write_changes_the_board_card_and_listing_validators(
+    client, test_user, board
+):
+    paths = _paths(board)
+    paths.remove("/api/organizations")
+    etags = {p: client.get(p, headers=_headers(test_user)).headers["ETag"] for p in paths}
+
+    client.post(
+        f"/api/boards/{board.id}", json={"name": "Renamed"}, headers=_headers(test_user)
+    )
+
+    for path, etag in etags.items():
+        response = client.get(path, headers=_headers(test_user, etag))
+        assert response.status_code == 200, path
+        assert response.headers["ETag"] != etag, path
+
+
+def test_a_comment_changes_the_cards_validator(client, test_user, board):
+    path = f"/api/cards/{_card_id(board)}"
+    etag = client.get(path, headers=_headers(test_user)).headers["ETag"]
+
+    client.post(
+        "/api/comments",
+        json={"card_id": _card_id(board), "content": "new"},
+        headers=_headers(test_user),
+    )
+
+    assert client.get(path, headers=_headers(test_user, etag)).status_code == 200
+
+
+def test_creating_a_board_changes_the_listing_validator(client, test_user, board):
+    etag = client.get("/api/boards", headers=_headers(test_user)).headers["ETag"]
+
+    client.post("/api/boards", json={"name": "Second"}, headers=_headers(test_user))
+
+    response = client.get("/api/boards", headers=_headers(test_user, etag))
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_a_validator_does_not_skip_the_permission_check(client, test_user, board):
+    etag = client.get(f"/api/boards/{board.id}", headers=_headers(test_user)).headers[
+        "ETag"
+    ]
+    stranger = User.create_user("etag_stranger", "pw")
+
+    response = client.get(f"/api/boards/{board.id}", headers=_headers(stranger, etag))
+
+    assert response.status_code == 403
+
+
+def test_weak_and_listed_validators_still_match(client, test_user, board):
+    path = f"/api/boards/{board.id}"
+    etag = client.get(path, headers=_headers(test_user)).headers["ETag"]
+
+    listed = client.get(path, headers=_headers(test_user, f'"other", W/{etag}'))
+
+    assert listed.status_code == 304
+
+
+def test_a_200_still_carries_the_full_body(client, test_user, board):
+    response = client.get(f"/api/boards/{board.id}", headers=_headers(test_user))
+
+    assert response.json()["columns"][0]["cards"][0]["title"] == "Only card"
+    assert "no-cache" in response.headers["Cache-Control"]
@@ -0,0 +1,52 @@
+"""manage.py copy-to: every row of one database into another.
+
+Run here SQLite to SQLite; the command is the same against Postgres, which
+additionally has its id sequences moved past the copied ids.
+"""
+
+import argparse
+
+import pytest
+from peewee_migrate import Router
+
+import manage
+from backend.database import connect_database
+from backend.models import ALL_MODELS, Board, Card, Comment
+
+
+def _copy_to(url, batch_size=2):
+    manage.cmd_copy_to(argparse.Namespace(url=url, batch_size=batch_size))
+
+
+def _counts(database):
+    with database.bind_ctx(ALL_MODELS):
+        return {model.__name__: model.select().count() for model in ALL_MODELS}
+
+
+def test_every_row_arrives_with_its_id(tmp_path, test_user, db_session):
+    board = Board.create_with_columns(owner=test_user, name="Moving")
+    for n in range(5):
+        card = Card.create(column=board.columns[0], title=f"card {n}", position=n)
+        Comment.create_comment(card, test_user, f"on {n}")
+    url = f"sqlite:///{tmp_path / 'copy.db'}"
+
+    _copy_to(url)
+
+    target = connect_database(url)
+    assert _counts(target) == _counts(db_session)
+    with target.bind_ctx(ALL_MODELS):
+        copied = Card.get_by_id(card.id)
+        assert (copied.title, copied.column_id) == ("card 4", card.column_id)
+    # Created at the current schema, so no migration is left to run.
+    assert Router(target, migrate_dir=manage.MIGRATIONS_DIR).diff == []
+    target.close()
+
+
+def test_a_target_with_rows_is_refused(tmp_path, test_user, db_session):
+    url = f"sqlite:///{tmp_path / 'copy.db'}"
+    _copy_to(url)
+
+    with pytest.raises(SystemExit):
+        _copy_to(url)
+
+    assert _counts(connect_database(url))["User"] == 1
@@ -0,0 +1,96 @@
+"""The bcrypt process pool behind passwords and API keys."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.auth import create_access_token
+from backend.hashing import HashingBusy, HashingService, password_hasher
+from backend.main import app
+from backend.models import User
+
+
+def test_a_hash_made_in_the_pool_checks_out():
+    hashed = password_hasher.hash("correct horse")
+
+    assert hashed.startswith("$2")
+    assert password_hasher.check("correct horse", hashed)
+    assert not password_hasher.check("battery staple", hashed)
+
+
+@pytest.mark.asyncio
+async def test_the_async_facade_matches_the_blocking_one():
+    hashed = await password_hasher.hash_async("correct horse")
+
+    assert await password_hasher.check_async("correct horse", hashed)
+    assert not await password_hasher.check_async("battery staple", hashed)
+
+
+def test_hashing_inline_when_the_pool_is_turned_off():
+    service = HashingService(workers=0)
+
+    assert service.check("pw", service.hash("pw"))
+    assert service.stats()["completed"] == 2
+
+
+def test_a_full_queue_refuses_rather_than_grows():
+    service = HashingService(workers=1, max_pending=1)
+    # As if the one slot were taken by a hash still running.
+    service.pending = 1
+
+    with pytest.raises(HashingBusy):
+        service.hash("pw")
+
+    assert service.stats()["rejected"] == 1
+
+
+def test_stats_report_depth_and_latency():
+    service = HashingService(workers=1, max_pending=4)
+    try:
+        service.check("pw", service.hash("pw"))
+        stats = service.stats()
+    finally:
+        service.shutdown()
+
+    assert stats["pending"] == 0
+    assert stats["completed"] == 2
+    assert stats["p50_ms"] > 0 and stats["p99_ms"] >= stats["p50_ms"]
+
+
+def test_a_busy_pool_answers_login_with_503(db_session, monkeypatch):
+    User.create_user("busy_user", "pw")
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = TestClient(app).post(
+        "/api/token", json={"username": "busy_user", "password": "pw"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_a_busy_pool_answers_admin_user_creation_with_503(db_session, monkeypatch):
+    admin = User.create_user("busy_admin", "pw", admin=True)
+    token = create_access_token(data={"sub": admin.id, "username": admin.username})
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = TestClient(app).post(
+        "/api/admin/users",
+        json={"username": "queued", "password": "password123"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_concurrent_logins_share_the_pool(db_session):
+    hashed = password_hasher.hash("pw")
+
+    results = await asyncio.gather(
+        *(password_hasher.check_async("pw", hashed) for _ in range(8))
+    )
+
+    assert all(results)
+    assert password_hasher.stats()["pending"] == 0
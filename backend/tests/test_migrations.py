@@ -86,3 +86,32 @@ def test_migrations_leave_a_fresh_install_unchanged():
                 "migrated database disagree. If a migration changed this "
                 "table, update the model to match -- or vice versa."
             )
+
+
+def test_orphaned_content_is_purged():
+    with tempfile.TemporaryDirectory() as tmp:
+        database = SqliteDatabase(os.path.join(tmp, "orphans.db"))
+        with database.bind_ctx(ALL_MODELS):
+            database.connect()
+            database.create_tables(ALL_MODELS)
+            # What the old per-row deletes left behind: a board's column, and
+            # a card's comment, outliving their parents.
+            database.execute_sql(
+                "INSERT INTO \"column\" (id, board_id, name, position) "
+                "VALUES (1, 99, 'left', 0)"
+            )
+            database.execute_sql(
+                "INSERT INTO card (id, column_id, title, position) "
+                "VALUES (1, 1, 'stranded', 0)"
+            )
+            database.execute_sql(
+                "INSERT INTO comment (id, card_id, user_id, content, created_at) "
+                "VALUES (1, 1, 99, 'hello?', '2024-01-01')"
+            )
+            Router(database, migrate_dir=MIGRATIONS_DIR).run()
+            counts = [
+                database.execute_sql(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in ("column", "card", "comment")
+            ]
+            database.close()
+        assert counts == [0, 0, 0]
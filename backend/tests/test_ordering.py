@@ -0,0 +1,215 @@
+"""POST /api/cards/{id}/move and /api/columns/{id}/move: a move writes the
+one row it moves, and the order it leaves is the order that was asked for.
+/reorder writes every position it is sent in one statement.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.auth import create_access_token
+from backend.bulk import MAX_PARAMETERS, rows_per_statement
+from backend.main import app
+from backend.models import Board, Card, Column
+from backend.ordering import POSITION_GAP
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def headers(test_user):
+    token = create_access_token(
+        data={"sub": test_user.id, "username": test_user.username}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    return Board.create_with_columns(owner=test_user, name="Ordered")
+
+
+def _cards(column, count):
+    """`count` cards on adjacent positions, 0, 1, 2...: no room between any."""
+    Card.insert_many(
+        [
+            {"column": column, "title": f"card {n}", "position": n}
+            for n in range(count)
+        ]
+    ).execute()
+    return [card.id for card in column.cards.order_by(Card.position, Card.id)]
+
+
+def _created(client, headers, column, count):
+    """`count` cards appended through the API, as clients add them."""
+    operations = [
+        {"op": "create", "column_id": column.id, "title": f"card {n}"}
+        for n in range(count)
+    ]
+    response = client.post(
+        "/api/cards/bulk", json={"operations": operations}, headers=headers
+    )
+    return [result["card"]["id"] for result in response.json()["results"]]
+
+
+def _order(client, headers, board, index=0):
+    body = client.get(f"/api/boards/{board.id}", headers=headers).json()
+    return [card["id"] for card in body["columns"][index]["cards"]]
+
+
+def _move(client, headers, card_id, **body):
+    return client.post(f"/api/cards/{card_id}/move", json=body, headers=headers)
+
+
+def test_a_move_in_a_long_column_updates_one_row(client, headers, board):
+    ids = _created(client, headers, board.columns[0], 500)
+    client.get("/api/boards", headers=headers)  # authenticated, and cached
+
+    with count_queries() as queries:
+        response = _move(client, headers, ids[-1], after_id=ids[0], before_id=ids[1])
+
+    assert response.status_code == 200
+    updates = [q for q in queries.get_queries() if q.msg[0].startswith('UPDATE "card"')]
+    assert len(updates) == 1
+    assert _order(client, headers, board) == [ids[0], ids[-1]] + ids[1:-1]
+
+
+def test_a_move_without_room_respaces_the_column_once(client, headers, board):
+    ids = _cards(board.columns[0], 5)  # 0, 1, 2...: no room anywhere
+    version = Board.get_by_id(board.id).version
+
+    response = _move(client, headers, ids[4], after_id=ids[0])
+
+    assert response.status_code == 200
+    assert _order(client, headers, board) == [ids[0], ids[4], ids[1], ids[2], ids[3]]
+    delta = client.get(
+        f"/api/boards/{board.id}/changes", params={"since": version}, headers=headers
+    ).json()
+    assert sorted(card["id"] for card in delta["cards"]) == ids
+    # Room again: the next move into the same slot writes one row.
+    with count_queries() as queries:
+        _move(client, headers, ids[3], after_id=ids[0])
+    updates = [q for q in queries.get_queries() if q.msg[0].startswith('UPDATE "card"')]
+    assert len(updates) == 1
+
+
+def test_moves_keep_the_order_asked_for(client, headers, board):
+    ids = _cards(board.columns[0], 12)
+    expected = list(ids)
+    rng = random.Random(20)
+    for _ in range(60):
+        card_id = rng.choice(expected)
+        expected.remove(card_id)
+        slot = rng.randrange(len(expected) + 1)
+        body = {}
+        if slot > 0:
+            body["after_id"] = expected[slot - 1]
+        if slot < len(expected) and rng.random() < 0.5:
+            body["before_id"] = expected[slot]
+        elif slot == 0:
+            body["before_id"] = expected[0]
+        expected.insert(slot, card_id)
+        assert _move(client, headers, card_id, **body).status_code == 200
+
+    assert _order(client, headers, board) == expected
+
+
+def test_a_card_moves_to_another_column(client, headers, board):
+    todo = _cards(board.columns[0], 2)
+    done = _cards(board.columns[1], 2)
+
+    _move(client, headers, todo[0], before_id=done[1])
+    _move(client, headers, todo[1], column_id=board.columns[1].id)
+
+    assert _order(client, headers, board, 0) == []
+    assert _order(client, headers, board, 1) == [done[0], todo[0], done[1], todo[1]]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"after_id": "second", "before_id": "first"},
+        {"after_id": "other", "column_id": "own"},
+    ],
+)
+def test_neighbours_out_of_place_are_refused(client, headers, board, body):
+    first, second, moving = _cards(board.columns[0], 3)
+    (other,) = _cards(board.columns[1], 1)
+    names = {
+        "first": first,
+        "second": second,
+        "other": other,
+        "own": board.columns[0].id,
+    }
+
+    response = _move(
+        client, headers, moving, **{key: names[value] for key, value in body.items()}
+    )
+
+    assert response.status_code == 400
+
+
+def test_a_column_moves_next_to_another(client, headers, board):
+    first, second, third = [column.id for column in board.columns]
+
+    response = client.post(
+        f"/api/columns/{third}/move", json={"before_id": first}, headers=headers
+    )
+
+    assert response.status_code == 200
+    body = client.get(f"/api/boards/{board.id}", headers=headers).json()
+    assert [column["id"] for column in body["columns"]] == [third, first, second]
+
+
+def test_a_card_created_without_a_position_goes_last(client, headers, board):
+    column = board.columns[0]
+    ids = _created(client, headers, column, 2)
+    ids.append(
+        client.post(
+            "/api/cards", json={"column_id": column.id, "title": "next"}, headers=headers
+        ).json()["id"]
+    )
+
+    response = client.post(
+        "/api/cards", json={"column_id": column.id, "title": "last"}, headers=headers
+    )
+
+    assert _order(client, headers, board) == ids + [response.json()["id"]]
+    positions = [card.position for card in column.cards.order_by(Card.position)]
+    assert positions == [n * POSITION_GAP for n in range(4)]
+
+
+def test_new_rows_leave_room_to_move_between(client, headers, test_user):
+    board_id = client.post(
+        "/api/boards", json={"name": "Roomy"}, headers=headers
+    ).json()["id"]
+    columns = list(Board.get_by_id(board_id).columns.order_by(Column.position))
+    appended = client.post(
+        "/api/columns", json={"board_id": board_id, "name": "Done"}, headers=headers
+    ).json()
+
+    positions = [column.position for column in columns] + [appended["position"]]
+    assert positions == [n * POSITION_GAP for n in range(len(positions))]
+
+
+def test_a_long_reorder_writes_positions_in_batches(client, headers, board):
+    ids = _cards(board.columns[0], rows_per_statement(3) + 10)
+    payload = {
+        "cards": [
+            {"id": card_id, "position": len(ids) - n} for n, card_id in enumerate(ids)
+        ]
+    }
+
+    with count_queries() as queries:
+        response = client.post("/api/cards/reorder", json=payload, headers=headers)
+
+    assert response.status_code == 200
+    updates = [q for q in queries.get_queries() if q.msg[0].startswith('UPDATE "card"')]
+    assert len(updates) == 2
+    assert all(len(q.msg[1]) <= MAX_PARAMETERS for q in updates)
+    assert _order(client, headers, board) == ids[::-1]
@@ -0,0 +1,218 @@
+"""The BoardEvent outbox that carries board changes between uvicorn workers.
+
+The last test is the real thing: two uvicorn processes sharing one SQLite
+file, a stream on one and writes through the other, timing how long each
+write takes to arrive.
+"""
+
+import os
+import queue
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from backend.changes import UPSERT, record_changes
+from backend.models import Board, BoardEvent
+from backend.outbox import OutboxTailer, latest_event_id, prune_events, read_events
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_every_recorded_change_lands_in_the_outbox(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Outboxed")
+    before = latest_event_id()
+
+    record_changes([(board.id, "board", board.id, UPSERT)])
+
+    last, board_ids, more = read_events(before)
+    assert board_ids == {board.id}
+    assert last == latest_event_id() and not more
+
+
+def test_reading_pages_through_a_backlog(db_session):
+    for board_id in range(5):
+        BoardEvent.create(board_id=board_id, created_at=datetime.now(timezone.utc))
+
+    last, first_page, more = read_events(0, limit=3)
+    assert first_page == {0, 1, 2} and more
+    _, second_page, more = read_events(last, limit=3)
+    assert second_page == {3, 4} and not more
+
+
+def test_a_row_committed_after_a_later_one_is_still_read(db_session):
+    now = datetime.now(timezone.utc)
+    BoardEvent.create(id=10, board_id=1, created_at=now)
+    BoardEvent.create(id=12, board_id=2, created_at=now)
+    seen = set()
+    last, board_ids, _ = read_events(0, seen=seen)
+    assert (last, board_ids) == (12, {1, 2})
+
+    # Given its id before 12, committed after 12 was read.
+    BoardEvent.create(id=11, board_id=3, created_at=now)
+
+    last, board_ids, _ = read_events(last, seen=seen)
+    assert (last, board_ids) == (12, {3})
+    assert read_events(last, seen=seen)[1] == set()
+
+
+def test_pruning_keeps_the_newest_row(db_session):
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    for board_id in range(3):
+        BoardEvent.create(board_id=board_id, created_at=old)
+    newest = latest_event_id()
+
+    prune_events(retention=60)
+
+    assert [e.id for e in BoardEvent.select()] == [newest]
+
+
+class _Hub:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, board_id):
+        self.published.append(board_id)
+
+
+@pytest.mark.asyncio
+async def test_a_poll_publishes_each_board_written_since_the_last(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Tailed")
+    hub = _Hub()
+    tailer = OutboxTailer(hub)
+    tailer.skip_to_latest()
+
+    record_changes([(board.id, "board", board.id, UPSERT)])
+    record_changes([(board.id, "board", board.id, UPSERT)])
+    await tailer.poll()
+    await tailer.poll()
+
+    assert hub.published == [board.id]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+SETUP = """
+from backend.auth import create_access_token
+from backend.database import init_db
+from backend.models import Board, User
+
+init_db()
+user = User.create_user("outbox_user", "pw")
+board = Board.create_with_columns(owner=user, name="Fan-out")
+print(board.id, board.columns[0].id)
+print(create_access_token(data={"sub": user.id, "username": user.username}))
+"""
+
+
+@pytest.fixture
+def two_workers(tmp_path):
+    env = dict(
+        os.environ,
+        DATABASE_PATH=str(tmp_path / "fanout.db"),
+        JWT_SECRET_KEY="outbox-test-key",
+        BOARD_OUTBOX_POLL_SECONDS="0.1",
+    )
+    setup = subprocess.run(
+        [sys.executable, "-c", SETUP],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    ids, token = setup.stdout.strip().splitlines()[-2:]
+    board_id, column_id = map(int, ids.split())
+
+    ports = [_free_port(), _free_port()]
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(p)],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for p in ports
+    ]
+    try:
+        urls = [f"http://127.0.0.1:{p}" for p in ports]
+        deadline = time.monotonic() + 20
+        for url in urls:
+            while True:
+                try:
+                    httpx.get(f"{url}/api/health", timeout=1)
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.1)
+        yield urls, board_id, column_id, {"Authorization": f"Bearer {token}"}
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            # An open event stream holds up a graceful shutdown.
+            try:
+                worker.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+                worker.wait()
+
+
+def _listen(url, headers, events, stop):
+    try:
+        with httpx.stream("GET", url, headers=headers, timeout=None) as response:
+            for line in response.iter_lines():
+                if line.startswith("event: "):
+                    events.put((line[7:], time.monotonic()))
+                if stop.is_set():
+                    return
+    except httpx.TransportError:
+        # The worker shutting down under the open stream at teardown.
+        pass
+
+
+def test_a_write_on_one_worker_reaches_a_stream_on_another(two_workers):
+    (writer, reader), board_id, column_id, headers = two_workers
+    events = queue.Queue()
+    stop = threading.Event()
+    listener = threading.Thread(
+        target=_listen,
+        args=(f"{reader}/api/boards/{board_id}/events", headers, events, stop),
+        daemon=True,
+    )
+    listener.start()
+    assert events.get(timeout=10)[0] == "ready"
+
+    latencies = []
+    for n in range(10):
+        sent = time.monotonic()
+        response = httpx.post(
+            f"{writer}/api/cards",
+            json={"column_id": column_id, "title": f"card {n}", "position": n},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        event, received = events.get(timeout=5)
+        assert event == "delta"
+        latencies.append(received - sent)
+    stop.set()
+
+    print(
+        f"\ncross-worker delivery: median {statistics.median(latencies) * 1000:.0f}ms"
+        f", max {max(latencies) * 1000:.0f}ms"
+    )
+    # One poll interval (0.1s) plus the write and the read, with room for a
+    # loaded CI machine.
+    assert max(latencies) < 2
@@ -0,0 +1,156 @@
+"""Soft deletes: a delete hides a board, column or card at once, a restore
+brings it back within the retention window, and backend.purge removes it for
+good after that, a batch at a time.
+"""
+
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.auth import create_access_token
+from backend.main import app
+from backend.models import Board, Card, Column, Comment, User
+from backend.purge import Purger, retention_cutoff
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Soft")
+    for n in range(3):
+        card = Card.create(column=board.columns[0], title=f"card {n}", position=n)
+        Comment.create_comment(card=card, user=test_user, content="note")
+    return board
+
+
+def _get(client, user, board):
+    return client.get(f"/api/boards/{board.id}", headers=_headers(user))
+
+
+def test_a_deleted_card_is_hidden_and_can_be_restored(client, test_user, board):
+    before = _get(client, test_user, board).json()
+    card = board.columns[0].cards[0]
+    version = Board.get_by_id(board.id).version
+
+    client.delete(f"/api/cards/{card.id}", headers=_headers(test_user))
+
+    body = _get(client, test_user, board).json()
+    assert len(body["columns"][0]["cards"]) == 2
+    assert client.get(
+        f"/api/cards/{card.id}", headers=_headers(test_user)
+    ).status_code == 404
+    delta = client.get(
+        f"/api/boards/{board.id}/changes",
+        params={"since": version},
+        headers=_headers(test_user),
+    ).json()
+    assert delta["deleted"]["cards"] == [card.id]
+
+    response = client.post(
+        f"/api/cards/{card.id}/restore", headers=_headers(test_user)
+    )
+
+    assert response.status_code == 200
+    assert _get(client, test_user, board).json() == before
+
+
+def test_a_deleted_column_takes_its_cards_with_it_and_back(
+    client, test_user, board
+):
+    before = _get(client, test_user, board).json()
+    column = board.columns[0]
+
+    client.delete(f"/api/columns/{column.id}", headers=_headers(test_user))
+
+    body = _get(client, test_user, board).json()
+    assert column.id not in [c["id"] for c in body["columns"]]
+    card = column.cards[0]
+    response = client.put(
+        f"/api/cards/{card.id}", json={"title": "x"}, headers=_headers(test_user)
+    )
+    assert response.status_code == 404
+
+    client.post(f"/api/columns/{column.id}/restore", headers=_headers(test_user))
+
+    assert _get(client, test_user, board).json() == before
+
+
+def test_a_deleted_board_is_gone_until_its_owner_restores_it(
+    client, test_user, board
+):
+    other = User.create_user("bystander", "testpassword")
+    client.delete(f"/api/boards/{board.id}", headers=_headers(test_user))
+
+    assert _get(client, test_user, board).status_code == 404
+    assert client.get("/api/boards", headers=_headers(test_user)).json() == []
+    response = client.post(
+        f"/api/boards/{board.id}/restore", headers=_headers(other)
+    )
+    assert response.status_code == 403
+
+    client.post(f"/api/boards/{board.id}/restore", headers=_headers(test_user))
+
+    assert _get(client, test_user, board).status_code == 200
+    assert len(client.get("/api/boards", headers=_headers(test_user)).json()) == 1
+
+
+def test_nothing_is_restored_past_the_retention_window(client, test_user, board):
+    card = board.columns[0].cards[0]
+    client.delete(f"/api/cards/{card.id}", headers=_headers(test_user))
+    Card.update(deleted_at=retention_cutoff() - timedelta(minutes=1)).where(
+        Card.id == card.id
+    ).execute()
+
+    response = client.post(
+        f"/api/cards/{card.id}/restore", headers=_headers(test_user)
+    )
+
+    assert response.status_code == 404
+
+
+def test_the_purge_takes_only_what_is_past_retention(client, test_user, board):
+    expired, recent = board.columns[0].cards[:2]
+    client.delete(f"/api/cards/{expired.id}", headers=_headers(test_user))
+    client.delete(f"/api/cards/{recent.id}", headers=_headers(test_user))
+    Card.update(deleted_at=retention_cutoff() - timedelta(minutes=1)).where(
+        Card.id == expired.id
+    ).execute()
+
+    counts = Purger(pause=0).purge()
+
+    assert counts == {"boards": 0, "columns": 0, "cards": 1}
+    assert Card.get_or_none(Card.id == expired.id) is None
+    assert Card.get_or_none(Card.id == recent.id) is not None
+    assert Comment.select().count() == 2
+
+
+def test_the_purge_deletes_in_batches(client, test_user, board):
+    column = board.columns[1]
+    Card.insert_many(
+        [{"column": column, "title": f"bulk {n}", "position": n} for n in range(25)]
+    ).execute()
+    client.delete(f"/api/columns/{column.id}", headers=_headers(test_user))
+
+    with count_queries() as queries:
+        counts = Purger(batch_size=10, pause=0).purge(retention_cutoff(0))
+
+    assert counts == {"boards": 0, "columns": 1, "cards": 25}
+    batches = [
+        len(q.msg[1])
+        for q in queries.get_queries()
+        if q.msg[0].startswith('DELETE FROM "card" WHERE ("card"."id" IN (?')
+    ]
+    assert batches == [10, 10, 5]
+    assert Column.get_or_none(Column.id == column.id) is None
+    assert Card.select().count() == 3
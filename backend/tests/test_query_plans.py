@@ -0,0 +1,183 @@
+"""Query plans of the hot paths: no full table scans, no sorting.
+
+Each test runs one hot request, collects every SELECT it sent, and asks
+SQLite for each one's plan with EXPLAIN QUERY PLAN. A plan that reads a
+whole table or index (SCAN) or sorts its rows (USE TEMP B-TREE) means an
+index is missing or a query stopped fitting the one it was written for --
+nothing a test on the empty tables here would otherwise notice, and what a
+large production database pays for on every request.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+import backend.boards
+from backend.auth import create_access_token
+from backend.database import db
+from backend.main import app
+from backend.models import (
+    ApiKey,
+    Board,
+    Card,
+    Comment,
+    EmailVerificationToken,
+    Organization,
+    OrganizationInvite,
+    OrganizationMember,
+    User,
+)
+from backend.purge import Purger, retention_cutoff
+
+# Plan details that mean reading every row, or sorting them.
+FULL_SCAN = "SCAN "
+SORT = "USE TEMP B-TREE"
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def board(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Hot")
+    for column in board.columns:
+        for n in range(3):
+            card = Card.create(column=column, title=f"card {n}", position=n)
+            Comment.create_comment(card=card, user=test_user, content="note")
+    return board
+
+
+def _plan(sql, params):
+    rows = db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def _assert_indexed(queries):
+    """Fail on the first SELECT in `queries` that scans or sorts."""
+    selects = [
+        query.msg
+        for query in queries.get_queries()
+        if query.msg[0].lstrip().upper().startswith("SELECT")
+    ]
+    assert selects, "the request sent no SELECT to check"
+    for sql, params in selects:
+        plan = _plan(sql, params)
+        bad = [step for step in plan if step.startswith(FULL_SCAN) or SORT in step]
+        assert not bad, f"{sql}\n  plan: {plan}"
+
+
+def test_loading_a_board(client, test_user, board):
+    with count_queries() as queries:
+        response = client.get(f"/api/boards/{board.id}", headers=_headers(test_user))
+    assert response.status_code == 200
+    _assert_indexed(queries)
+
+
+def test_streaming_a_board(client, test_user, board, monkeypatch):
+    # Pages of two: every column's cards take a second, keyset page.
+    monkeypatch.setattr(backend.boards, "BOARD_STREAM_PAGE_SIZE", 2)
+    with count_queries() as queries:
+        response = client.get(
+            f"/api/boards/{board.id}?stream=json", headers=_headers(test_user)
+        )
+    assert response.status_code == 200
+    _assert_indexed(queries)
+
+
+def test_listing_boards(client, test_user, board):
+    with count_queries() as queries:
+        client.get("/api/boards", headers=_headers(test_user))
+    _assert_indexed(queries)
+
+
+def test_board_changes(client, test_user, board):
+    client.post(
+        f"/api/boards/{board.id}", json={"name": "x"}, headers=_headers(test_user)
+    )
+    with count_queries() as queries:
+        client.get(
+            f"/api/boards/{board.id}/changes",
+            params={"since": 0},
+            headers=_headers(test_user),
+        )
+    _assert_indexed(queries)
+
+
+def test_a_cards_comments(client, test_user, board):
+    card = board.columns[0].cards[0]
+    with count_queries() as queries:
+        client.get(f"/api/cards/{card.id}", headers=_headers(test_user))
+        client.get(f"/api/cards/{card.id}/comments", headers=_headers(test_user))
+    _assert_indexed(queries)
+
+
+def test_adding_a_column(client, test_user, board):
+    with count_queries() as queries:
+        client.post(
+            "/api/columns",
+            json={"board_id": board.id, "name": "Later"},
+            headers=_headers(test_user),
+        )
+    _assert_indexed(queries)
+
+
+def test_listing_pending_invites(client, test_user):
+    org = Organization.create_with_columns(name="Acme", slug="acme", owner=test_user)
+    OrganizationMember.create(
+        user=test_user, organization=org, joined_at=datetime.now(timezone.utc)
+    )
+    OrganizationInvite.create_invite(org, test_user)
+    with count_queries() as queries:
+        client.get(f"/api/organizations/{org.id}/invites", headers=_headers(test_user))
+    _assert_indexed(queries)
+
+
+def test_resending_a_verification_email(client, db_session):
+    user = User.create_user("fresh", "testpassword")
+    user.email = "fresh@example.com"
+    user.save()
+    EmailVerificationToken.create_for(user)
+    with count_queries() as queries:
+        client.post("/api/resend-verification", json={"email": "fresh@example.com"})
+    _assert_indexed(queries)
+
+
+def test_authenticating_with_an_api_key(client, test_user):
+    _, raw_key = ApiKey.create_key(test_user, "Hot Key")
+    with count_queries() as queries:
+        client.get("/api/boards", headers={"X-API-Key": raw_key})
+    _assert_indexed(queries)
+
+
+def test_purging(client, test_user, board):
+    client.delete(f"/api/columns/{board.columns[0].id}", headers=_headers(test_user))
+    with count_queries() as queries:
+        Purger(pause=0).purge(retention_cutoff(0))
+    _assert_indexed(queries)
+
+
+def test_bulk_card_operations(client, test_user, board):
+    column = board.columns[0]
+    card = column.cards[0]
+    operations = [
+        {"op": "create", "column_id": column.id, "title": "appended"},
+        {"op": "update", "id": card.id, "title": "renamed"},
+        {"op": "move", "id": column.cards[1].id, "before_id": card.id},
+    ]
+    with count_queries() as queries:
+        response = client.post(
+            "/api/cards/bulk",
+            json={"operations": operations},
+            headers=_headers(test_user),
+        )
+    assert response.status_code == 200
+    _assert_indexed(queries)
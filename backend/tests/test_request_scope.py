@@ -0,0 +1,146 @@
+"""RequestScope: rows loaded once and permission checks answered once per
+request, however many times a route asks."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from playhouse.test_utils import count_queries
+
+from backend.auth import create_access_token
+from backend.main import app
+from backend.models import Board, Card, Column, User
+from backend.scope import RequestScope
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _fill(board, n):
+    column = board.columns[0]
+    return [
+        Card.create(column=column, title=f"Card {i}", position=i) for i in range(n)
+    ]
+
+
+def _reorder_queries(client, user, cards):
+    payload = {
+        "cards": [
+            {"id": c.id, "position": len(cards) - i}
+            for i, c in enumerate(cards)
+        ]
+    }
+    # Authenticated once beforehand, so every measurement finds the user
+    # already cached.
+    client.get("/api/admin/status", headers=_headers(user))
+    with count_queries() as queries:
+        response = client.post(
+            "/api/cards/reorder", json=payload, headers=_headers(user)
+        )
+    assert response.status_code == 200
+    return queries.count
+
+
+def test_reordering_costs_the_same_for_two_cards_or_twenty(client, test_user):
+    small = Board.create_with_columns(owner=test_user, name="Small")
+    large = Board.create_with_columns(owner=test_user, name="Large")
+
+    few = _reorder_queries(client, test_user, _fill(small, 2))
+    many = _reorder_queries(client, test_user, _fill(large, 20))
+
+    # Positions go out in one UPDATE, however many cards there are.
+    assert many == few
+
+
+def test_moving_a_card_within_a_board_checks_access_once(client, test_user):
+    board = Board.create_with_columns(owner=test_user, name="Moves")
+    card = _fill(board, 1)[0]
+    target = board.columns[1]
+
+    with count_queries() as queries:
+        response = client.put(
+            f"/api/cards/{card.id}",
+            json={"column_id": target.id},
+            headers=_headers(test_user),
+        )
+
+    assert response.status_code == 200
+    # The board comes joined onto the card and the column; nothing goes back
+    # for it by id.
+    lookups = [
+        q
+        for q in queries.get_queries()
+        if 'FROM "board" AS "t1" WHERE ("t1"."id" = ?)' in q.msg[0]
+    ]
+    assert lookups == []
+
+
+def test_a_shared_board_is_looked_up_once_per_request(client, test_user):
+    owner = User.create_user("scope_owner", "pw")
+    board = Board.create_with_columns(owner=owner, name="Theirs")
+    cards = _fill(board, 5)
+
+    payload = {
+        "cards": [
+{"id": c.id, "position": i} for i, c in enumerate(cards)]
+    }
+    with count_queries() as queries:
+        response = client.post(
+            "/api/cards/reorder", json=payload, headers=_headers(test_user)
+        )
+
+    assert response.status_code == 403
+    grants = [q for q in queries.get_queries() if "user_board_access" in q.msg[0]]
+    assert len(grants) == 1
+
+
+def test_rows_are_loaded_once(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Mapped")
+    scope = RequestScope()
+
+    with count_queries() as queries:
+        first = scope.get(Board, board.id)
+        again = scope.get(Board, board.id)
+        many = scope.get_many(Board, [board.id, board.id + 1000])
+
+    assert first is again is many[board.id]
+    assert list(many) == [board.id]
+    # The board, then the one id that was not already in the map.
+    assert queries.count == 2
+    assert scope.hits == 2
+
+
+def test_joined_rows_are_remembered(test_user):
+    board = Board.create_with_columns(owner=test_user, name="Joined")
+    card = _fill(board, 1)[0]
+    scope = RequestScope()
+    scope.get(Card, card.id, Card.select(Card, Column, Board).join(Column).join(Board))
+
+    with count_queries() as queries:
+        assert scope.get(Board, board.id).name == "Joined"
+
+    assert queries.count == 0
+
+
+def test_a_memoized_answer_is_computed_once_across_threads():
+    scope = RequestScope()
+    calls = []
+
+    def ask(_):
+        return scope.memo(("modify", 1, 1), lambda: calls.append(1) or True)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(ask, range(200)))
+
+    assert all(answers)
+    # Racing first callers may each compute, but every caller sees one value
+    # and later ones never compute at all.
+    assert len(calls) <= 8
+    assert scope.hits >= 200 - 8
@@ -0,0 +1,305 @@
+"""Per-organization shards: content in a file per organization, users and
+boards in the catalog, and manage.py moving boards between the two.
+
+Sharding is switched on per test by pointing db.shard_directory at a
+temporary directory; the catalog stays the suite's in-memory database.
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from peewee import OperationalError
+
+import manage
+from backend.auth import create_access_token
+from backend.database import SHARD_ID_BITS, SHARD_LIMIT, db, using_shard
+from backend.main import app
+from backend.models import (
+    Board,
+    Card,
+    Column,
+    Comment,
+    Organization,
+    OrganizationMember,
+    ShardPlacement,
+    User,
+)
+from backend.purge import Purger, retention_cutoff
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def sharded(tmp_path, db_session):
+    db.shard_directory = str(tmp_path)
+    yield tmp_path
+    db.close_shards()
+    db.shard_directory = ""
+
+
+def _headers(user):
+    token = create_access_token(data={"sub": user.id, "username": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _member(name):
+    user = User.create_user(name, "testpassword")
+    org = Organization.create_with_columns(name=name, slug=name, owner=user)
+    OrganizationMember.create(
+        user=user, organization=org, joined_at=datetime.now(timezone.utc)
+    )
+    return user, org
+
+
+def _board_with_card(client, user):
+    headers = _headers(user)
+    board = client.post("/api/boards", json={"name": "Work"}, headers=headers)
+    board_id = board.json()["id"]
+    column_id = client.get(f"/api/boards/{board_id}", headers=headers).json()[
+        "columns"
+    ][0]["id"]
+    card = client.post(
+        "/api/cards",
+        json={"column_id": column_id, "title": "Ship it", "position": 0},
+        headers=headers,
+    ).json()
+    client.post(
+        "/api/comments",
+        json={"card_id": card["id"], "content": "soon"},
+        headers=headers,
+    )
+    return board_id, column_id, card["id"]
+
+
+def test_an_organizations_content_lives_in_its_own_file(client, sharded):
+    user, org = _member("acme")
+    board_id, column_id, card_id = _board_with_card(client, user)
+
+    assert ShardPlacement.shard_of("board", board_id) == org.id
+    assert card_id >> SHARD_ID_BITS == org.id
+    assert os.path.exists(db.shard_path(org.id))
+    # Nothing but the board itself in the catalog.
+    assert Column.select().count() == Card.select().count() == 0
+    with using_shard(org.id):
+        assert Card.get_by_id(card_id).title == "Ship it"
+
+    body = client.get(f"/api/boards/{board_id}", headers=_headers(user)).json()
+    card = body["columns"][0]["cards"][0]
+    assert card["title"] == "Ship it"
+    assert card["comments"][0]["username"] == "acme"
+    # Versions and the change log are kept in the catalog, after the shard.
+    delta = client.get(
+        f"/api/boards/{board_id}/changes",
+        params={"since": 0},
+        headers=_headers(user),
+    ).json()
+    assert delta["version"] == Board.get_by_id(board_id).version == 2
+    assert [c["id"] for c in delta["cards"]] == [card_id]
+
+
+def test_a_streamed_board_is_read_from_its_shard(client, sharded):
+    user, _ = _member("streamer")
+    board_id, _, _ = _board_with_card(client, user)
+    url = f"/api/boards/{board_id}"
+
+    whole = client.get(url, headers=_headers(user))
+    streamed = client.get(url, params={"stream": "json"}, headers=_headers(user))
+
+    assert streamed.content == whole.content
+    assert "Ship it" in streamed.text
+
+
+def test_requests_share_a_bounded_pool_of_shard_connections(
+    client, sharded, monkeypatch
+):
+    boards = []
+    for name in ("pool_a", "pool_b"):
+        user, _ = _member(name)
+        boards.append((_board_with_card(client, user)[0], user))
+
+    with patch("backend.database.sqlite3.connect", wraps=sqlite3.connect) as connect:
+        for _ in range(10):
+            for board_id, user in boards:
+                # Not the board itself, which the snapshot cache would serve.
+                response = client.get(
+                    f"/api/boards/{board_id}/changes?since=0", headers=_headers(user)
+                )
+                assert response.status_code == 200
+
+    # Back in the pool after each request, whichever thread served it.
+    assert not [c for c in connect.call_args_list if "org_" in str(c.args[0])]
+    assert db.shard_stats()["idle"] == 2
+
+    monkeypatch.setattr(db, "shard_pool_size", 1)
+    board_id, user = boards[0]
+    client.get(f"/api/boards/{board_id}/changes?since=0", headers=_headers(user))
+    assert db.shard_stats()["idle"] == 1
+
+
+def test_every_id_a_shard_hands_out_is_exact_in_javascript(client, sharded):
+    owner = User.create_user("numbering", "testpassword")
+    # Puts the next two organizations at the last shard and just past it.
+    Organization.create(
+        id=SHARD_LIMIT - 2,
+        name="filler",
+        slug="filler",
+        owner=owner,
+        created_at=datetime.now(timezone.utc),
+    )
+    last_user, last = _member("last")
+    past_user, past = _member("past")
+    assert (last.id, past.id) == (SHARD_LIMIT - 1, SHARD_LIMIT)
+
+    board_id, _, card_id = _board_with_card(client, last_user)
+    assert ShardPlacement.shard_of("board", board_id) == last.id
+    assert card_id >> SHARD_ID_BITS == last.id and card_id < 2**53
+
+    board_id, _, card_id = _board_with_card(client, past_user)
+    assert ShardPlacement.shard_of("board", board_id) == 0
+    assert Card.get_by_id(card_id).title == "Ship it"
+
+
+def test_a_failed_catalog_update_is_owed_not_a_500(client, sharded, monkeypatch):
+    from backend import changes
+    from backend.shards import settle_owed
+
+    user, _ = _member("owing")
+    board_id, column_id, _ = _board_with_card(client, user)
+    version = Board.get_by_id(board_id).version
+    record_changes = changes.record_changes
+
+    def failing(_):
+        raise OperationalError("disk I/O error")
+
+    monkeypatch.setattr(changes, "record_changes", failing)
+    response = client.post(
+        "/api/cards",
+        json={"column_id": column_id, "title": "Kept"},
+        headers=_headers(user),
+    )
+    assert response.status_code == 200
+    assert Board.get_by_id(board_id).version == version
+
+    monkeypatch.setattr(changes, "record_changes", record_changes)
+    settle_owed()
+    assert Board.get_by_id(board_id).version == version + 1
+    delta = client.get(
+        f"/api/boards/{board_id}/changes",
+        params={"since": version},
+        headers=_headers(user),
+    ).json()
+    assert [card["title"] for card in delta["cards"]] == ["Kept"]
+
+
+def test_a_locked_shard_holds_up_only_its_own_organization(client, sharded):
+    busy, busy_org = _member("busy")
+    calm, _ = _member("calm")
+    _board_with_card(client, busy)
+    _, calm_column, _ = _board_with_card(client, calm)
+
+    # Another process mid bulk import into busy's shard.
+    importer = sqlite3.connect(db.shard_path(busy_org.id), isolation_level=None)
+    importer.execute("BEGIN IMMEDIATE")
+    try:
+        response = client.post(
+            "/api/cards",
+            json={"column_id": calm_column, "title": "Unblocked", "position": 1},
+            headers=_headers(calm),
+        )
+        assert response.status_code == 200
+    finally:
+        importer.execute("ROLLBACK")
+        importer.close()
+
+
+def test_cards_stay_within_their_organization(client, sharded):
+    user, _ = _member("one")
+    other, _ = _member("two")
+    _, _, card_id = _board_with_card(client, user)
+    _, other_column, _ = _board_with_card(client, other)
+
+    response = client.put(
+        f"/api/cards/{card_id}",
+        json={"column_id": other_column},
+        headers=_headers(user),
+    )
+    assert response.status_code == 400
+
+
+def test_purging_a_deleted_board_empties_its_shard(client, sharded):
+    user, org = _member("gone")
+    board_id, _, _ = _board_with_card(client, user)
+
+    response = client.delete(f"/api/boards/{board_id}", headers=_headers(user))
+    Purger(pause=0).purge(retention_cutoff(0))
+
+    assert response.status_code == 200
+    assert Board.get_or_none(Board.id == board_id) is None
+    assert ShardPlacement.select().count() == 0
+    with using_shard(org.id):
+        assert Column.select().count() == Card.select().count() == 0
+        assert Comment.select().count() == 0
+
+
+def test_split_and_merge_round_trip(client, tmp_path, db_session):
+    user, org = _member("legacy")
+    loner = User.create_user("loner", "testpassword")
+    board_id, _, card_id = _board_with_card(client, user)
+    lone_board, _, _ = _board_with_card(client, loner)
+    before = client.get(f"/api/boards/{board_id}", headers=_headers(user)).json()
+
+    db.shard_directory = str(tmp_path)
+    try:
+        manage.cmd_shard_split(argparse.Namespace())
+
+        assert ShardPlacement.shard_of("board", board_id) == org.id
+        # Kept its old id, so found through its placement.
+        assert ShardPlacement.shard_of("card", card_id) == org.id
+        assert ShardPlacement.shard_of("board", lone_board) == 0
+        assert Card.select().count() == 1  # the loner's, still in the catalog
+        card = client.get(f"/api/cards/{card_id}", headers=_headers(user))
+        assert card.json()["title"] == "Ship it"
+        after = client.get(f"/api/boards/{board_id}", headers=_headers(user))
+        assert after.json() == before
+
+        manage.cmd_shard_merge(argparse.Namespace())
+
+        assert ShardPlacement.select().count() == 0
+        assert Card.select().count() == 2
+        assert not os.listdir(tmp_path)
+    finally:
+        db.close_shards()
+        db.shard_directory = ""
+    merged = client.get(f"/api/boards/{board_id}", headers=_headers(user))
+    assert merged.json() == before
+
+
+def test_migrate_refuses_while_boards_live_in_shards(client, sharded, capsys):
+    user, _ = _member("unmigrated")
+    _board_with_card(client, user)
+
+    with pytest.raises(SystemExit):
+        manage.cmd_migrate(argparse.Namespace(list=False, fake=False))
+
+    assert "shard-merge" in capsys.readouterr().err
+
+
+def test_deleting_a_user_clears_their_shards(client, sharded):
+    user, org = _member("leaving")
+    admin = User.create_user("root", "testpassword", admin=True)
+    _board_with_card(client, user)
+
+    response = client.delete(f"/api/admin/users/{user.id}", headers=_headers(admin))
+
+    assert response.status_code == 200
+    assert ShardPlacement.select().count() == 0
+    with using_shard(org.id):
+        assert Column.select().count() == Comment.select().count() == 0
@@ -18,6 +18,7 @@ from backend.models import (
     EmailVerificationToken,
 )
 from backend.auth import create_access_token
+from backend.hashing import password_hasher
 
 
 @pytest.fixture
@@ -96,6 +97,25 @@ class TestSignup:
         assert response.status_code == 400
         assert "email" in response.json()["detail"].lower()
 
+    def test_signup_losing_a_race_for_the_username_is_rejected(
+        self, client, sent, db_session, monkeypatch
+    ):
+        """Another signup for the name commits while this one's password is
+        hashing, after the name was checked free."""
+        username = unique("racer").replace("-", "_")
+        hash_async = password_hasher.hash_async
+
+        async def racing_hash(secret):
+            User.create_user(username, secret, email=f"{username}@example.com")
+            return await hash_async(secret)
+
+        monkeypatch.setattr(password_hasher, "hash_async", racing_hash)
+        response, _, _ = signup(client, username=username)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Username is already taken"
+        assert sent == []
+
     def test_invalid_email_rejected(self, client, sent, db_session):
         response, _, _ = signup(client, email="not-an-email")
         assert response.status_code == 400
@@ -0,0 +1,61 @@
+"""Blocking work stays off the event loop.
+
+The routes query SQLite through peewee and logins run bcrypt, and both block.
+They run on the threadpool, so a slow login cannot hold up a health check or
+an event stream being served by the same worker.
+"""
+
+import asyncio
+import inspect
+import time
+
+import httpx
+import pytest
+from fastapi.routing import APIRoute
+
+from backend.api import api
+from backend.main import app
+from backend.models import User
+
+
+# Await the hashing pool and put their own queries on the threadpool, or --
+# /batch -- await calls that each run on the threadpool themselves.
+ASYNC_ROUTES = {"/token", "/signup", "/batch"}
+
+
+def test_no_api_route_runs_on_the_event_loop():
+    routes = [route for route in api.routes if isinstance(route, APIRoute)]
+    on_loop = {
+        route.path for route in routes if inspect.iscoroutinefunction(route.endpoint)
+    }
+
+    assert routes and on_loop == ASYNC_ROUTES
+
+
+@pytest.mark.asyncio
+async def test_health_answers_while_logins_are_hashing(db_session):
+    User.create_user("pool_user", "pool-password")
+    transport = httpx.ASGITransport(app=app)
+    credentials = {"username": "pool_user", "password": "pool-password"}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        started = time.perf_counter()
+        response = await client.post("/api/token", json=credentials)
+        one_login = time.perf_counter() - started
+        assert response.status_code == 200
+
+        logins = [
+            asyncio.create_task(client.post("/api/token", json=credentials))
+            for _ in range(2)
+        ]
+        health = []
+        while not all(task.done() for task in logins):
+            started = time.perf_counter()
+            response = await client.get("/api/health")
+            health.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        await asyncio.gather(*logins)
+
+    # Hashing on the loop, a health check arriving mid-login would wait for
+    # the whole of it.
+    assert max(health) < one_login / 2
@@ -0,0 +1,87 @@
+"""In-process cache of User rows by id, for authentication.
+
+Every authenticated request turns a token or an API key into a user id and
+then needs that user's row. The same handful of users make nearly all the
+requests, so the row is kept here for USER_CACHE_TTL_SECONDS, and a warm
+request authenticates without touching the database.
+
+User.save() and User.delete_instance() drop the entry on this worker, which
+covers every route that edits or deletes a user. Another worker can go on
+serving the old row -- an admin flag just revoked, say -- for up to the TTL.
+
+Rows are kept as their column values, not as objects: each hit builds a
+fresh User, so a handler changing its copy cannot change anyone else's.
+
+Per process, bounded to USER_CACHE_SIZE entries, least recently used out
+first.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "4096"))
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "30"))
+
+
+class UserCache:
+    """user id -> a User row's values, LRU and time-bounded."""
+
+    def __init__(self, size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Auth dependencies run on the threadpool.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """A fresh User for `user_id`, or None if not cached."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            model, data = entry[1], entry[2]
+        user = model(**data)
+        user._dirty.clear()
+        return user
+
+    def put(self, user):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries.pop(user.id, None)
+            self._entries[user.id] = (
+                time.monotonic() + self.ttl,
+                type(user),
+                dict(user.__data__),
+            )
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+user_cache = UserCache()
@@ -9,6 +9,7 @@ function handleExpiredSession() {
   redirectingToLogin = true;
   localStorage.removeItem('token');
   localStorage.removeItem('user');
+  clearValidators();
   if (window.location.pathname !== '/login') {
     // Mirror ProtectedRoute so the user lands back where they were after
     // logging in again.
@@ -17,11 +18,35 @@ function handleExpiredSession() {
   }
 }
 
+// endpoint -> { etag, data } from the last GET that came back with an ETag.
+// Sent back as If-None-Match, so polling a board that has not changed costs a
+// bare 304 instead of the whole board JSON. The MAX_VALIDATORS endpoints used
+// most recently are kept, and all of them are forgotten when the session
+// ends, so the next user of the tab never gets the last one's bodies back.
+const MAX_VALIDATORS = 100;
+const validators = new Map();
+
+export function clearValidators() {
+  validators.clear();
+}
+
+function rememberValidator(endpoint, entry) {
+  // A Map iterates in insertion order: re-inserting marks it most recent.
+  validators.delete(endpoint);
+  validators.set(endpoint, entry);
+  if (validators.size > MAX_VALIDATORS) {
+    validators.delete(validators.keys().next().value);
+  }
+}
+
 export async function apiFetch(endpoint, options = {}) {
   const token = localStorage.getItem('token');
+  const method = (options.method || 'GET').toUpperCase();
+  const cached = method === 'GET' ? validators.get(endpoint) : undefined;
   const headers = {
     'Content-Type': 'application/json',
     ...(token && { Authorization: `Bearer ${token}` }),
+    ...(cached && { 'If-None-Match': cached.etag }),
     ...options.headers,
   };
 
@@ -39,6 +64,13 @@ export async function apiFetch(endpoint, options = {}) {
     localStorage.setItem('token', renewedToken);
   }
 
+  // Before the error branch: a 304 is not response.ok. Cloned so a caller
+  // mutating what it gets back cannot change what the next 304 returns.
+  if (response.status === 304 && cached) {
+    rememberValidator(endpoint, cached);
+    return structuredClone(cached.data);
+  }
+
   if (!response.ok) {
     const error = await response.json().catch(() => ({ detail: 'Request failed' }));
     // A 401 on a request we sent a token with means the session is no longer
@@ -53,7 +85,12 @@ export async function apiFetch(endpoint, options = {}) {
     throw new Error(error.detail || 'Request failed');
   }
 
-  return response.json();
+  const data = await response.json();
+  const etag = response.headers.get('ETag');
+  if (method === 'GET' && etag) {
+    rememberValidator(endpoint, { etag, data: structuredClone(data) });
+  }
+  return data;
 }
 
 export const api = {
@@ -167,6 +204,10 @@ export const api = {
       method: 'POST',
       body: JSON.stringify({ columns }),
     }),
+    move: (id, { afterId = null, beforeId = null } = {}) => apiFetch(`/api/columns/${id}/move`, {
+      method: 'POST',
+      body: JSON.stringify({ after_id: afterId, before_id: beforeId }),
+    }),
     delete: (id) => apiFetch(`/api/columns/${id}`, { method: 'DELETE' }),
   },
   cards: {
@@ -182,6 +223,10 @@ export const api = {
       method: 'POST',
       body: JSON.stringify({ cards }),
     }),
+    move: (id, { columnId = null, afterId = null, beforeId = null } = {}) => apiFetch(`/api/cards/${id}/move`, {
+      method: 'POST',
+      body: JSON.stringify({ column_id: columnId, after_id: afterId, before_id: beforeId }),
+    }),
     delete: (id) => apiFetch(`/api/cards/${id}`, { method: 'DELETE' }),
   },
   comments: {
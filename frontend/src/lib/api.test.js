@@ -170,6 +170,91 @@ describe('apiFetch - expired session handling', () => {
   });
 });
 
+describe('apiFetch - conditional requests', () => {
+  // Boards are polled constantly and almost never change between polls. The
+  // server tags board, listing and card reads with an ETag; sending it back
+  // turns an unchanged poll into a bodiless 304.
+  it('sends the last ETag back and returns the cached body on a 304', async () => {
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7, name: 'Dev' }, { headers: { ETag: '"v1"' } }));
+    fetch.mockResolvedValueOnce(jsonResponse(null, { ok: false, status: 304 }));
+    const { apiFetch } = await freshApi();
+
+    await apiFetch('/api/boards/7');
+    const second = await apiFetch('/api/boards/7');
+
+    expect(fetch.mock.calls[0][1].headers).not.toHaveProperty('If-None-Match');
+    expect(fetch.mock.calls[1][1].headers['If-None-Match']).toBe('"v1"');
+    expect(second).toEqual({ id: 7, name: 'Dev' });
+  });
+
+  it('hands back a copy, so mutating a result cannot change the next one', async () => {
+    fetch.mockResolvedValueOnce(jsonResponse({ columns: [] }, { headers: { ETag: '"v1"' } }));
+    fetch.mockResolvedValue(jsonResponse(null, { ok: false, status: 304 }));
+    const { apiFetch } = await freshApi();
+
+    const first = await apiFetch('/api/boards/7');
+    first.columns.push('local edit');
+
+    await expect(apiFetch('/api/boards/7')).resolves.toEqual({ columns: [] });
+  });
+
+  it('forgets every validator when the session expires', async () => {
+    localStorage.setItem('token', 'first-user');
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7 }, { headers: { ETag: '"v1"' } }));
+    fetch.mockResolvedValueOnce(jsonResponse({ detail: 'expired' }, { ok: false, status: 401 }));
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7 }));
+    const { apiFetch } = await freshApi();
+
+    await apiFetch('/api/boards/7');
+    await expect(apiFetch('/api/boards')).rejects.toThrow('expired');
+    localStorage.setItem('token', 'second-user');
+    await apiFetch('/api/boards/7');
+
+    expect(fetch.mock.calls[2][1].headers).not.toHaveProperty('If-None-Match');
+  });
+
+  it('forgets every validator on logout', async () => {
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7 }, { headers: { ETag: '"v1"' } }));
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7 }));
+    const { apiFetch, clearValidators } = await freshApi();
+
+    await apiFetch('/api/boards/7');
+    clearValidators();
+    await apiFetch('/api/boards/7');
+
+    expect(fetch.mock.calls[1][1].headers).not.toHaveProperty('If-None-Match');
+  });
+
+  it('keeps validators for the endpoints used most recently only', async () => {
+    fetch.mockImplementation((url) => Promise.resolve(
+      jsonResponse({ url }, { headers: { ETag: `"${url}"` } }),
+    ));
+    const { apiFetch } = await freshApi();
+
+    await apiFetch('/api/boards/0');
+    for (let n = 1; n <= 100; n++) {
+      await apiFetch(`/api/boards/${n}`);
+    }
+    fetch.mockClear();
+    await apiFetch('/api/boards/0');
+    await apiFetch('/api/boards/100');
+
+    expect(fetch.mock.calls[0][1].headers).not.toHaveProperty('If-None-Match');
+    expect(fetch.mock.calls[1][1].headers['If-None-Match']).toBe('"/api/boards/100"');
+  });
+
+  it('never sends a validator on a write', async () => {
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7 }, { headers: { ETag: '"v1"' } }));
+    fetch.mockResolvedValueOnce(jsonResponse({ id: 7 }));
+    const { apiFetch } = await freshApi();
+
+    await apiFetch('/api/boards/7');
+    await apiFetch('/api/boards/7', { method: 'POST', body: '{}' });
+
+    expect(fetch.mock.calls[1][1].headers).not.toHaveProperty('If-None-Match');
+  });
+});
+
 describe('api surface', () => {
   it('routes a board fetch to the right endpoint', async () => {
     fetch.mockResolvedValue(jsonResponse({}));
@@ -190,6 +275,18 @@ describe('api surface', () => {
     expect(url).toBe('/api/cards/reorder');
     expect(JSON.parse(opts.body)).toEqual({ cards: [{ id: 1, position: 0 }, { id: 2, position: 1 }] });
   });
+
+  it('sends a card move as its column and new neighbours', async () => {
+    fetch.mockResolvedValue(jsonResponse({}));
+    const { api } = await freshApi();
+
+    await api.cards.move(7, { columnId: 3, afterId: 5 });
+
+    const [url, opts] = fetch.mock.calls[0];
+    expect(url).toBe('/api/cards/7/move');
+    expect(opts.method).toBe('POST');
+    expect(JSON.parse(opts.body)).toEqual({ column_id: 3, after_id: 5, before_id: null });
+  });
 });
 
 
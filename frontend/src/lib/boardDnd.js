@@ -7,10 +7,10 @@ import { TRIGGERS } from 'svelte-dnd-action';
  * svelte-dnd-action fires `consider` continuously while a card is in flight
  * and `finalize` once per affected zone on drop -- which means a cross-column
  * move finalizes *twice*, once on the source column and once on the target.
- * Both need to renumber their own cards, and only the target needs to move the
- * card between columns, so the two calls have to be distinguishable. That is
- * what the snapshot taken at DRAG_STARTED is for: a column's "new" cards are
- * the ones absent from its own pre-drag card list.
+ * Both carry the dragged item's id in `info.id`, but only the target still
+ * holds that item, so only the target has anything to tell the server: one
+ * move naming the card's new neighbours (see POST /api/cards/{id}/move). The
+ * server works the position out, and nothing else in the column is written.
  *
  * The caller owns the column array (it is Svelte $state in BoardView), so this
  * reads and writes it through accessors rather than holding it.
@@ -23,9 +23,8 @@ import { TRIGGERS } from 'svelte-dnd-action';
  * @param {(msg: string, err: Error) => void} [deps.onError]  defaults to console.error
  */
 export function createBoardDnd({ getColumns, setColumns, api, reload, onError }) {
-  // The board as it looked before the current drag began. Cleared once the
-  // drag resolves; a finalize arriving without it has nothing to diff against.
-  let originalColumnsState = null;
+  // Set when a drag starts and cleared once its drop has been sent; a
+  // finalize arriving outside a drag has nothing to send.
   let isDragInProgress = false;
 
   const report = onError || ((msg, err) => console.error(msg, err));
@@ -34,67 +33,52 @@ export function createBoardDnd({ getColumns, setColumns, api, reload, onError })
     setColumns(getColumns().map(col => (col.id === columnId ? { ...col, cards } : col)));
   }
 
+  // The ids either side of `id` in `items`, as the move endpoint takes them.
+  function neighbours(items, id) {
+    const index = items.findIndex(item => item.id === id);
+    if (index === -1) return null;
+    return {
+      afterId: index > 0 ? items[index - 1].id : null,
+      beforeId: index < items.length - 1 ? items[index + 1].id : null,
+    };
+  }
+
   function considerCards(columnId, e) {
     const { items, info } = e.detail;
 
     if (info.trigger === TRIGGERS.DRAG_STARTED) {
-      originalColumnsState = JSON.parse(JSON.stringify(getColumns()));
       isDragInProgress = true;
     }
 
     // The drag ended without a drop (escape, or released outside any zone).
-    // consider has already put the card back, so just drop the snapshot.
+    // consider has already put the card back.
     if (info.trigger === TRIGGERS.DRAG_STOPPED) {
       isDragInProgress = false;
-      originalColumnsState = null;
     }
 
     replaceCards(columnId, items);
   }
 
   async function finalizeCards(columnId, e) {
-    // No drag ever started, or this one already resolved: a finalize here would
-    // diff against a snapshot that no longer describes the pre-drag board.
+    // No drag ever started, or this one already resolved.
     if (!isDragInProgress) return;
 
-    const { items } = e.detail;
-
-    if (!originalColumnsState) {
-      originalColumnsState = JSON.parse(JSON.stringify(getColumns()));
-    }
-
-    const originalColumn = originalColumnsState.find(col => col.id === columnId);
-    const originalCardIds = new Set(originalColumn?.cards.map(c => c.id) || []);
-
-    const columnCards = items.map((card, index) => ({ ...card, position: index }));
+    const { items, info } = e.detail;
 
     // Show the new order immediately; roll back below if the server disagrees.
-    replaceCards(columnId, columnCards);
-
-    // Absent from this column before the drag => it came from another one, so
-    // its column_id is now stale on the server.
-    const newCards = columnCards.filter(card => !originalCardIds.has(card.id));
+    replaceCards(columnId, items.map((card, index) => ({ ...card, position: index })));
 
-    const reorderItems = columnCards.map((card, index) => ({ id: card.id, position: index }));
+    // The column a card was dragged out of: the target's finalize sends the
+    // move, and leaves the drag to be cleared then.
+    const around = neighbours(items, info.id);
+    if (!around) return;
+    isDragInProgress = false;
 
     try {
-      await api.cards.reorder(reorderItems);
-
-      for (const card of newCards) {
-        await api.cards.update(
-          card.id,
-          card.title,
-          card.description || null,
-          card.position,
-          columnId
-        );
-      }
+      await api.cards.move(info.id, { columnId, ...around });
     } catch (err) {
-      report('Failed to reorder cards:', err);
+      report('Failed to move card:', err);
       reload();
-    } finally {
-      originalColumnsState = null;
-      isDragInProgress = false;
     }
   }
 
@@ -103,15 +87,16 @@ export function createBoardDnd({ getColumns, setColumns, api, reload, onError })
   }
 
   async function finalizeColumns(e) {
-    const newColumns = e.detail.items.map((col, index) => ({ ...col, position: index }));
-    setColumns(newColumns);
+    const { items, info } = e.detail;
+    setColumns(items.map((col, index) => ({ ...col, position: index })));
 
-    const reorderItems = newColumns.map((col, index) => ({ id: col.id, position: index }));
+    const around = neighbours(items, info?.id);
+    if (!around) return;
 
     try {
-      await api.columns.reorder(reorderItems);
+      await api.columns.move(info.id, around);
     } catch (err) {
-      report('Failed to reorder columns:', err);
+      report('Failed to move column:', err);
       reload();
     }
   }
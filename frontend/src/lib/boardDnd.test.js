@@ -7,8 +7,8 @@ const card = (id) => ({ id, title: 'card ' + id, description: null, position: 0
 function harness(initialColumns) {
   let columns = initialColumns;
   const api = {
-    cards: { reorder: vi.fn().mockResolvedValue({}), update: vi.fn().mockResolvedValue({}) },
-    columns: { reorder: vi.fn().mockResolvedValue({}) },
+    cards: { move: vi.fn().mockResolvedValue({}) },
+    columns: { move: vi.fn().mockResolvedValue({}) },
   };
   const reload = vi.fn();
   const onError = vi.fn();
@@ -20,8 +20,10 @@ function harness(initialColumns) {
   return { dnd, api, reload, onError, get columns() { return columns; } };
 }
 
-const consider = (items, trigger) => ({ detail: { items, info: { trigger } } });
-const finalize = (items) => ({ detail: { items, info: { trigger: TRIGGERS.DROPPED_INTO_ZONE } } });
+const consider = (items, trigger, id) => ({ detail: { items, info: { trigger, id } } });
+const finalize = (items, id) => ({
+  detail: { items, info: { trigger: TRIGGERS.DROPPED_INTO_ZONE, id } },
+});
 
 // Todo holds cards 1 and 2; Done holds card 3.
 const board = () => ([
@@ -32,7 +34,7 @@ const board = () => ([
 describe('createBoardDnd - consider', () => {
   it('writes the in-flight order into the column being hovered', () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
+    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED, 2));
     expect(h.columns[0].cards.map(c => c.id)).toEqual([2, 1]);
     expect(h.columns[1].cards.map(c => c.id)).toEqual([3]);
   });
@@ -40,7 +42,7 @@ describe('createBoardDnd - consider', () => {
   it('leaves the other columns untouched', () => {
     const h = harness(board());
     const doneBefore = h.columns[1];
-    h.dnd.considerCards(10, consider([card(1)], TRIGGERS.DRAG_STARTED));
+    h.dnd.considerCards(10, consider([card(1)], TRIGGERS.DRAG_STARTED, 2));
     expect(h.columns[1]).toBe(doneBefore);
   });
 });
@@ -48,134 +50,124 @@ describe('createBoardDnd - consider', () => {
 describe('createBoardDnd - the drag guard', () => {
   it('ignores a finalize that no drag ever started', async () => {
     const h = harness(board());
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
-    expect(h.api.cards.reorder).not.toHaveBeenCalled();
+    await h.dnd.finalizeCards(10, finalize([card(2), card(1)], 2));
+    expect(h.api.cards.move).not.toHaveBeenCalled();
     expect(h.columns[0].cards.map(c => c.id)).toEqual([1, 2]);
   });
 
   it('ignores a finalize arriving after the drag was abandoned', async () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
-    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STOPPED));
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
-    expect(h.api.cards.reorder).not.toHaveBeenCalled();
+    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED, 2));
+    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STOPPED, 2));
+    await h.dnd.finalizeCards(10, finalize([card(2), card(1)], 2));
+    expect(h.api.cards.move).not.toHaveBeenCalled();
   });
 
   it('ignores a second finalize once the first has fully resolved', async () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
-    h.api.cards.reorder.mockClear();
-    await h.dnd.finalizeCards(10, finalize([card(1), card(2)]));
-    expect(h.api.cards.reorder).not.toHaveBeenCalled();
+    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED, 2));
+    await h.dnd.finalizeCards(10, finalize([card(2), card(1)], 2));
+    h.api.cards.move.mockClear();
+    await h.dnd.finalizeCards(10, finalize([card(1), card(2)], 2));
+    expect(h.api.cards.move).not.toHaveBeenCalled();
   });
 });
 
-describe('createBoardDnd - reordering within one column', () => {
-  it('renumbers positions from zero and sends them', async () => {
+describe('createBoardDnd - moving within one column', () => {
+  it('sends one move naming the new neighbours', async () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
+    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED, 2));
+    await h.dnd.finalizeCards(10, finalize([card(2), card(1)], 2));
 
-    expect(h.api.cards.reorder).toHaveBeenCalledWith([
-      { id: 2, position: 0 },
-      { id: 1, position: 1 },
-    ]);
+    expect(h.api.cards.move).toHaveBeenCalledTimes(1);
+    expect(h.api.cards.move).toHaveBeenCalledWith(2, {
+      columnId: 10,
+      afterId: null,
+      beforeId: 1,
+    });
     expect(h.columns[0].cards.map(c => [c.id, c.position])).toEqual([[2, 0], [1, 1]]);
   });
-
-  it('does not touch column_id when nothing crossed columns', async () => {
-    const h = harness(board());
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
-    expect(h.api.cards.update).not.toHaveBeenCalled();
-  });
 });
 
 describe('createBoardDnd - moving a card between columns', () => {
-  // A cross-column move finalizes twice, once per zone. Only the target may
-  // rewrite column_id; the source just renumbers what it has left.
-  it('reassigns column_id on the target column only', async () => {
+  // A cross-column move finalizes twice, once per zone. Only the target,
+  // which now holds the card, sends anything.
+  it('moves the card into the target column', async () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED));
+    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED, 2));
 
-    await h.dnd.finalizeCards(20, finalize([card(2), card(3)]));
+    await h.dnd.finalizeCards(20, finalize([card(2), card(3)], 2));
 
-    expect(h.api.cards.update).toHaveBeenCalledTimes(1);
-    expect(h.api.cards.update).toHaveBeenCalledWith(2, 'card 2', null, 0, 20);
+    expect(h.api.cards.move).toHaveBeenCalledTimes(1);
+    expect(h.api.cards.move).toHaveBeenCalledWith(2, {
+      columnId: 20,
+      afterId: null,
+      beforeId: 3,
+    });
   });
 
-  it('renumbers the source column without reassigning anything', async () => {
+  it('sends nothing for the source column', async () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED));
+    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED, 2));
 
-    await h.dnd.finalizeCards(10, finalize([card(1)]));
+    await h.dnd.finalizeCards(10, finalize([card(1)], 2));
 
-    expect(h.api.cards.reorder).toHaveBeenCalledWith([{ id: 1, position: 0 }]);
-    expect(h.api.cards.update).not.toHaveBeenCalled();
+    expect(h.api.cards.move).not.toHaveBeenCalled();
+    expect(h.columns[0].cards.map(c => c.id)).toEqual([1]);
   });
 
-  it('lets both zones finalize when they are dispatched together', async () => {
+  it('still moves the card when the source finalizes first', async () => {
     const h = harness(board());
-    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED));
+    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED, 2));
 
-    await Promise.all([
-      h.dnd.finalizeCards(10, finalize([card(1)])),
-      h.dnd.finalizeCards(20, finalize([card(2), card(3)])),
-    ]);
+    await h.dnd.finalizeCards(10, finalize([card(1)], 2));
+    await h.dnd.finalizeCards(20, finalize([card(3), card(2)], 2));
 
-    expect(h.api.cards.reorder).toHaveBeenCalledTimes(2);
-    expect(h.api.cards.update).toHaveBeenCalledTimes(1);
+    expect(h.api.cards.move).toHaveBeenCalledTimes(1);
+    expect(h.api.cards.move).toHaveBeenCalledWith(2, {
+      columnId: 20,
+      afterId: 3,
+      beforeId: null,
+    });
   });
 });
 
 describe('createBoardDnd - rollback', () => {
-  it('re-fetches the board when the reorder call fails', async () => {
+  it('re-fetches the board when the move fails', async () => {
     const h = harness(board());
-    h.api.cards.reorder.mockRejectedValue(new Error('boom'));
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
+    h.api.cards.move.mockRejectedValue(new Error('boom'));
+    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED, 2));
+    await h.dnd.finalizeCards(10, finalize([card(2), card(1)], 2));
 
     expect(h.reload).toHaveBeenCalledTimes(1);
     expect(h.onError).toHaveBeenCalled();
   });
 
-  it('re-fetches when the cross-column update fails', async () => {
-    const h = harness(board());
-    h.api.cards.update.mockRejectedValue(new Error('boom'));
-    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(20, finalize([card(2), card(3)]));
-    expect(h.reload).toHaveBeenCalledTimes(1);
-  });
-
   it('clears drag state after a failure, so the next drag still works', async () => {
     const h = harness(board());
-    h.api.cards.reorder.mockRejectedValueOnce(new Error('boom'));
-    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(10, finalize([card(2), card(1)]));
+    h.api.cards.move.mockRejectedValueOnce(new Error('boom'));
+    h.dnd.considerCards(10, consider([card(2), card(1)], TRIGGERS.DRAG_STARTED, 2));
+    await h.dnd.finalizeCards(10, finalize([card(2), card(1)], 2));
 
-    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED));
-    await h.dnd.finalizeCards(10, finalize([card(1), card(2)]));
-    expect(h.api.cards.reorder).toHaveBeenCalledTimes(2);
+    h.dnd.considerCards(10, consider([card(1), card(2)], TRIGGERS.DRAG_STARTED, 2));
+    await h.dnd.finalizeCards(10, finalize([card(1), card(2)], 2));
+    expect(h.api.cards.move).toHaveBeenCalledTimes(2);
   });
 });
 
-describe('createBoardDnd - reordering columns', () => {
-  it('renumbers columns and syncs the order', async () => {
+describe('createBoardDnd - moving columns', () => {
+  it('moves the dragged column and syncs the order', async () => {
     const h = harness(board());
-    await h.dnd.finalizeColumns({ detail: { items: [h.columns[1], h.columns[0]] } });
+    await h.dnd.finalizeColumns(finalize([h.columns[1], h.columns[0]], 20));
 
     expect(h.columns.map(c => [c.id, c.position])).toEqual([[20, 0], [10, 1]]);
-    expect(h.api.columns.reorder).toHaveBeenCalledWith([
-      { id: 20, position: 0 },
-      { id: 10, position: 1 },
-    ]);
+    expect(h.api.columns.move).toHaveBeenCalledWith(20, { afterId: null, beforeId: 10 });
   });
 
-  it('re-fetches the board when the column reorder fails', async () => {
+  it('re-fetches the board when the column move fails', async () => {
     const h = harness(board());
-    h.api.columns.reorder.mockRejectedValue(new Error('boom'));
-    await h.dnd.finalizeColumns({ detail: { items: [h.columns[1], h.columns[0]] } });
+    h.api.columns.move.mockRejectedValue(new Error('boom'));
+    await h.dnd.finalizeColumns(finalize([h.columns[1], h.columns[0]], 20));
     expect(h.reload).toHaveBeenCalledTimes(1);
   });
 
@@ -1,4 +1,6 @@
+import json
 import sys
+import textwrap
 from typing import Optional
 
 import typer
@@ -18,7 +20,7 @@ from kanban.config import (
     get_runtime_api_key,
     set_runtime_api_key,
 )
-from kanban.output import emit, emit_error, set_json_output
+from kanban.output import emit, emit_error, json_output, set_json_output
 
 app = typer.Typer(
     help="Kanban board CLI", no_args_is_help=True, invoke_without_command=True
@@ -237,6 +239,48 @@ def cmd_board_create(name: str = typer.Argument(..., help="Board name")):
     emit(result, lambda: rprint(f"Board created with [green]id={result['id']}[/green]"))
 
 
+def _split_at_list(value, indent):
+    """json.dumps(value, indent=2), shifted right by `indent` spaces, split
+    around its last value: an empty list, to be filled in."""
+    text = textwrap.indent(json.dumps(value, indent=2), " " * indent)
+    return text.rsplit("[]", 1)
+
+
+def _close_list(count, indent):
+    # After items, `]` goes on a line of its own; with none, straight after `[`.
+    return "\n" + " " * indent + "]" if count else "]"
+
+
+def _print_board_records(records):
+    """Print the board `records` make up as emit() prints a whole one --
+    json.dumps(board, indent=2) -- but a card at a time, so nothing more than
+    a card is held however big the board is. The one difference is the order
+    of the board's own keys: its columns come last."""
+    write = sys.stdout.write
+    board_tail = column_tail = None
+    columns = cards = 0
+    for record in records:
+        kind = record.pop("type")
+        if kind == "board":
+            head, board_tail = _split_at_list({**record, "columns": []}, 0)
+            write(head + "[")
+        elif kind == "column":
+            if column_tail is not None:
+                write(_close_list(cards, 6) + column_tail)
+            head, column_tail = _split_at_list({**record, "cards": []}, 4)
+            write(("," if columns else "") + "\n" + head + "[")
+            columns += 1
+            cards = 0
+        elif kind == "card":
+            del record["column_id"]
+            card = textwrap.indent(json.dumps(record, indent=2), " " * 8)
+            write(("," if cards else "") + "\n" + card)
+            cards += 1
+    if column_tail is not None:
+        write(_close_list(cards, 6) + column_tail)
+    write(_close_list(columns, 2) + board_tail + "\n")
+
+
 @board_app.command("get")
 def cmd_board_get(board_id: int = typer.Argument(..., help="Board ID")):
     """Show board details with column and card IDs."""
@@ -244,6 +288,11 @@ def cmd_board_get(board_id: int = typer.Argument(..., help="Board ID")):
     from rich.console import Console
 
     client = make_client()
+    if json_output():
+        # Printed as it arrives, so a board of any size starts printing at
+        # once and never has to fit in memory whole.
+        _print_board_records(client.board_stream(board_id))
+        return
     board = client.board_get(board_id)
 
     def render():
@@ -358,7 +407,9 @@ def cmd_card_create(
     description: Optional[str] = typer.Option(
         None, "--description", "-d", help="Card description"
     ),
-    position: int = typer.Option(0, "--position", "-p", help="Position"),
+    position: Optional[int] = typer.Option(
+        None, "--position", "-p", help="Position. Omit to append after the last card."
+    ),
 ):
     """Create a new card."""
     client = make_client()
@@ -449,6 +500,86 @@ def cmd_card_delete(card_id: int = typer.Argument(..., help="Card ID")):
         raise typer.Exit(1)
 
 
+def _read_operations(path, column):
+    """The card operations in the JSON file at `path` ("-" for stdin): a
+    list of them, or an object with an "operations" list. An entry without
+    an "op" is a create, into `column` if it names none itself."""
+    try:
+        if path == "-":
+            data = json.load(sys.stdin)
+        else:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+    except OSError as e:
+        emit_error(f"Could not read {path}: {e.strerror}")
+        raise typer.Exit(1)
+    except ValueError as e:
+        emit_error(f"{path} is not valid JSON: {e}")
+        raise typer.Exit(1)
+    if isinstance(data, dict):
+        data = data.get("operations")
+    if not isinstance(data, list) or not all(isinstance(op, dict) for op in data):
+        emit_error(f"{path} should hold a list of card operations.")
+        raise typer.Exit(1)
+    operations = []
+    for op in data:
+        op = dict(op)
+        op.setdefault("op", "create")
+        if op["op"] == "create" and column is not None:
+            op.setdefault("column_id", column)
+        operations.append(op)
+    return operations
+
+
+def _render_import(results):
+    applied = sum(1 for result in results if result["ok"])
+    rprint(f"[green]{applied} of {len(results)} operations applied[/green]")
+    for index, result in enumerate(results):
+        if not result["ok"]:
+            rprint(f"[red]  #{index}: {result['detail']}[/red]")
+
+
+@card_app.command("import")
+def cmd_card_import(
+    path: str = typer.Argument(
+        ..., help="JSON file of card operations, or - for stdin"
+    ),
+    column: Optional[int] = typer.Option(
+        None, "--column", "-c", help="Column for creates that name none"
+    ),
+    best_effort: bool = typer.Option(
+        False,
+        "--best-effort",
+        help="Apply what can be applied instead of nothing when one fails",
+    ),
+):
+    """Create, update, move and delete cards from a file, in one request.
+
+    Each entry is an object like {"op": "create", "column_id": 3, "title":
+    "..."}; "update" and "move" take an "id" and the fields to change,
+    "delete" just the "id". Entries without an "op" are creates.
+    """
+    operations = _read_operations(path, column)
+    client = make_client()
+    try:
+        result = client.cards_bulk(operations, best_effort=best_effort)
+    except requests.exceptions.HTTPError as e:
+        # All or nothing, and something failed: the body says what.
+        try:
+            body = e.response.json()
+        except ValueError:
+            raise e
+        if not isinstance(body, dict) or "results" not in body:
+            raise e
+        emit_error(
+            f"Nothing imported. {body['detail']}", status=e.response.status_code
+        )
+        raise typer.Exit(1)
+    emit(result, lambda: _render_import(result["results"]))
+    if not all(item["ok"] for item in result["results"]):
+        raise typer.Exit(1)
+
+
 # === Organization Commands ===
 
 org_app = typer.Typer(help="Organization management commands", no_args_is_help=True)
@@ -1,3 +1,5 @@
+import json
+
 import requests
 
 from kanban.config import get_server_url, get_token, get_api_key, set_token
@@ -10,11 +12,120 @@ DEFAULT_TIMEOUT = 30
 # is published as a standalone package and does not ship the server.
 RENEWED_TOKEN_HEADER = "X-Renewed-Token"
 
+# What GET /api/boards/{id}?stream=ndjson answers with: a JSON record a line.
+NDJSON = "application/x-ndjson"
+
 
 class KanbanError(Exception):
     """A problem the user can act on, reported without a traceback."""
 
 
+def board_records(board):
+    """A whole board as the records KanbanClient.board_stream yields."""
+    fields = {key: value for key, value in board.items() if key != "columns"}
+    yield {"type": "board", **fields}
+    for column in board.get("columns", []):
+        cards = column.get("cards", [])
+        fields = {key: value for key, value in column.items() if key != "cards"}
+        yield {"type": "column", **fields}
+        for card in cards:
+            yield {"type": "card", "column_id": column["id"], **card}
+
+
+# KanbanClient methods a Batch does not offer.
+NOT_BATCHED = {"batch", "board_stream", "login"}
+
+
+class BatchCall:
+    """A call queued in a Batch. Its `result` is the response body once the
+    batch has been sent."""
+
+    def __init__(self, method, path, body):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.status = None
+        self._result = None
+
+    @property
+    def result(self):
+        if self.status is None:
+            raise KanbanError(f"{self.method} {self.path} has not been sent yet.")
+        if self.status >= 400:
+            detail = self._result
+            if isinstance(detail, dict):
+                detail = detail.get("detail", detail)
+            raise KanbanError(
+                f"{self.method} {self.path} failed ({self.status}): {detail}"
+            )
+        return self._result
+
+
+class Batch:
+    """KanbanClient calls queued and sent as one POST /api/batch.
+
+        with client.batch() as batch:
+            boards = batch.boards()
+            card = batch.card_create(3, "Write the release notes")
+        print(boards.result, card.result)
+
+    Every KanbanClient method that returns the API's response is available;
+    each returns a BatchCall, whose result is there once the block ends.
+    With atomic=True the calls share one transaction: the first to fail
+    rolls back the rest.
+    """
+
+    def __init__(self, client, atomic=False):
+        self._client = client
+        self.atomic = atomic
+        self.calls = []
+        self.rolled_back = False
+
+    def _request(self, method, path, json=None, **kwargs):
+        call = BatchCall(method, path, json)
+        self.calls.append(call)
+        return call
+
+    def __getattr__(self, name):
+        method = getattr(KanbanClient, name, None)
+        # login reads its response, which a queued call does not have yet;
+        # board_stream reads it as it arrives.
+        if not callable(method) or name.startswith("_") or name in NOT_BATCHED:
+            raise AttributeError(name)
+        # The client's own method, queueing through our _request.
+        return lambda *args, **kwargs: method(self, *args, **kwargs)
+
+    def send(self):
+        """Send every call queued since the last send."""
+        calls, self.calls = self.calls, []
+        if not calls:
+            return []
+        data = self._client._request(
+            "POST",
+            "/api/batch",
+            json={
+                "calls": [
+                    {"method": call.method, "path": call.path, "body": call.body}
+                    for call in calls
+                ],
+                "atomic": self.atomic,
+            },
+        )
+        for call, response in zip(calls, data["responses"]):
+            call.status = response["status"]
+            call._result = response["body"]
+        self.rolled_back = data.get("rolled_back", False)
+        return calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # An exception in the block means the calls were never meant to go.
+        if exc_type is None:
+            self.send()
+
+
 class KanbanClient:
     def __init__(self, server_url=None, token=None, api_key=None):
         self.server_url = server_url or get_server_url()
@@ -28,6 +139,12 @@ class KanbanClient:
         # bug --api-key already had.
         self._token_from_config = self.token is not None and self.token == get_token()
         self.session = requests.Session()
+        # url -> (ETag, body) of the last GET that came back with a validator.
+        # Sent back as If-None-Match, so re-reading something that has not
+        # changed costs the server a version check and the wire a bare 304.
+        # The raw body is kept rather than the parsed data so every caller gets
+        # its own copy to mutate.
+        self._validators = {}
         if self.api_key:
             self.session.headers.update({"X-API-Key": self.api_key})
         elif self.token:
@@ -35,8 +152,32 @@ class KanbanClient:
 
     def _request(self, method, path, **kwargs):
         url = f"{self.server_url.rstrip('/')}{path}"
-        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
 
+        cached = self._validators.get(url) if method == "GET" else None
+        if cached:
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}),
+                "If-None-Match": cached[0],
+            }
+
+        response = self._send(method, url, **kwargs)
+
+        if cached and response.status_code == 304:
+            return json.loads(cached[1])
+
+        # HTTPError is left alone: individual commands catch it to explain
+        # domain-specific failures, and main() handles whatever they don't.
+        response.raise_for_status()
+        data = response.json()
+
+        etag = response.headers.get("ETag")
+        if method == "GET" and isinstance(etag, str):
+            self._validators[url] = (etag, response.content)
+        return data
+
+    def _send(self, method, url, **kwargs):
+        """The server's response, with failures to reach it made KanbanErrors."""
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
         try:
             response = self.session.request(method, url, **kwargs)
         except requests.exceptions.Timeout:
@@ -65,11 +206,7 @@ class KanbanClient:
             )
 
         self._store_renewed_token(response)
-
-        # HTTPError is left alone: individual commands catch it to explain
-        # domain-specific failures, and main() handles whatever they don't.
-        response.raise_for_status()
-        return response.json()
+        return response
 
     def _store_renewed_token(self, response):
         """Save a replacement token the server offered.
@@ -90,6 +227,10 @@ class KanbanClient:
         self.session.headers.update({"Authorization": f"Bearer {renewed}"})
         set_token(renewed)
 
+    def batch(self, atomic=False):
+        """A Batch: calls queued in its `with` block go out as one request."""
+        return Batch(self, atomic=atomic)
+
     def login(self, username, password):
         data = self._request(
             "POST", "/api/token", json={"username": username, "password": password}
@@ -105,6 +246,22 @@ class KanbanClient:
     def board_get(self, board_id):
         return self._request("GET", f"/api/boards/{board_id}")
 
+    def board_stream(self, board_id):
+        """The board as it arrives rather than once it all has: yields its
+        {"type": "board" | "column" | "card", ...} records, in order, from
+        GET /api/boards/{id}?stream=ndjson."""
+        url = f"{self.server_url.rstrip('/')}/api/boards/{board_id}"
+        response = self._send("GET", url, params={"stream": "ndjson"}, stream=True)
+        with response:
+            response.raise_for_status()
+            if response.headers.get("Content-Type", "").startswith(NDJSON):
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+            else:
+                # A server from before ?stream= sends the whole board anyway.
+                yield from board_records(response.json())
+
     def board_update(self, board_id, name):
         return self._request("POST", f"/api/boards/{board_id}", json={"name": name})
 
@@ -131,17 +288,12 @@ class KanbanClient:
     def card_get(self, card_id):
         return self._request("GET", f"/api/cards/{card_id}")
 
-    def card_create(self, column_id, title, description=None, position=0):
-        return self._request(
-            "POST",
-            "/api/cards",
-            json={
-                "column_id": column_id,
-                "title": title,
-                "description": description,
-                "position": position,
-            },
-        )
+    def card_create(self, column_id, title, description=None, position=None):
+        # As for columns: no position means the server appends.
+        data = {"column_id": column_id, "title": title, "description": description}
+        if position is not None:
+            data["position"] = position
+        return self._request("POST", "/api/cards", json=data)
 
     def card_update(
         self, card_id, title=None, description=None, position=None, column_id=None
@@ -162,6 +314,15 @@ class KanbanClient:
     def card_delete(self, card_id):
         return self._request("DELETE", f"/api/cards/{card_id}")
 
+    def cards_bulk(self, operations, best_effort=False):
+        """Apply many card operations -- dicts with an "op" of create, update,
+        move or delete -- in one request. All or nothing unless best_effort."""
+        return self._request(
+            "POST",
+            "/api/cards/bulk",
+            json={"operations": operations, "best_effort": best_effort},
+        )
+
     # Organization methods
     def organizations(self):
         return self._request("GET", "/api/organizations")